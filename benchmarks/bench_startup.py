@@ -0,0 +1,125 @@
+#bench_startup.py
+
+"""
+Benchmark da inicialização do chatbot (do início do processo até o primeiro prompt).
+
+Mede, em processos Python novos:
+  - o tempo de importação do main.py, com o detalhamento de `python -X importtime`
+    (os módulos importados diretamente pelo main.py que mais pesam);
+  - o tempo até o primeiro prompt: o main.py é executado de verdade, o prompt é aguardado
+    na saída do processo e o chatbot é encerrado com /sair.
+
+A primeira repetição é a mais próxima de uma partida a frio; as seguintes se beneficiam do
+cache de arquivos do sistema operacional. Nenhuma requisição é feita à API: se OPENAI_API_KEY
+não estiver definida, uma chave fictícia é usada.
+
+Uso:
+    python3 benchmarks/bench_startup.py --repeticoes 5 --top 10
+"""
+
+import os
+import sys
+import time
+import select
+import argparse
+import statistics
+import subprocess
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+# Texto exibido no prompt do chatbot (veja ChatEngine.get_prompt em utils/chat_engine.py)
+PROMPT_MARKER = "CHATGPT VOC".encode("utf-8")
+
+def _benchmark_env() -> dict:
+    """Ambiente dos processos medidos (com uma chave fictícia se nenhuma estiver definida)."""
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    return env
+
+def parse_importtime(stderr: str) -> list:
+    """
+    Interpreta a saída de `python -X importtime`.
+
+    Returns:
+        list: Tuplas (modulo, tempo_proprio_us, tempo_acumulado_us, nivel), na ordem da saída.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        level = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), level))
+    return entries
+
+def measure_import(python: str) -> tuple:
+    """
+    Importa o main.py em um processo novo com -X importtime.
+
+    Returns:
+        tuple: (tempo_total_s, lista de (modulo, tempo_acumulado_us) importados diretamente pelo main).
+    """
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", "import main"],
+        cwd=project_root, env=_benchmark_env(), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Falha ao importar main.py:\n{result.stderr[-2000:]}")
+    entries = parse_importtime(result.stderr)
+    total_us = next(cumulative for name, _, cumulative, level in entries if name == "main" and level == 0)
+    # Os módulos importados pelo main têm nível 1 (os do site.py também, mas são importados antes do main)
+    main_position = next(i for i, entry in enumerate(entries) if entry[0] == "main" and entry[3] == 0)
+    site_position = max((i for i, entry in enumerate(entries[:main_position]) if entry[3] == 0), default=-1)
+    children = [(name, cumulative) for name, _, cumulative, level in entries[site_position + 1:main_position] if level == 1]
+    return total_us / 1e6, children
+
+def measure_first_prompt(python: str, timeout: float = 60.0) -> float:
+    """Executa o main.py e mede o tempo até o primeiro prompt aparecer na saída."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [python, "-u", "main.py"], cwd=project_root, env=_benchmark_env(),
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    output = b""
+    elapsed = None
+    try:
+        while PROMPT_MARKER not in output:
+            remaining = timeout - (time.perf_counter() - start)
+            ready, _, _ = select.select([process.stdout], [], [], max(remaining, 0))
+            chunk = os.read(process.stdout.fileno(), 4096) if ready else b""
+            if not chunk:
+                raise RuntimeError(f"O prompt não apareceu (saída: {output[-500:].decode('utf-8', 'replace')!r}).")
+            output += chunk
+        elapsed = time.perf_counter() - start
+        process.communicate(b"/sair\nn\n", timeout=timeout)
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+    return elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da inicialização do chatbot até o primeiro prompt.")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Repetições de cada medição (usa a mediana).")
+    parser.add_argument("--top", type=int, default=10, help="Quantos módulos mais lentos exibir.")
+    parser.add_argument("--python", default=sys.executable, help="Interpretador Python usado nas medições.")
+    args = parser.parse_args()
+
+    import_times, prompt_times = [], []
+    slowest = {}
+    for _ in range(args.repeticoes):
+        total, children = measure_import(args.python)
+        import_times.append(total)
+        for name, cumulative_us in children:
+            slowest.setdefault(name, []).append(cumulative_us)
+        prompt_times.append(measure_first_prompt(args.python))
+
+    print(f"Inicialização do chatbot ({args.repeticoes} repetições):\n")
+    print(f"{'medição':<22} {'1ª (fria)':>10} {'mediana':>10}")
+    print(f"{'importar main.py':<22} {import_times[0] * 1000:8.1f}ms {statistics.median(import_times) * 1000:8.1f}ms")
+    print(f"{'até o primeiro prompt':<22} {prompt_times[0] * 1000:8.1f}ms {statistics.median(prompt_times) * 1000:8.1f}ms")
+
+    print(f"\nMódulos importados pelo main.py que mais pesam (mediana do tempo acumulado):")
+    ranking = sorted(((statistics.median(times), name) for name, times in slowest.items()), reverse=True)
+    for cumulative_us, name in ranking[:args.top]:
+        print(f"- {name:<28} {cumulative_us / 1000:8.1f}ms")
@@ -0,0 +1,91 @@
+#bench_storage_format.py
+
+"""
+Benchmark dos formatos de arquivo de sessões (STORAGE_FILE_FORMAT).
+
+Gera uma sessão sintética com muitas mensagens e compara, para cada formato disponível
+("json", "json.gz" e, se o pacote estiver instalado, "msgpack"):
+  - o tempo de salvamento (serialização + gravação atômica com fsync);
+  - o tempo de carregamento (leitura + desserialização);
+  - o tamanho do arquivo em disco.
+
+Use --diretorio para medir no HD externo em vez do diretório temporário do sistema.
+
+Uso:
+    python3 benchmarks/bench_storage_format.py --mensagens 5000 --repeticoes 5
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from utils import storage_backends
+from utils.storage_backends import JsonFileBackend
+
+WORDS = (
+    "o documento explica como configurar a rede do servidor e quais são os passos para "
+    "instalar o sistema operacional no dispositivo externo com segurança e desempenho"
+).split()
+
+def create_synthetic_session(num_messages: int, seed: int = 42) -> dict:
+    """Cria uma sessão com `num_messages` mensagens alternando entre usuário e assistente."""
+    rng = random.Random(seed)
+    history = [{"role": "system", "content": "Você é um assistente de estudo didático e prático."}]
+    for index in range(num_messages):
+        role = "user" if index % 2 == 0 else "assistant"
+        length = rng.randint(8, 30) if role == "user" else rng.randint(60, 250)
+        history.append({"role": role, "content": " ".join(rng.choice(WORDS) for _ in range(length)) + "."})
+    return {
+        "chat_history": history,
+        "active_api_summary_content": " ".join(rng.choice(WORDS) for _ in range(800)),
+        "active_api_summary_metadata": {"original_filename": "manual.pdf", "document_key": "0" * 64}
+    }
+
+def benchmark_format(file_format: str, session_data: dict, base_dir: str, repetitions: int) -> dict:
+    """Mede salvamento, carregamento e tamanho de uma sessão gravada no formato indicado."""
+    backend = JsonFileBackend(os.path.join(base_dir, file_format), os.path.join(base_dir, "resumos"), file_format)
+    save_times, load_times = [], []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        backend.save_session("sessao", session_data)
+        save_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        loaded = backend.load_session("sessao")
+        load_times.append(time.perf_counter() - start)
+    if loaded != session_data:
+        print(f"Aviso: a sessão lida no formato '{file_format}' é diferente da gravada.")
+    return {
+        "save": statistics.median(save_times),
+        "load": statistics.median(load_times),
+        "size": os.path.getsize(backend._session_path("sessao"))
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark dos formatos de arquivo de sessões.")
+    parser.add_argument("--mensagens", type=int, default=5000, help="Número de mensagens da sessão sintética.")
+    parser.add_argument("--repeticoes", type=int, default=5, help="Repetições de cada medição (usa a mediana).")
+    parser.add_argument("--diretorio", default=None, help="Diretório onde os arquivos são gravados.")
+    args = parser.parse_args()
+
+    formats = [f for f in storage_backends.FILE_FORMATS if f != "msgpack" or storage_backends.msgpack is not None]
+    if "msgpack" not in formats:
+        print("Pacote msgpack não instalado: o formato 'msgpack' não será medido.\n")
+
+    session_data = create_synthetic_session(args.mensagens)
+    with tempfile.TemporaryDirectory(dir=args.diretorio) as tmp_dir:
+        results = {f: benchmark_format(f, session_data, tmp_dir, args.repeticoes) for f in formats}
+
+    baseline = results["json"]
+    print(f"Sessão sintética com {args.mensagens} mensagens (mediana de {args.repeticoes} repetições):\n")
+    print(f"{'formato':<10} {'salvar':>10} {'carregar':>10} {'tamanho':>12} {'vs json':>9}")
+    for file_format, result in results.items():
+        print(f"{file_format:<10} {result['save'] * 1000:8.1f}ms {result['load'] * 1000:8.1f}ms "
+              f"{result['size'] / 1024:9.1f}KiB {result['size'] / baseline['size']:8.0%}")
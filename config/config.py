@@ -12,6 +12,16 @@ DEFAULT_MODEL = "gpt-4o-mini"
 # Valores mais baixos são mais focados e determinísticos, valores mais altos são mais criativos.
 TEMPERATURE = 0.8
 
+# Exibe as respostas do chat conforme são geradas (streaming), em vez de esperar a resposta completa.
+STREAM_RESPONSES = True
+
+# Exibe, após cada resposta, o tempo até o primeiro token e o tempo total da requisição.
+SHOW_RESPONSE_TIMING = True
+
+# Carrega o cliente da OpenAI e o codificador de tokens em segundo plano logo após a inicialização,
+# enquanto o usuário digita. Se False, eles são carregados apenas no primeiro uso.
+STARTUP_WARMUP = True
+
 # --- Limites de Contexto e Tokens ---
 # Limite máximo de tokens de entrada para o modelo (incluindo System, Histórico e Pergunta).
 # Consulte a documentação da OpenAI para os limites específicos do modelo escolhido.
@@ -19,13 +29,157 @@ TEMPERATURE = 0.8
 # gpt-4o-mini (128k) -> 128000 tokens
 MAX_TOKENS_LIMIT = 100000 # Um pouco abaixo do limite do gpt-4o-mini para segurança
 
+# Número de textos cuja contagem de tokens é memorizada (mensagens, resumo ativo, etc.).
+# Evita recodificar todo o histórico a cada turno.
+TOKEN_COUNT_CACHE_SIZE = 4096
+
 # Limite de tokens para a resposta gerada pela IA ao resumir PDFs
 SUMMARY_MAX_TOKENS = 1500 # Um valor razoável para a maioria dos resumos. Ajuste conforme necessário.
 
-# Número máximo de mensagens do histórico de chat a serem incluídas na requisição da API.
-# Isso ajuda a controlar o uso de tokens e manter o contexto relevante.
-# Cada mensagem é um par (user, assistant).
-HISTORY_MESSAGE_LIMIT = 15 # Limita o histórico a 10 pares (20 mensagens individuais)
+# --- Resumo de Documentos Longos (map-reduce) ---
+# Tamanho máximo (em tokens) de cada trecho do documento enviado para resumo.
+# Documentos maiores que isso são divididos em trechos, resumidos em paralelo e depois combinados.
+SUMMARY_CHUNK_TOKENS = 6000
+
+# Limite de tokens da resposta para os resumos parciais (de cada trecho e das combinações intermediárias).
+SUMMARY_CHUNK_MAX_TOKENS = 600
+
+# Número máximo de requisições de resumo parcial feitas ao mesmo tempo.
+SUMMARY_MAP_CONCURRENCY = 4
+
+# Orçamento de tokens do prompt de cada pergunta no chat (sistema + resumo ativo + histórico + pergunta).
+# A mensagem de sistema, o resumo ativo e a pergunta são sempre enviados; o histórico é preenchido
+# com as mensagens mais recentes até o orçamento acabar. Deve ser menor ou igual a MAX_TOKENS_LIMIT.
+CHAT_CONTEXT_TOKEN_BUDGET = 16000
+
+# --- Busca nos Documentos (recuperação de trechos) ---
+# Tamanho (em tokens) dos trechos indexados para busca. Trechos menores dão respostas mais precisas.
+RETRIEVAL_CHUNK_TOKENS = 300
+
+# Número máximo de trechos do documento recuperados para cada pergunta.
+RETRIEVAL_TOP_K = 5
+
+# Orçamento de tokens para os trechos recuperados que são enviados junto com cada pergunta.
+RETRIEVAL_TOKEN_BUDGET = 2000
+
+# --- Busca Vetorial (embeddings) ---
+# Gerador de embeddings dos trechos: "hashing" funciona offline, sem custo, direto na TV Box;
+# "openai" usa a API de embeddings (melhor qualidade semântica, mas exige internet e tem custo).
+EMBEDDING_BACKEND = "hashing"
+
+# Modelo de embeddings da OpenAI (usado apenas quando EMBEDDING_BACKEND = "openai").
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Número de dimensões dos vetores gerados pelo embedder "hashing".
+HASHING_EMBEDDING_DIM = 512
+
+# Tipo numérico da matriz de embeddings gravada em disco: "float16" ocupa metade do espaço de "float32".
+EMBEDDING_DTYPE = "float16"
+
+# Número de trechos enviados em cada requisição de embeddings.
+EMBEDDING_BATCH_SIZE = 64
+
+# --- Busca Híbrida ---
+# Número de candidatos obtidos de cada busca (lexical BM25 e vetorial) antes da fusão dos rankings.
+HYBRID_CANDIDATES = 20
+
+# Constante k da fusão por posição recíproca (Reciprocal Rank Fusion): 1 / (k + posição).
+RRF_K = 60
+
+# Número de consultas recentes cujos resultados ficam em cache (perguntas repetidas não refazem a busca).
+RETRIEVAL_QUERY_CACHE_SIZE = 256
+
+# Número de medições recentes mantidas para calcular os percentis de latência da busca.
+RETRIEVAL_LATENCY_SAMPLES = 500
+
+# --- Requisições Simultâneas à API ---
+# Número máximo de requisições assíncronas à API em andamento ao mesmo tempo
+# (usado pelas funções assíncronas e em lote de api_service).
+API_MAX_CONCURRENT_REQUESTS = 8
+
+# --- Novas Tentativas e Limites de Taxa da API ---
+# Número máximo de novas tentativas quando a API retorna limite de taxa (429), erro de conexão
+# ou erro interno do servidor. As esperas crescem exponencialmente, com variação aleatória (jitter),
+# e respeitam o cabeçalho Retry-After quando a API o envia.
+API_MAX_RETRIES = 5
+API_RETRY_BASE_DELAY = 1.0 # Segundos de espera antes da primeira nova tentativa
+API_RETRY_MAX_DELAY = 60.0 # Espera máxima entre tentativas (segundos)
+
+# Cotas da sua conta na OpenAI. O cliente distribui as requisições para não ultrapassá-las,
+# suavizando rajadas em vez de receber erros 429. Consulte os limites em platform.openai.com/account/limits.
+API_REQUESTS_PER_MINUTE = 500
+API_TOKENS_PER_MINUTE = 200000
+
+# --- Cache de Respostas da API ---
+# Reutiliza respostas (e resumos já salvos) quando a mesma requisição — mensagens, modelo,
+# temperatura e max_tokens — já foi feita antes. Defina como False para sempre chamar a API.
+COMPLETION_CACHE_ENABLED = True
+
+# Tempo de vida (em segundos) de uma resposta no cache. Entradas mais antigas são descartadas.
+COMPLETION_CACHE_TTL_SECONDS = 30 * 24 * 60 * 60 # 30 dias
+
+# --- Extração de Texto de PDFs ---
+# Número de processos usados para extrair texto de PDFs em paralelo. Cada processo abre o PDF inteiro
+# com o seu próprio leitor, então a memória cresce com o número de processos: o padrão é pequeno
+# (no máximo 2) para caber em máquinas com 1 GB de RAM. Use 1 para desativar a extração paralela.
+PDF_EXTRACTION_WORKERS = min(2, os.cpu_count() or 1)
+
+# Número mínimo de páginas para que a extração paralela seja usada.
+# Abaixo disso, o custo de iniciar os processos não compensa e a extração é sequencial.
+PDF_PARALLEL_MIN_PAGES = 40
+
+# --- Armazenamento de Sessões e Resumos ---
+# Onde as sessões e os resumos são gravados:
+# "json"   -> um arquivo JSON por sessão e por resumo (formato original, fácil de inspecionar);
+# "sqlite" -> um único banco SQLite (modo WAL) em que cada turno do chat apenas anexa as mensagens novas;
+# "journal" -> um diário (JSONL) por sessão, só de anexação, compactado periodicamente em um snapshot
+#              (os resumos continuam em arquivos JSON).
+# As sessões e resumos em JSON existentes não são importados automaticamente: antes de trocar o backend,
+# importe-os com: python utils/migrate_storage.py [--destino journal] (os arquivos originais são mantidos).
+STORAGE_BACKEND = "json"
+
+# Formato dos arquivos de sessões, resumos e snapshots (backends "json" e "journal"):
+# "json"    -> JSON legível (indentado), o formato original;
+# "json.gz" -> JSON compacto comprimido com gzip (arquivos bem menores, leitura mais rápida no HD externo);
+# "msgpack" -> binário compacto (requer: pip install msgpack).
+# A leitura detecta o formato pelo conteúdo, então arquivos já existentes continuam funcionando.
+STORAGE_FILE_FORMAT = "json"
+
+# Número de mensagens mais recentes carregadas ao abrir uma sessão (backend "sqlite").
+# As mensagens mais antigas são lidas do banco somente quando necessário (ex: ao exportar o chat),
+# então trocar de sessão custa o mesmo, seja a sessão nova ou muito longa.
+# A leitura sob demanda só existe no backend "sqlite": nos backends "json" e "journal" a sessão é um
+# documento único (snapshot), lido inteiro. Ao abrir nesses backends uma sessão com mais mensagens que
+# este limite, um aviso sugere trocar para o "sqlite" (veja utils/migrate_storage.py).
+SESSION_TAIL_MESSAGES = 200
+
+# Número de mensagens antigas lidas de cada vez quando o histórico precisa delas.
+SESSION_HISTORY_PAGE_SIZE = 200
+
+# Grava as sessões em segundo plano (write-behind): o prompt volta imediatamente após cada resposta,
+# e vários salvamentos pendentes da mesma sessão são combinados em uma única gravação.
+# Os salvamentos pendentes são concluídos ao sair (/sair ou Ctrl+C). Use False para gravar na hora.
+WRITE_BEHIND_SAVES = True
+
+# Política de fsync do diário de sessões (backend "journal"):
+# "always"   -> fsync a cada gravação (mais seguro, mais lento no HD externo);
+# "interval" -> fsync no máximo uma vez a cada JOURNAL_FSYNC_INTERVAL_SECONDS (uma queda de energia
+#               pode perder as gravações desse intervalo);
+# "never"    -> deixa a gravação em disco a cargo do sistema operacional.
+JOURNAL_FSYNC = "interval"
+JOURNAL_FSYNC_INTERVAL_SECONDS = 1.0
+
+# Tamanho (em bytes) a partir do qual o diário de uma sessão é compactado em segundo plano
+# (o diário é incorporado ao snapshot da sessão e recomeça vazio).
+JOURNAL_COMPACTION_BYTES = 1024 * 1024 # 1 MB
+
+# --- Exportação de Chats para PDF ---
+# Número máximo de mensagens por arquivo PDF exportado. Sessões maiores são exportadas em várias partes,
+# para que a memória usada na exportação não cresça com o tamanho da sessão. Use 0 para não dividir.
+EXPORT_MESSAGES_PER_FILE = 2000
+# Se True, /exportar_chat e a exportação ao sair rodam em um processo separado, sem bloquear o terminal
+# (acompanhe com /exportacoes). Se False, a exportação é feita na hora, como antes.
+EXPORT_IN_BACKGROUND = True
 
 # --- Caminhos de Arquivo e Diretórios ---
 # Caminho base para o diretório de dados, relativo ao diretório raiz do projeto.
@@ -34,8 +188,13 @@ BASE_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
 # Caminho para o diretório de perfis de usuário.
 PROFILES_DIR = os.path.join(BASE_DATA_DIR, 'profiles')
 
+# Perfil usado quando nenhum é informado (--perfil na linha de comando ou ?perfil= no servidor).
+# Pode ser definido pela variável de ambiente CHATBOT_PERFIL. Cada perfil tem as suas sessões, resumos e exports.
+DEFAULT_PROFILE = os.environ.get("CHATBOT_PERFIL") or "default"
+
 # Caminho para o diretório do perfil padrão (onde sessões e resumos serão salvos).
-DEFAULT_PROFILE_DIR = os.path.join(PROFILES_DIR, 'default')
+# Os caminhos abaixo são os do perfil padrão; os demais perfis usam a mesma estrutura em PROFILES_DIR/<perfil>.
+DEFAULT_PROFILE_DIR = os.path.join(PROFILES_DIR, DEFAULT_PROFILE)
 
 # Caminho para o diretório onde as sessões de chat são salvas.
 SESSIONS_DIR = os.path.join(DEFAULT_PROFILE_DIR, 'sessions')
@@ -46,9 +205,42 @@ SUMMARIES_DIR = os.path.join(DEFAULT_PROFILE_DIR, 'summaries')
 # Caminho para o diretório onde os PDFs de interações exportadas serão salvos.
 EXPORTS_DIR = os.path.join(DEFAULT_PROFILE_DIR, 'exports')
 
+# Caminho para os diários e snapshots das sessões (usado quando STORAGE_BACKEND = "journal").
+JOURNAL_DIR = os.path.join(DEFAULT_PROFILE_DIR, 'journal')
+
+# Caminho para o banco SQLite de sessões e resumos (usado quando STORAGE_BACKEND = "sqlite").
+SQLITE_DB_PATH = os.path.join(DEFAULT_PROFILE_DIR, 'chatbot.sqlite3')
+
+# Caminho para o cache de extração de texto dos PDFs (indexado pelo hash do conteúdo do PDF).
+EXTRACTION_CACHE_DIR = os.path.join(BASE_DATA_DIR, 'cache', 'extraction')
+
+# Tamanho máximo (em bytes) do cache de extração. Ao ultrapassá-lo, os documentos
+# usados há mais tempo são removidos (LRU), evitando encher o HD externo.
+EXTRACTION_CACHE_MAX_BYTES = 200 * 1024 * 1024 # 200 MB
+
+# Caminho para o cache de respostas da API (indexado pelo hash normalizado da requisição).
+COMPLETION_CACHE_DIR = os.path.join(BASE_DATA_DIR, 'cache', 'completions')
+
+# Caminho para os índices de busca (BM25) dos trechos extraídos dos PDFs, um subdiretório por documento.
+INDEXES_DIR = os.path.join(BASE_DATA_DIR, 'indexes')
+
 # Caminho para o diretório onde os PDFs originais são armazenados.
 PDFS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'pdfs')
 
+# Socket Unix do modo daemon (utils/chat_daemon.py). Fica no diretório de execução do usuário,
+# e não no HD externo: sistemas de arquivos como FAT/NTFS não suportam sockets.
+DAEMON_SOCKET_PATH = os.path.join(os.environ.get("XDG_RUNTIME_DIR") or "/tmp", f"chatbot-consulta-pdf-{os.getuid()}.sock")
+
+# --- Configurações do Servidor HTTP/WebSocket (utils/chat_server.py) ---
+# Endereço e porta do servidor. Por padrão, aceita apenas conexões da própria máquina.
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+# Quantos comandos/perguntas são executados ao mesmo tempo (os demais aguardam na fila, sem travar o servidor).
+SERVER_MAX_WORKERS = 4
+# Tempo máximo (em segundos) que um comando aguarda uma resposta do usuário (ex: a confirmação do /sair).
+# Depois disso, o comando é cancelado e o trabalhador é liberado.
+SERVER_INPUT_TIMEOUT_SECONDS = 300
+
 # --- Mensagens Padrão do Sistema ---
 # Mensagem de sistema que define o comportamento geral do chatbot.
 # Ajuste para definir o "persona" do seu assistente.
@@ -103,5 +295,7 @@ COMMANDS = {
     "export_chat": "/exportar_chat",
     "list_exports": "/listar_exports",
     "delete_export": "/excluir_export",
+    "export_jobs": "/exportacoes",
+    "retrieval_stats": "/estatisticas_busca",
     # --- FIM DOS NOVOS COMANDOS ---
 }
@@ -0,0 +1,4 @@
+# Os testes não chamam a API da OpenAI, mas config.py exige a chave para ser importado.
+import os
+
+os.environ.setdefault("OPENAI_API_KEY", "chave-de-teste")
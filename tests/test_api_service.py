@@ -0,0 +1,98 @@
+# test_api_service.py
+
+import os
+import sys
+import asyncio
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o teste é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from utils import api_service
+
+class _FakeAsyncOpenAI:
+    """Cliente assíncrono falso: responde com o conteúdo da última mensagem e conta instâncias e fechamentos."""
+    instances = 0
+    closed = 0
+
+    def __init__(self, **kwargs):
+        _FakeAsyncOpenAI.instances += 1
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, messages, **kwargs):
+        await asyncio.sleep(0)
+        message = SimpleNamespace(content=f"eco: {messages[-1]['content']}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    async def close(self):
+        _FakeAsyncOpenAI.closed += 1
+
+def _requests(count):
+    return [{"messages": [{"role": "user", "content": str(n)}], "max_tokens": 5} for n in range(count)]
+
+@mock.patch("openai.AsyncOpenAI", _FakeAsyncOpenAI)
+class CompletionsBatchTest(unittest.TestCase):
+    def setUp(self):
+        _FakeAsyncOpenAI.instances = 0
+        _FakeAsyncOpenAI.closed = 0
+
+    def tearDown(self):
+        api_service.close_batch_loop()
+
+    def test_batches_reuse_one_client(self):
+        for _ in range(3):
+            responses = api_service.get_openai_completions_batch(_requests(4), concurrency=2)
+            self.assertEqual(responses, [f"eco: {n}" for n in range(4)])
+        self.assertEqual(_FakeAsyncOpenAI.instances, 1)
+        self.assertEqual(_FakeAsyncOpenAI.closed, 0)
+
+        api_service.close_batch_loop()
+        self.assertEqual(_FakeAsyncOpenAI.closed, 1)
+
+    def test_batch_from_inside_a_running_loop(self):
+        async def run():
+            return api_service.get_openai_completions_batch(_requests(2))
+
+        self.assertEqual(asyncio.run(run()), ["eco: 0", "eco: 1"])
+
+    def test_async_variant_in_the_callers_loop(self):
+        responses = asyncio.run(api_service.gather_openai_completions_async(_requests(3), concurrency=1))
+        self.assertEqual(responses, ["eco: 0", "eco: 1", "eco: 2"])
+
+class CompletionCacheTest(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.cache_dir = temp_dir.name
+        patcher = mock.patch.object(api_service, "COMPLETION_CACHE_DIR", self.cache_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_concurrent_stores_of_the_same_response(self):
+        both_writing = threading.Barrier(2)
+        dump = api_service.json.dump
+
+        def slow_dump(*args, **kwargs):
+            both_writing.wait(5) # As duas threads gravam os seus temporários ao mesmo tempo
+            dump(*args, **kwargs)
+
+        # print é substituído uma única vez, aqui: mock.patch em várias threads ao mesmo tempo não é seguro
+        with mock.patch.object(api_service.json, "dump", slow_dump), mock.patch("builtins.print") as mocked_print:
+            threads = [threading.Thread(target=api_service._store_cached_completion, args=("hash", "resposta"))
+                       for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(10)
+        mocked_print.assert_not_called()
+        self.assertEqual(os.listdir(self.cache_dir), ["hash.json"])
+        self.assertEqual(api_service.get_cached_completion("hash"), "resposta")
+
+if __name__ == "__main__":
+    unittest.main()
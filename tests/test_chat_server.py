@@ -0,0 +1,147 @@
+# test_chat_server.py
+
+import os
+import sys
+import json
+import struct
+import asyncio
+import unittest
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o teste é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from utils import chat_server
+from utils.chat_server import WebSocket, ChatServer
+
+def client_frame(opcode: int, payload: bytes, fin: bool = True, masked: bool = True, mask: bytes = b"\x01\x02\x03\x04") -> bytes:
+    """Monta um frame como um cliente WebSocket (mascarado)."""
+    length = len(payload)
+    first = (0x80 if fin else 0) | opcode
+    mask_bit = 0x80 if masked else 0
+    if length < 126:
+        header = struct.pack("!BB", first, mask_bit | length)
+    elif length < (1 << 16):
+        header = struct.pack("!BBH", first, mask_bit | 126, length)
+    else:
+        header = struct.pack("!BBQ", first, mask_bit | 127, length)
+    if not masked:
+        return header + payload
+    return header + mask + bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+
+def server_frames(data: bytes) -> list:
+    """Decodifica os frames (não mascarados) enviados pelo servidor: [(opcode, carga), ...]."""
+    frames = []
+    while data:
+        opcode, length = data[0] & 0x0F, data[1] & 0x7F
+        offset = 2
+        if length == 126:
+            length, offset = struct.unpack("!H", data[2:4])[0], 4
+        elif length == 127:
+            length, offset = struct.unpack("!Q", data[2:10])[0], 10
+        frames.append((opcode, data[offset:offset + length]))
+        data = data[offset + length:]
+    return frames
+
+class _Writer:
+    """StreamWriter falso: guarda os bytes escritos."""
+
+    def __init__(self):
+        self.data = b""
+
+    def write(self, data: bytes):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+class WebSocketFrameTest(unittest.TestCase):
+    def receive(self, *frames, eof: bool = True):
+        """Entrega os frames a um WebSocket e retorna (mensagem recebida, frames enviados pelo servidor)."""
+        async def run():
+            reader = asyncio.StreamReader()
+            reader.feed_data(b"".join(frames))
+            if eof:
+                reader.feed_eof()
+            writer = _Writer()
+            message = await WebSocket(reader, writer).receive()
+            return message, server_frames(writer.data)
+        return asyncio.run(run())
+
+    def test_masked_text_frame(self):
+        message, sent = self.receive(client_frame(chat_server._OP_TEXT, "olá, mundo".encode("utf-8")))
+        self.assertEqual(message, "olá, mundo")
+        self.assertEqual(sent, [])
+
+    def test_extended_lengths(self):
+        for size in (125, 126, 70000):
+            text = "x" * size
+            message, _ = self.receive(client_frame(chat_server._OP_TEXT, text.encode()))
+            self.assertEqual(message, text)
+
+    def test_fragmented_message_with_ping_in_between(self):
+        message, sent = self.receive(
+            client_frame(chat_server._OP_TEXT, b"/listar", fin=False),
+            client_frame(chat_server._OP_PING, b"eco"),
+            client_frame(chat_server._OP_CONTINUATION, b"_sessoes"),
+        )
+        self.assertEqual(message, "/listar_sessoes")
+        self.assertEqual(sent, [(chat_server._OP_PONG, b"eco")])
+
+    def test_unmasked_frame_closes_with_protocol_error(self):
+        message, sent = self.receive(client_frame(chat_server._OP_TEXT, b"oi", masked=False))
+        self.assertIsNone(message)
+        self.assertEqual(sent[0][0], chat_server._OP_CLOSE)
+        self.assertEqual(struct.unpack("!H", sent[0][1][:2])[0], 1002)
+
+    def test_oversized_frame_is_rejected_before_reading_payload(self):
+        header = struct.pack("!BBQ", 0x80 | chat_server._OP_TEXT, 0x80 | 127, chat_server.MAX_MESSAGE_BYTES + 1)
+        message, sent = self.receive(header, eof=False)
+        self.assertIsNone(message)
+        self.assertEqual(struct.unpack("!H", sent[0][1][:2])[0], 1009)
+
+    def test_unexpected_continuation_is_rejected(self):
+        message, sent = self.receive(client_frame(chat_server._OP_CONTINUATION, b"solto"))
+        self.assertIsNone(message)
+        self.assertEqual(struct.unpack("!H", sent[0][1][:2])[0], 1002)
+
+    def test_close_frame_and_eof(self):
+        message, sent = self.receive(client_frame(chat_server._OP_CLOSE, struct.pack("!H", 1000)))
+        self.assertIsNone(message)
+        self.assertEqual(sent[0][0], chat_server._OP_CLOSE)
+        self.assertEqual(self.receive(b"")[0], None)
+
+    def test_send_json(self):
+        async def run():
+            writer = _Writer()
+            await WebSocket(asyncio.StreamReader(), writer).send_json({"type": "output", "text": "ç"})
+            return server_frames(writer.data)
+        [(opcode, payload)] = asyncio.run(run())
+        self.assertEqual(opcode, chat_server._OP_TEXT)
+        self.assertEqual(json.loads(payload), {"type": "output", "text": "ç"})
+
+class OriginTest(unittest.TestCase):
+    def test_origin_must_match_host(self):
+        self.assertTrue(ChatServer._origin_allowed({"host": "127.0.0.1:8765"}))
+        self.assertTrue(ChatServer._origin_allowed({"host": "127.0.0.1:8765", "origin": "http://127.0.0.1:8765"}))
+        self.assertFalse(ChatServer._origin_allowed({"host": "127.0.0.1:8765", "origin": "https://exemplo.com"}))
+        self.assertFalse(ChatServer._origin_allowed({"host": "127.0.0.1:8765", "origin": "null"}))
+
+    def test_cross_site_post_is_rejected(self):
+        async def run():
+            server = ChatServer(max_workers=1)
+            try:
+                reader = asyncio.StreamReader()
+                reader.feed_data(b"/excluir_sessao x")
+                reader.feed_eof()
+                writer = _Writer()
+                headers = {"host": "127.0.0.1:8765", "origin": "https://exemplo.com", "content-length": "17"}
+                await server._handle_message(reader, writer, {}, headers)
+                return writer.data
+            finally:
+                server.shutdown()
+        self.assertTrue(asyncio.run(run()).startswith(b"HTTP/1.1 403 Forbidden"))
+
+if __name__ == "__main__":
+    unittest.main()
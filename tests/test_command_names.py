@@ -0,0 +1,76 @@
+# test_command_names.py
+
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o teste é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from utils import chat_engine, session_manager, pdf_exporter, storage_backends, profiles
+
+class NameValidationTest(unittest.TestCase):
+    def test_session_names(self):
+        for name in ("default_session", "projeto-2", "v1.2", "ação"):
+            self.assertEqual(session_manager.validate_session_name(name), name)
+        for name in ("", "..", ".oculta", "../x", "a/b", "a\\b", "x" * 101, None):
+            with self.assertRaises(ValueError):
+                session_manager.validate_session_name(name)
+
+    def test_export_filenames(self):
+        self.assertEqual(pdf_exporter.validate_export_filename("Relatorio_1.pdf"), "Relatorio_1.pdf")
+        for name in ("", "../x.pdf", "/tmp/x.pdf", ".x.pdf", "a/b.pdf"):
+            with self.assertRaises(ValueError):
+                pdf_exporter.validate_export_filename(name)
+
+class EngineCommandNamesTest(unittest.TestCase):
+    """Nomes digitados nos comandos não podem escapar dos diretórios de dados (o motor atende clientes remotos)."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        root = self.temp_dir.name
+        self.sessions_dir = os.path.join(root, "dados", "sessions")
+        self.profile = "teste_nomes"
+        session_manager.set_storage_backend(
+            storage_backends.JsonFileBackend(self.sessions_dir, os.path.join(root, "dados", "summaries")), self.profile
+        )
+        self.addCleanup(session_manager.set_storage_backend, None, self.profile)
+        exports = mock.patch.object(pdf_exporter, "_exports_dir", lambda: os.path.join(root, "dados", "exports"))
+        exports.start()
+        self.addCleanup(exports.stop)
+        self.engine = chat_engine.ChatEngine()
+        with mock.patch("builtins.print"):
+            self.conversation = self.engine.open_conversation("inicial", self.profile)
+
+    def run_command(self, line: str) -> str:
+        output = io.StringIO()
+        with mock.patch("sys.stdout", output):
+            self.engine.process_input(self.conversation, line)
+        session_manager.flush_pending_saves()
+        return output.getvalue()
+
+    def test_path_traversal_session_names_are_refused(self):
+        for command in ("/nova_sessao ../../fora", "/carregar_sessao ../fora", "/excluir_sessao ../../fora"):
+            self.assertIn("Nome de sessão inválido", self.run_command(command))
+        self.assertEqual(self.conversation.session.name, "inicial")
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir.name, "fora.json")))
+
+    def test_path_traversal_export_names_are_refused(self):
+        self.assertIn("Nome de export inválido", self.run_command("/excluir_export ../../sessions/inicial"))
+        self.assertIn("Nome de sessão inválido", self.run_command("/listar_exports .."))
+
+    def test_pdf_outside_pdfs_dir_is_refused(self):
+        outside = os.path.join(self.temp_dir.name, "fora.pdf")
+        with open(outside, "wb") as f:
+            f.write(b"%PDF-1.4")
+        self.assertIn("Informe o nome de um PDF dentro de", self.run_command(f"/lerpdf {outside}"))
+        self.assertIn("Informe o nome de um PDF dentro de", self.run_command("/lerpdf ../../../etc/passwd"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+# test_embedding_store.py
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o teste é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from utils import embedding_store, retrieval_index, token_utils
+
+def _chunk_per_page(pages, chunk_tokens):
+    """Divisão falsa em trechos (um por página), sem o codificador do tiktoken."""
+    for page_number, text in pages:
+        yield {"text": text, "tokens": len(text.split()), "first_page": page_number, "last_page": page_number}
+
+class BuildEmbeddingsTest(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.indexes_dir = temp_dir.name
+        for patcher in (mock.patch.object(retrieval_index, "INDEXES_DIR", self.indexes_dir),
+                        mock.patch.object(embedding_store, "INDEXES_DIR", self.indexes_dir),
+                        mock.patch.object(token_utils, "iter_token_chunks", _chunk_per_page)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(retrieval_index._loaded_indexes.clear)
+        self.addCleanup(embedding_store._loaded_matrices.clear)
+        pages = [(1, "redes de computadores"), (2, "protocolo de roteamento"), (3, "camada de transporte")]
+        retrieval_index.build_index("doc", iter(pages))
+        self.embedder = embedding_store.HashingEmbedder(dim=16)
+
+    def files(self) -> list:
+        return sorted(os.listdir(os.path.join(self.indexes_dir, "doc")))
+
+    def test_embeddings_are_written(self):
+        self.assertEqual(embedding_store.build_embeddings("doc", self.embedder), 3)
+        self.assertEqual(embedding_store.load_embeddings("doc", self.embedder).shape, (3, 16))
+
+    def test_missing_chunks_are_not_written(self):
+        files_before = self.files()
+        for chunks in ([], list(retrieval_index.iter_chunks("doc"))[:2]):
+            with self.subTest(chunks=len(chunks)):
+                with mock.patch.object(retrieval_index, "iter_chunks", return_value=iter(chunks)), \
+                     mock.patch("builtins.print") as mocked_print:
+                    self.assertEqual(embedding_store.build_embeddings("doc", self.embedder), 0)
+                self.assertIn("índice de busca do documento está incompleto", mocked_print.call_args.args[0])
+                self.assertFalse(embedding_store.embeddings_exist("doc", self.embedder))
+                self.assertEqual(self.files(), files_before) # Nem a matriz nem o temporário
+
+    def test_concurrent_builds_of_the_same_document(self):
+        both_started = threading.Barrier(2)
+        embed = self.embedder.embed
+
+        def slow_embed(texts):
+            both_started.wait(5) # As duas threads escrevem os seus temporários ao mesmo tempo
+            return embed(texts)
+
+        results, errors = [], []
+
+        def build():
+            try:
+                results.append(embedding_store.build_embeddings("doc", self.embedder))
+            except Exception as e:
+                errors.append(e)
+
+        with mock.patch.object(self.embedder, "embed", slow_embed):
+            threads = [threading.Thread(target=build) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(10)
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [3, 3])
+        self.assertFalse([name for name in self.files() if ".tmp" in name])
+        self.assertEqual(embedding_store.load_embeddings("doc", self.embedder).shape, (3, 16))
+
+if __name__ == "__main__":
+    unittest.main()
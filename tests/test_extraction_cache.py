@@ -0,0 +1,119 @@
+# test_extraction_cache.py
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o teste é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from utils import extraction_cache, pdf_processor
+
+def _pages_then_error(pdf_path, workers=None, strict=False):
+    """Extrator falso: entrega duas páginas e falha na terceira (como um PDF corrompido no meio)."""
+    yield 1, "página um"
+    yield 2, "página dois"
+    if strict:
+        raise ValueError("página 3 corrompida")
+
+def _all_pages(pdf_path, workers=None, strict=False):
+    yield 1, "página um"
+    yield 2, "página dois"
+
+class ExtractionCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        cache_dir = os.path.join(self.temp_dir.name, "cache")
+        patcher = mock.patch.object(extraction_cache, "EXTRACTION_CACHE_DIR", cache_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.pdf_path = os.path.join(self.temp_dir.name, "documento.pdf")
+        with open(self.pdf_path, "wb") as f:
+            f.write(b"%PDF-1.4 conteudo qualquer")
+
+    def _read(self, key="chave"):
+        with mock.patch("builtins.print"):
+            return list(extraction_cache.iter_cached_pages(self.pdf_path, cache_key=key, quiet=True))
+
+    def test_complete_read_is_cached(self):
+        with mock.patch.object(pdf_processor, "iter_pdf_pages", _all_pages):
+            self.assertEqual(self._read(), [(1, "página um"), (2, "página dois")])
+        with mock.patch.object(pdf_processor, "iter_pdf_pages", side_effect=AssertionError("o PDF não deveria ser lido")):
+            self.assertEqual(self._read(), [(1, "página um"), (2, "página dois")])
+
+    def test_extraction_error_is_not_cached(self):
+        with mock.patch.object(pdf_processor, "iter_pdf_pages", _pages_then_error):
+            self.assertEqual(self._read(), [(1, "página um"), (2, "página dois")])
+        self.assertEqual(os.listdir(extraction_cache.EXTRACTION_CACHE_DIR), []) # Nem a entrada nem o temporário
+        with mock.patch.object(pdf_processor, "iter_pdf_pages", _all_pages):
+            self._read()
+        self.assertEqual(len(os.listdir(extraction_cache.EXTRACTION_CACHE_DIR)), 1)
+
+    def test_strict_read_reports_the_extraction_error(self):
+        pages = []
+        with mock.patch.object(pdf_processor, "iter_pdf_pages", _pages_then_error):
+            with self.assertRaises(extraction_cache.ExtractionError):
+                for page in extraction_cache.iter_cached_pages(self.pdf_path, cache_key="chave", quiet=True, strict=True):
+                    pages.append(page)
+        self.assertEqual(pages, [(1, "página um"), (2, "página dois")])
+        self.assertEqual(os.listdir(extraction_cache.EXTRACTION_CACHE_DIR), [])
+
+    def test_interrupted_read_is_not_cached(self):
+        with mock.patch.object(pdf_processor, "iter_pdf_pages", _all_pages):
+            pages = extraction_cache.iter_cached_pages(self.pdf_path, cache_key="chave", quiet=True)
+            next(pages)
+            pages.close()
+        self.assertEqual(os.listdir(extraction_cache.EXTRACTION_CACHE_DIR), [])
+
+    def test_concurrent_misses_of_the_same_pdf(self):
+        both_started = threading.Barrier(2)
+
+        def slow_pages(pdf_path, workers=None, strict=False):
+            yield 1, "página um"
+            both_started.wait(5) # As duas threads escrevem os seus temporários ao mesmo tempo
+            yield 2, "página dois"
+
+        results, errors = [], []
+
+        def read():
+            try:
+                results.append(list(extraction_cache.iter_cached_pages(self.pdf_path, cache_key="chave", quiet=True)))
+            except Exception as e:
+                errors.append(e)
+
+        # print é substituído uma única vez, aqui: mock.patch em várias threads ao mesmo tempo não é seguro
+        with mock.patch.object(pdf_processor, "iter_pdf_pages", slow_pages), mock.patch("builtins.print"):
+            threads = [threading.Thread(target=read) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(10)
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [[(1, "página um"), (2, "página dois")]] * 2)
+        self.assertEqual(os.listdir(extraction_cache.EXTRACTION_CACHE_DIR), ["chave.jsonl"])
+
+    def test_corrupt_entry_falls_back_to_extraction(self):
+        with mock.patch.object(pdf_processor, "iter_pdf_pages", _all_pages):
+            self._read()
+        cache_path = os.path.join(extraction_cache.EXTRACTION_CACHE_DIR, "chave.jsonl")
+        with open(cache_path, "w", encoding="utf-8") as f:
+            f.write('"página um"\n"página do') # Entrada truncada
+        with mock.patch.object(pdf_processor, "iter_pdf_pages", _all_pages):
+            self.assertEqual(self._read(), [(1, "página um"), (2, "página dois")])
+        with open(cache_path, encoding="utf-8") as f:
+            self.assertEqual(f.read(), '"página um"\n"página dois"\n')
+
+    def test_strict_mode_raises_on_invalid_pdf(self):
+        with mock.patch("builtins.print"):
+            self.assertEqual(list(pdf_processor.iter_pdf_pages(self.pdf_path)), [])
+        with self.assertRaises(Exception):
+            list(pdf_processor.iter_pdf_pages(self.pdf_path, strict=True))
+
+if __name__ == "__main__":
+    unittest.main()
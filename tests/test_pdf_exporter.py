@@ -0,0 +1,86 @@
+# test_pdf_exporter.py
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o teste é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from utils import pdf_exporter
+
+def _history(num_messages):
+    return [{"role": "system", "content": "Sistema"}] + [
+        {"role": "user" if n % 2 else "assistant", "content": f"Mensagem {n} com acentuação"} for n in range(1, num_messages)
+    ]
+
+class IncrementalExportTest(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.exports_dir = os.path.join(temp_dir.name, "exports")
+        for patcher in (mock.patch.object(pdf_exporter, "_exports_dir", lambda: self.exports_dir),
+                        mock.patch("builtins.print")):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def export(self, history, export_name="relatorio", incremental=True):
+        return pdf_exporter.export_chat_to_pdf(history, "sessao", export_name, incremental=incremental)
+
+    def state(self):
+        return pdf_exporter._load_export_state("sessao")
+
+    def test_only_new_messages_are_exported(self):
+        history = _history(4)
+        self.assertIn("exportado com sucesso", self.export(history))
+        first_state = self.state()["relatorio"]
+        self.assertEqual(first_state["exported_count"], 4)
+        self.assertEqual(first_state["last_message"], pdf_exporter._message_fingerprint(history[-1]))
+
+        history += _history(7)[4:]
+        result = self.export(history)
+        self.assertIn("3 mensagem(ns) nova(s)", result)
+        state = self.state()["relatorio"]
+        self.assertEqual(state["exported_count"], 7)
+        self.assertEqual(len(state["files"]), 2)
+        self.assertTrue(all(os.path.exists(os.path.join(self.exports_dir, "sessao", name)) for name in state["files"]))
+        self.assertIn("_continuacao_", state["files"][1])
+
+    def test_nothing_new_to_export(self):
+        history = _history(3)
+        self.export(history)
+        self.assertIn("Nenhuma mensagem nova", self.export(history))
+
+    def test_rewritten_history_is_exported_in_full(self):
+        self.export(_history(5))
+        # /limpar: o histórico recomeça e a mensagem na posição exportada muda
+        rewritten = _history(1) + [{"role": "user", "content": "recomeço"}] * 5
+        self.assertIn("exportado com sucesso", self.export(rewritten))
+        state = self.state()["relatorio"]
+        self.assertEqual(state["exported_count"], 6)
+        self.assertEqual(len(state["files"]), 1)
+
+    def test_export_names_are_tracked_separately(self):
+        history = _history(3)
+        self.export(history, "a")
+        self.export(history, "b", incremental=False)
+        history.append({"role": "user", "content": "nova"})
+        self.assertIn("1 mensagem(ns) nova(s)", self.export(history, "a"))
+        self.assertEqual(self.state()["b"]["exported_count"], 3)
+
+    def test_fingerprint_ignores_key_order(self):
+        self.assertEqual(
+            pdf_exporter._message_fingerprint({"role": "user", "content": "oi"}),
+            pdf_exporter._message_fingerprint({"content": "oi", "role": "user"})
+        )
+        self.assertNotEqual(
+            pdf_exporter._message_fingerprint({"role": "user", "content": "oi"}),
+            pdf_exporter._message_fingerprint({"role": "assistant", "content": "oi"})
+        )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+# test_pdf_processor.py
+
+import os
+import sys
+import tempfile
+import unittest
+from concurrent.futures import Future
+from unittest import mock
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o teste é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from utils import pdf_processor
+
+class _InlineExecutor:
+    """Executor falso: executa cada faixa na hora e registra quantas foram enviadas."""
+    submitted = 0
+
+    def __init__(self, max_workers):
+        _InlineExecutor.submitted = 0
+
+    def submit(self, function, *args):
+        _InlineExecutor.submitted += 1
+        future = Future()
+        future.set_result(function(*args))
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+def _fake_range(pdf_path, start, end):
+    return [f"página {page + 1}" for page in range(start, end)]
+
+class ParallelExtractionTest(unittest.TestCase):
+    @mock.patch.object(pdf_processor, "_extract_page_range", _fake_range)
+    @mock.patch.object(pdf_processor, "ProcessPoolExecutor", _InlineExecutor)
+    def test_pages_in_order_with_bounded_shards_in_flight(self):
+        workers, num_pages = 2, 100
+        shard_size = -(-num_pages // (workers * 4))
+        pages = []
+        for page_num, text in pdf_processor._iter_pdf_pages_parallel("doc.pdf", num_pages, workers):
+            consumed_shards = (page_num - 1) // shard_size + 1
+            # Além da faixa sendo consumida, no máximo `workers` faixas foram enviadas adiante
+            self.assertLessEqual(_InlineExecutor.submitted - consumed_shards, workers)
+            pages.append((page_num, text))
+        self.assertEqual(pages, [(page, f"página {page}") for page in range(1, num_pages + 1)])
+
+    @mock.patch.object(pdf_processor, "_extract_page_range", _fake_range)
+    @mock.patch.object(pdf_processor, "ProcessPoolExecutor", _InlineExecutor)
+    def test_stopping_early_does_not_submit_the_rest(self):
+        pages = pdf_processor._iter_pdf_pages_parallel("doc.pdf", 100, 2)
+        next(pages)
+        pages.close()
+        self.assertLessEqual(_InlineExecutor.submitted, 3)
+
+def _pages_then_error(pdf_path, workers=None, strict=False):
+    yield 1, "página um"
+    if strict:
+        raise ValueError("página 2 corrompida")
+
+class ExtractTextTest(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.pdf_path = os.path.join(temp_dir.name, "documento.pdf")
+        with open(self.pdf_path, "wb") as f:
+            f.write(b"%PDF-1.4 conteudo qualquer")
+
+    def test_pages_are_joined(self):
+        pages = lambda pdf_path, workers=None, strict=False: iter([(1, "página um "), (2, "página dois")])
+        with mock.patch.object(pdf_processor, "iter_pdf_pages", pages):
+            self.assertEqual(pdf_processor.extract_text_from_pdf(self.pdf_path), "página um página dois")
+
+    def test_error_discards_the_pages_already_extracted(self):
+        with mock.patch.object(pdf_processor, "iter_pdf_pages", _pages_then_error), mock.patch("builtins.print") as mocked_print:
+            self.assertEqual(pdf_processor.extract_text_from_pdf(self.pdf_path), "")
+        self.assertIn("página 2 corrompida", mocked_print.call_args.args[0])
+
+    def test_invalid_pdf(self):
+        with mock.patch("builtins.print"):
+            self.assertEqual(pdf_processor.extract_text_from_pdf(self.pdf_path), "")
+            self.assertEqual(pdf_processor.extract_text_from_pdf(self.pdf_path + ".inexistente"), "")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,182 @@
+# test_rate_limiter.py
+
+import os
+import sys
+import json
+import asyncio
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from types import SimpleNamespace
+from unittest import mock
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o teste é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from utils import rate_limiter, api_service
+from utils.rate_limiter import TokenBucket, RateLimiter, compute_backoff_delay, get_retry_after
+
+class _FakeClock:
+    """Relógio falso para o módulo rate_limiter: sleep() apenas avança o tempo e registra a espera."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+def _error_with_headers(headers: dict) -> Exception:
+    error = Exception("limite de taxa")
+    error.response = SimpleNamespace(headers=headers)
+    return error
+
+class RetryAfterTest(unittest.TestCase):
+    def test_headers(self):
+        self.assertEqual(get_retry_after(_error_with_headers({"retry-after-ms": "1500"})), 1.5)
+        self.assertEqual(get_retry_after(_error_with_headers({"retry-after": "2"})), 2.0)
+        # O cabeçalho em milissegundos é mais preciso e tem preferência
+        self.assertEqual(get_retry_after(_error_with_headers({"retry-after-ms": "250", "retry-after": "1"})), 0.25)
+
+    def test_missing_or_unsupported_headers(self):
+        self.assertIsNone(get_retry_after(Exception("sem resposta")))
+        self.assertIsNone(get_retry_after(_error_with_headers({})))
+        self.assertIsNone(get_retry_after(_error_with_headers({"retry-after": "Wed, 21 Oct 2026 07:28:00 GMT"})))
+
+class BackoffTest(unittest.TestCase):
+    def test_jitter_is_bounded_by_the_exponential_cap(self):
+        for attempt in range(1, 8):
+            cap = min(10.0, 0.5 * 2 ** (attempt - 1))
+            for _ in range(50):
+                delay = compute_backoff_delay(attempt, base_delay=0.5, max_delay=10.0)
+                self.assertGreaterEqual(delay, 0.0)
+                self.assertLessEqual(delay, cap)
+
+    def test_retry_after_is_a_floor(self):
+        for _ in range(50):
+            delay = compute_backoff_delay(3, retry_after=1.5, base_delay=0.5, max_delay=10.0)
+            self.assertGreaterEqual(delay, 1.5)
+            self.assertLessEqual(delay, 2.0) # O maior entre Retry-After e o jitter (até 0.5 * 2²)
+        # Mesmo o Retry-After não passa da espera máxima
+        self.assertEqual(compute_backoff_delay(1, retry_after=120.0, base_delay=0.5, max_delay=10.0), 10.0)
+
+class TokenBucketTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = _FakeClock()
+        patcher = mock.patch.object(rate_limiter, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_waits_only_when_the_bucket_is_empty(self):
+        bucket = TokenBucket(capacity=5, refill_per_second=10)
+        self.assertEqual([bucket.acquire(1) for _ in range(5)], [0.0] * 5)
+        self.assertAlmostEqual(bucket.acquire(1), 0.1)
+        self.assertAlmostEqual(bucket.acquire(2), 0.2)
+        self.assertEqual(len(self.clock.sleeps), 2)
+
+    def test_refill_is_capped_at_capacity(self):
+        bucket = TokenBucket(capacity=5, refill_per_second=10)
+        bucket.acquire(5)
+        self.clock.now += 60 # Muito tempo parado não acumula mais que `capacity` fichas
+        self.assertEqual(bucket.acquire(5), 0.0)
+        self.assertAlmostEqual(bucket.acquire(1), 0.1)
+
+    def test_request_larger_than_the_bucket(self):
+        bucket = TokenBucket(capacity=5, refill_per_second=10)
+        self.assertEqual(bucket.acquire(50), 0.0) # Limitado à capacidade: não espera para sempre
+        self.assertAlmostEqual(bucket.acquire(50), 0.5)
+
+    def test_async_acquire_waits_without_blocking(self):
+        bucket = TokenBucket(capacity=1, refill_per_second=10)
+        bucket.acquire(1)
+        with mock.patch.object(rate_limiter.asyncio, "sleep", mock.AsyncMock()) as async_sleep:
+            self.assertAlmostEqual(asyncio.run(bucket.acquire_async(1)), 0.1)
+        async_sleep.assert_awaited_once()
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_rate_limiter_waits_for_the_request_quota(self):
+        limiter = RateLimiter(requests_per_minute=2, tokens_per_minute=600)
+        self.assertEqual(limiter.acquire(100) + limiter.acquire(100), 0.0)
+        # A terceira requisição espera 30s pela cota de requisições; nesse tempo a de tokens se recompõe
+        self.assertAlmostEqual(limiter.acquire(100), 30.0)
+
+    def test_rate_limiter_waits_for_the_token_quota(self):
+        limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=60)
+        self.assertEqual(limiter.acquire(60), 0.0)
+        self.assertAlmostEqual(limiter.acquire(30), 30.0)
+
+class _StubOpenAIHandler(BaseHTTPRequestHandler):
+    """Servidor simulado da API: responde 429 (com Retry-After) nas `failures` primeiras requisições."""
+    failures = 2
+    requests_seen = 0
+
+    def do_POST(self):
+        _StubOpenAIHandler.requests_seen += 1
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if _StubOpenAIHandler.requests_seen <= _StubOpenAIHandler.failures:
+            body = json.dumps({"error": {"message": "Rate limit", "type": "requests"}}).encode()
+            self.send_response(429)
+            self.send_header("Retry-After", "0.2")
+        else:
+            body = json.dumps({
+                "id": "stub", "object": "chat.completion", "created": 0, "model": "stub",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "Resposta do servidor simulado."}}]
+            }).encode()
+            self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class CreateWithRetriesTest(unittest.TestCase):
+    def setUp(self):
+        _StubOpenAIHandler.requests_seen = 0
+        server = HTTPServer(("127.0.0.1", 0), _StubOpenAIHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        from openai import OpenAI
+        # Como em api_service.get_client: as tentativas automáticas do cliente ficam desativadas
+        self.client = OpenAI(api_key="chave-de-teste", base_url=f"http://127.0.0.1:{server.server_port}/v1", max_retries=0)
+        self.addCleanup(self.client.close)
+
+        # As esperas calculadas são registradas, mas não cumpridas (o teste não dorme)
+        self.backoff = mock.Mock(return_value=0.0)
+        for patcher in (mock.patch.object(api_service, "compute_backoff_delay", self.backoff),
+                        mock.patch.object(api_service, "rate_limiter", RateLimiter(600, 100000)),
+                        mock.patch("builtins.print")):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def create(self):
+        return api_service._create_with_retries(
+            self.client.chat.completions.create, model="stub", messages=[{"role": "user", "content": "Olá"}]
+        )
+
+    def test_retries_then_succeeds(self):
+        completion = self.create()
+        self.assertEqual(completion.choices[0].message.content, "Resposta do servidor simulado.")
+        self.assertEqual(_StubOpenAIHandler.requests_seen, 3)
+        # Cada nova tentativa usou o Retry-After enviado pelo servidor
+        self.assertEqual(self.backoff.call_args_list, [mock.call(1, 0.2), mock.call(2, 0.2)])
+
+    def test_gives_up_after_max_retries(self):
+        import openai
+        with mock.patch.object(_StubOpenAIHandler, "failures", 100), mock.patch.object(api_service, "API_MAX_RETRIES", 2):
+            with self.assertRaises(openai.RateLimitError):
+                self.create()
+        self.assertEqual(_StubOpenAIHandler.requests_seen, 3) # A tentativa original e 2 novas
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+# test_read_pdf.py
+
+import io
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o teste é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from utils import (
+    chat_engine, session_manager, storage_backends, extraction_cache, pdf_processor,
+    retrieval_index, embedding_store, summarizer, token_utils
+)
+
+def _chunk_per_page(pages, chunk_tokens):
+    """Divisão falsa em trechos (um por página), sem o codificador do tiktoken."""
+    for page_number, text in pages:
+        yield {"text": text, "tokens": len(text.split()), "first_page": page_number, "last_page": page_number}
+
+def _fails_on_page_three(pdf_path, workers=None, strict=False):
+    yield 1, "página um"
+    yield 2, "página dois"
+    if strict:
+        raise ValueError("página 3 corrompida")
+
+def _all_pages(pdf_path, workers=None, strict=False):
+    for page_number in range(1, 4):
+        yield page_number, f"página {page_number}"
+
+class ReadPdfTest(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        root = temp_dir.name
+        pdfs_dir = os.path.join(root, "pdfs")
+        os.makedirs(pdfs_dir)
+        with open(os.path.join(pdfs_dir, "doc.pdf"), "wb") as f:
+            f.write(b"%PDF-1.4 conteudo qualquer")
+
+        self.profile = "teste_lerpdf"
+        session_manager.set_storage_backend(
+            storage_backends.JsonFileBackend(os.path.join(root, "sessions"), os.path.join(root, "summaries")), self.profile
+        )
+        self.addCleanup(session_manager.set_storage_backend, None, self.profile)
+
+        self.summarize = mock.Mock(return_value="resumo do documento")
+        for patcher in (
+            mock.patch.object(chat_engine, "PDFS_DIR", pdfs_dir),
+            mock.patch.object(extraction_cache, "EXTRACTION_CACHE_DIR", os.path.join(root, "cache")),
+            mock.patch.object(retrieval_index, "INDEXES_DIR", os.path.join(root, "indexes")),
+            mock.patch.object(token_utils, "iter_token_chunks", _chunk_per_page),
+            mock.patch.object(embedding_store, "embeddings_exist", return_value=True),
+            mock.patch.object(summarizer, "summarize_chunks", self.summarize),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(retrieval_index._loaded_indexes.clear)
+
+        self.engine = chat_engine.ChatEngine()
+        with mock.patch("builtins.print"):
+            self.conversation = self.engine.open_conversation("leitura", self.profile)
+
+    def read_pdf(self) -> str:
+        output = io.StringIO()
+        with mock.patch("sys.stdout", output):
+            self.engine.process_input(self.conversation, "/lerpdf doc.pdf")
+        session_manager.flush_pending_saves()
+        return output.getvalue()
+
+    def document_key(self) -> str:
+        return extraction_cache.compute_pdf_key(os.path.join(chat_engine.PDFS_DIR, "doc.pdf"))
+
+    def test_extraction_error_leaves_no_index_or_summary(self):
+        with mock.patch.object(pdf_processor, "iter_pdf_pages", _fails_on_page_three):
+            output = self.read_pdf()
+        self.assertIn("Não foi possível extrair todo o texto do PDF", output)
+        self.assertFalse(retrieval_index.index_exists(self.document_key()))
+        self.assertEqual(os.listdir(extraction_cache.EXTRACTION_CACHE_DIR), [])
+        self.summarize.assert_not_called()
+        self.assertIsNone(self.conversation.session.active_api_summary_content)
+
+    def test_complete_extraction_is_indexed_and_summarized(self):
+        with mock.patch.object(pdf_processor, "iter_pdf_pages", _all_pages):
+            self.read_pdf()
+        self.assertEqual(len(list(retrieval_index.iter_chunks(self.document_key()))), 3)
+        chunks = list(self.summarize.call_args.args[0])
+        self.assertEqual([chunk["text"] for chunk in chunks], ["página 1", "página 2", "página 3"])
+        self.assertEqual(self.conversation.session.active_api_summary_content, "resumo do documento")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+# test_retrieval_index.py
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o teste é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from utils import retrieval_index, token_utils
+
+def _chunk_per_page(pages, chunk_tokens):
+    """Divisão falsa em trechos (um por página), sem o codificador do tiktoken."""
+    for page_number, text in pages:
+        yield {"text": text, "tokens": len(text.split()), "first_page": page_number, "last_page": page_number}
+
+class BuildIndexTest(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.indexes_dir = temp_dir.name
+        for patcher in (mock.patch.object(retrieval_index, "INDEXES_DIR", self.indexes_dir),
+                        mock.patch.object(token_utils, "iter_token_chunks", _chunk_per_page)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(retrieval_index._loaded_indexes.clear)
+
+    def test_concurrent_builds_of_the_same_document(self):
+        both_started = threading.Barrier(2)
+        results, errors = [], []
+
+        def pages():
+            yield 1, "redes de computadores"
+            both_started.wait(5) # As duas threads escrevem os seus temporários ao mesmo tempo
+            yield 2, "protocolo de roteamento"
+
+        def build():
+            try:
+                results.append(retrieval_index.build_index("doc", pages()))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=build) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [2, 2])
+        self.assertEqual(os.listdir(self.indexes_dir), ["doc"])
+        self.assertEqual([chunk["text"] for chunk in retrieval_index.iter_chunks("doc")],
+                         ["redes de computadores", "protocolo de roteamento"])
+
+    def test_failed_build_is_not_persisted(self):
+        def pages():
+            yield 1, "redes de computadores"
+            raise ValueError("página 2 corrompida")
+
+        with self.assertRaises(ValueError):
+            retrieval_index.build_index("doc", pages())
+        self.assertFalse(retrieval_index.index_exists("doc"))
+        self.assertEqual(os.listdir(self.indexes_dir), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+# test_session_manager.py
+
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o teste é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from utils import profiles, session_manager
+from utils.storage_backends import JsonFileBackend
+
+class ScopedFlushTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, True)
+        backends = {
+            profile: JsonFileBackend(os.path.join(self.temp_dir, profile, "sessions"), os.path.join(self.temp_dir, profile, "summaries"))
+            for profile in ("perfil_a", "perfil_b")
+        }
+        patcher = mock.patch.dict(session_manager._backends, backends)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # A gravação da sessão "lenta" fica presa até o teste liberá-la
+        self.slow_save_started = threading.Event()
+        self.release_slow_save = threading.Event()
+        original_save = session_manager.save_session
+
+        def save_session(session_name, *args):
+            if session_name == "lenta":
+                self.slow_save_started.set()
+                self.release_slow_save.wait(5)
+            original_save(session_name, *args)
+
+        for patcher in (mock.patch.object(session_manager, "save_session", save_session),
+                        mock.patch.object(session_manager, "WRITE_BEHIND_SAVES", True)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(session_manager.flush_pending_saves, 5)
+        self.addCleanup(self.release_slow_save.set)
+
+    def schedule(self, profile, session_name):
+        with profiles.use_profile(profile):
+            session_manager.save_session_in_background(session_name, [{"role": "system", "content": session_name}])
+
+    def test_reads_wait_only_for_their_own_session(self):
+        self.schedule("perfil_a", "lenta")
+        self.assertTrue(self.slow_save_started.wait(5))
+        self.schedule("perfil_b", "outra")
+
+        # Sessões e perfis sem gravações pendentes não esperam pela gravação lenta
+        self.assertTrue(session_manager.flush_pending_saves(0, profile="perfil_a", session_name="rapida"))
+        with profiles.use_profile("perfil_a"), mock.patch("builtins.print"):
+            self.assertFalse(session_manager.session_exists("nova"))
+            self.assertEqual(session_manager.load_session("nova")["chat_history"][0]["role"], "system")
+
+        # Quem depende das sessões pendentes ainda espera
+        self.assertFalse(session_manager.flush_pending_saves(0.05, session_name="lenta"))
+        self.assertFalse(session_manager.flush_pending_saves(0.05, profile="perfil_b"))
+        self.assertFalse(session_manager.flush_pending_saves(0.05))
+
+        self.release_slow_save.set()
+        self.assertTrue(session_manager.flush_pending_saves(5))
+        with profiles.use_profile("perfil_a"):
+            self.assertEqual(session_manager.list_sessions(), ["lenta"])
+        with profiles.use_profile("perfil_b"):
+            self.assertTrue(session_manager.session_exists("outra"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+# test_session_registry.py
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o teste é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from utils import chat_engine, profiles, session_manager, storage_backends
+
+class SessionRegistryTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = chat_engine.ChatEngine()
+        self.slow_load_started = threading.Event()
+        self.release_slow_load = threading.Event()
+        self.loads = []
+        self.engine._load_session_state = self.fake_load
+
+    def fake_load(self, session_name):
+        """Leitura falsa do armazenamento: a sessão 'lenta' só termina quando o teste liberar."""
+        self.loads.append(session_name)
+        if session_name == "lenta":
+            self.slow_load_started.set()
+            if not self.release_slow_load.wait(5):
+                raise TimeoutError("leitura não liberada")
+        elif session_name == "quebrada":
+            raise OSError("disco indisponível")
+        return chat_engine.SessionState(session_name)
+
+    def get_in_thread(self, session_name, results):
+        thread = threading.Thread(target=lambda: results.append(self.engine.get_session(session_name, "perfil")))
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        return thread
+
+    def test_slow_load_does_not_block_the_registry(self):
+        results = []
+        first = self.get_in_thread("lenta", results)
+        self.assertTrue(self.slow_load_started.wait(5))
+
+        # Enquanto a sessão lenta é lida, o registro e as demais sessões continuam disponíveis
+        self.assertEqual(self.engine.active_sessions(), {})
+        self.assertFalse(self.engine.is_session_in_use("lenta", "perfil"))
+        self.assertEqual(self.engine.get_session("rapida", "perfil").name, "rapida")
+
+        second = self.get_in_thread("lenta", results) # Espera a leitura em andamento em vez de ler de novo
+        self.release_slow_load.set()
+        first.join(5)
+        second.join(5)
+        self.assertEqual(len(results), 2)
+        self.assertIs(results[0], results[1])
+        self.assertEqual(self.loads, ["lenta", "rapida"])
+        self.assertIs(self.engine.get_session("lenta", "perfil"), results[0])
+
+    def test_failed_load_is_not_registered(self):
+        with self.assertRaises(OSError):
+            self.engine.get_session("quebrada", "perfil")
+        with self.assertRaises(OSError):
+            self.engine.get_session("quebrada", "perfil") # Tenta ler de novo
+        self.assertEqual(self.loads, ["quebrada", "quebrada"])
+        self.assertEqual(self.engine._loading_sessions, {})
+
+class LoadSessionStateTest(unittest.TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.profile = "teste_registro"
+        session_manager.set_storage_backend(
+            storage_backends.JsonFileBackend(os.path.join(temp_dir.name, "sessions"), os.path.join(temp_dir.name, "summaries")),
+            self.profile
+        )
+        self.addCleanup(session_manager.set_storage_backend, None, self.profile)
+        self.engine = chat_engine.ChatEngine()
+
+    def get_session(self, session_name):
+        with mock.patch("builtins.print") as mocked_print:
+            session = self.engine.get_session(session_name, self.profile)
+        return session, [call.args[0] for call in mocked_print.call_args_list]
+
+    def test_new_session_is_created_and_saved(self):
+        session, output = self.get_session("nova")
+        self.assertEqual(output, ["Sessão 'nova' não encontrada. Iniciando uma nova sessão."])
+        self.assertEqual([message["role"] for message in session.chat_history], ["system"])
+        with profiles.use_profile(self.profile):
+            self.assertTrue(session_manager.session_exists("nova"))
+
+    def test_existing_session_is_loaded(self):
+        history = [{"role": "system", "content": chat_engine.SYSTEM_MESSAGE}, {"role": "user", "content": "oi"}]
+        with profiles.use_profile(self.profile):
+            session_manager.save_session("antiga", history, "resumo", {"summary_id": "abc"})
+        session, output = self.get_session("antiga")
+        self.assertNotIn("Sessão 'antiga' não encontrada. Iniciando uma nova sessão.", output)
+        self.assertEqual(list(session.chat_history), history)
+        self.assertEqual(session.active_api_summary_content, "resumo")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,195 @@
+# test_storage_backends.py
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o teste é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from utils import profiles, session_manager
+from utils.storage_backends import JsonFileBackend, SQLiteBackend, JournalBackend, migrate
+
+def _session(num_messages, summary=None):
+    history = [{"role": "system", "content": "Você é um assistente."}]
+    history += [{"role": "user" if n % 2 else "assistant", "content": f"mensagem {n} — ção"} for n in range(1, num_messages)]
+    return {
+        "chat_history": history,
+        "active_api_summary_content": summary,
+        "active_api_summary_metadata": {"summary_id": "abc"} if summary else None
+    }
+
+def _summary(summary_id, timestamp, request_hash=None):
+    return {
+        "id": summary_id,
+        "timestamp": timestamp,
+        "content": f"Resumo {summary_id}",
+        "metadata": {"original_filename": f"{summary_id}.pdf", "request_hash": request_hash}
+    }
+
+class _TempDirTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.backends = []
+
+    def tearDown(self):
+        for backend in self.backends:
+            backend.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _backend(self, name, tag=""):
+        base = os.path.join(self.temp_dir, name + tag)
+        if name == "json":
+            backend = JsonFileBackend(os.path.join(base, "sessions"), os.path.join(base, "summaries"))
+        elif name == "sqlite":
+            backend = SQLiteBackend(os.path.join(base, "chatbot.sqlite3"))
+        else:
+            backend = JournalBackend(os.path.join(base, "journal"), os.path.join(base, "summaries"), fsync="never")
+        self.backends.append(backend)
+        return backend
+
+class RoundTripTest(_TempDirTest):
+    def test_sessions_and_summaries_round_trip(self):
+        for name in ("json", "sqlite", "journal"):
+            with self.subTest(backend=name):
+                backend = self._backend(name)
+                backend.save_session("trabalho", _session(5, summary="resumo ativo"))
+                backend.save_session("outra", _session(1))
+                backend.save_summary(_summary("antigo", "2024-01-01T10:00:00", "hash-1"))
+                backend.save_summary(_summary("novo", "2024-02-01T10:00:00", "hash-1"))
+
+                self.assertEqual(backend.load_session("trabalho"), _session(5, summary="resumo ativo"))
+                self.assertEqual(backend.list_sessions(), ["outra", "trabalho"])
+                self.assertTrue(backend.session_exists("outra"))
+                self.assertIsNone(backend.load_session("inexistente"))
+                self.assertEqual(backend.load_summary("novo"), _summary("novo", "2024-02-01T10:00:00", "hash-1"))
+                self.assertEqual([info["id"] for info in backend.list_summaries()], ["novo", "antigo"])
+                self.assertEqual(backend.get_summary_info_by_position(2)["id"], "antigo")
+                self.assertEqual(backend.find_summary_ids_by_request_hash("hash-1"), ["novo", "antigo"])
+
+                self.assertTrue(backend.delete_session("outra"))
+                self.assertFalse(backend.session_exists("outra"))
+                self.assertTrue(backend.delete_summary("antigo"))
+                self.assertIsNone(backend.get_summary_info("antigo"))
+
+    def test_incremental_saves_reload_the_full_history(self):
+        for name in ("json", "sqlite", "journal"):
+            with self.subTest(backend=name):
+                backend = self._backend(name)
+                for num_messages in (1, 3, 4, 9):
+                    backend.save_session("s", _session(num_messages))
+                self.assertEqual(backend.load_session("s"), _session(9))
+
+class MigrateTest(_TempDirTest):
+    def test_migrate_from_json_to_each_backend(self):
+        source = self._backend("json", "-origem")
+        source.save_session("a", _session(4, summary="resumo"))
+        source.save_session("b", _session(2))
+        source.save_summary(_summary("r1", "2024-03-01T00:00:00", "hash-r1"))
+
+        for name in ("sqlite", "journal"):
+            with self.subTest(target=name):
+                target = self._backend(name)
+                self.assertEqual(migrate(source, target), (2, 1, 0))
+                self.assertEqual(target.list_sessions(), ["a", "b"])
+                self.assertEqual(target.load_session("a"), _session(4, summary="resumo"))
+                self.assertEqual(target.load_summary("r1"), _summary("r1", "2024-03-01T00:00:00", "hash-r1"))
+                self.assertEqual(target.find_summary_ids_by_request_hash("hash-r1"), ["r1"])
+
+                # Sem overwrite, o que já existe no destino é mantido
+                target.save_session("a", _session(6))
+                self.assertEqual(migrate(source, target), (0, 0, 3))
+                self.assertEqual(target.load_session("a"), _session(6))
+                # Com overwrite, a origem prevalece
+                self.assertEqual(migrate(source, target, overwrite=True), (2, 1, 0))
+                self.assertEqual(target.load_session("a"), _session(4, summary="resumo"))
+
+class SQLiteSaveTest(_TempDirTest):
+    def _rows(self, backend, session_name):
+        return backend._connect().execute(
+            "SELECT seq, message FROM messages WHERE session_name = ? ORDER BY seq", (session_name,)
+        ).fetchall()
+
+    def test_new_messages_are_appended(self):
+        backend = self._backend("sqlite")
+        backend.save_session("s", _session(3))
+        first_rows = [tuple(row) for row in self._rows(backend, "s")]
+
+        statements = []
+        backend._connect().set_trace_callback(statements.append)
+        backend.save_session("s", _session(5))
+        backend._connect().set_trace_callback(None)
+
+        self.assertFalse([sql for sql in statements if sql.startswith("DELETE")])
+        rows = [tuple(row) for row in self._rows(backend, "s")]
+        self.assertEqual(rows[:3], first_rows)
+        self.assertEqual(len(rows), 5)
+
+    def test_history_is_rewritten_after_clearing(self):
+        backend = self._backend("sqlite")
+        backend.save_session("s", _session(6))
+        # /limpar: mantém só a mensagem de sistema e continua a conversa
+        cleared = _session(1)
+        cleared["chat_history"].append({"role": "user", "content": "recomeço"})
+        backend.save_session("s", cleared)
+
+        self.assertEqual(backend.load_session("s"), cleared)
+        self.assertEqual([row["seq"] for row in self._rows(backend, "s")], [0, 1])
+
+    def test_history_is_rewritten_when_the_last_stored_message_changed(self):
+        backend = self._backend("sqlite")
+        backend.save_session("s", _session(4))
+        edited = _session(5)
+        edited["chat_history"][3] = {"role": "user", "content": "editada"}
+        backend.save_session("s", edited)
+        self.assertEqual(backend.load_session("s"), edited)
+
+class NoImplicitMigrationTest(_TempDirTest):
+    def test_storage_backend_does_not_import_json_data(self):
+        paths = {
+            "sessions": os.path.join(self.temp_dir, "sessions"),
+            "summaries": os.path.join(self.temp_dir, "summaries"),
+            "sqlite": os.path.join(self.temp_dir, "chatbot.sqlite3"),
+            "journal": os.path.join(self.temp_dir, "journal"),
+        }
+        JsonFileBackend(paths["sessions"], paths["summaries"]).save_session("antiga", _session(2))
+
+        with mock.patch.object(profiles, "get_profile_paths", return_value=paths), \
+             mock.patch.object(session_manager, "STORAGE_BACKEND", "sqlite"), \
+             mock.patch.dict(session_manager._backends, clear=True):
+            backend = session_manager.get_storage_backend("teste_sem_migracao")
+            self.backends.append(backend)
+            self.assertEqual(backend.list_sessions(), [])
+
+class LongSessionLoadTest(_TempDirTest):
+    def load(self, backend_name):
+        """Carrega por session_manager uma sessão com mais mensagens que SESSION_TAIL_MESSAGES; retorna (dados, saída)."""
+        backend = self._backend(backend_name)
+        backend.save_session("longa", _session(12))
+        with mock.patch.dict(session_manager._backends, {"teste_janela": backend}), \
+             mock.patch.object(session_manager, "SESSION_TAIL_MESSAGES", 5), \
+             mock.patch("builtins.print") as mocked_print, profiles.use_profile("teste_janela"):
+            session_data = session_manager.load_session("longa")
+        return session_data, " ".join(str(call.args[0]) for call in mocked_print.call_args_list)
+
+    def test_sqlite_loads_only_the_tail(self):
+        session_data, output = self.load("sqlite")
+        self.assertEqual(session_data["chat_history"].loaded_count, 6) # Mensagem do sistema + 5 últimas
+        self.assertEqual(list(session_data["chat_history"]), _session(12)["chat_history"])
+        self.assertNotIn("Aviso", output)
+
+    def test_document_backends_warn_about_full_loads(self):
+        for backend_name in ("json", "journal"):
+            with self.subTest(backend=backend_name):
+                session_data, output = self.load(backend_name)
+                self.assertEqual(session_data["chat_history"], _session(12)["chat_history"])
+                self.assertIn("tem 12 mensagens e foi carregada inteira", output)
+                self.assertIn(f"backend '{backend_name}'", output)
+
+if __name__ == "__main__":
+    unittest.main()
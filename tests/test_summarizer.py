@@ -0,0 +1,84 @@
+# test_summarizer.py
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o teste é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from config.config import DEFAULT_MODEL, TEMPERATURE, SUMMARY_MAX_TOKENS
+from utils import api_service, summarizer
+
+def _chunks(count):
+    return [
+        {"text": f"  Texto do trecho {index}, com acentuação e \"aspas\".  ", "tokens": 10 + index,
+         "first_page": index + 1, "last_page": index + 1}
+        for index in range(count)
+    ]
+
+def _materialized_hash(chunks):
+    """Hash calculado com todas as mensagens em memória (compute_request_hash)."""
+    if len(chunks) == 1:
+        messages = summarizer._messages(summarizer._document_prompt(chunks[0]["text"]))
+    else:
+        messages = [{"role": "system", "content": summarizer.SUMMARY_SYSTEM_PROMPT}]
+        messages.extend({"role": "user", "content": summarizer._chunk_prompt(chunk)} for chunk in chunks)
+    return api_service.compute_request_hash(messages, DEFAULT_MODEL, TEMPERATURE, SUMMARY_MAX_TOKENS)
+
+class DocumentHashTest(unittest.TestCase):
+    def test_request_hasher_matches_compute_request_hash(self):
+        messages = [{"role": "system", "content": " sistema "}, {"role": "user", "content": "olá, é \"isso\""}]
+        for max_tokens in (None, 500):
+            hasher = api_service.RequestHasher("modelo", 0.12345, max_tokens)
+            for message in messages:
+                hasher.add_message(message)
+            self.assertEqual(hasher.hexdigest(), api_service.compute_request_hash(messages, "modelo", 0.12345, max_tokens))
+
+    def test_streaming_scan_keeps_the_document_hash(self):
+        for count in (1, 2, 7):
+            chunks = _chunks(count)
+            request_hash, num_chunks, total_tokens = summarizer.scan_document(iter(chunks))
+            self.assertEqual(request_hash, _materialized_hash(chunks))
+            self.assertEqual(num_chunks, count)
+            self.assertEqual(total_tokens, sum(chunk["tokens"] for chunk in chunks))
+
+    def test_empty_document(self):
+        self.assertEqual(summarizer.scan_document(iter([])), ("", 0, 0))
+
+class SummarizeChunksTest(unittest.TestCase):
+    def test_map_consumes_the_chunks_in_bounded_batches(self):
+        consumed = []
+        batch_sizes = []
+
+        def chunk_stream():
+            for chunk in _chunks(9):
+                consumed.append(chunk["first_page"])
+                yield chunk
+
+        def fake_batch(user_contents, max_tokens, concurrency):
+            # Cada lote só começa depois que os trechos dele foram lidos, e não antes
+            self.assertLessEqual(len(consumed), sum(batch_sizes) + len(user_contents))
+            batch_sizes.append(len(user_contents))
+            return ["resumo parcial"] * len(user_contents)
+
+        with mock.patch.object(summarizer, "_summarize_batch", side_effect=fake_batch), \
+             mock.patch.object(summarizer, "_summarize", return_value="resumo final"), \
+             mock.patch.object(summarizer, "_group_by_tokens", side_effect=lambda texts, _: [texts]):
+            result = summarizer.summarize_chunks(chunk_stream(), concurrency=2)
+
+        self.assertEqual(result, "resumo final")
+        self.assertEqual(batch_sizes, [4, 4, 1])
+
+    def test_single_chunk_is_summarized_directly(self):
+        with mock.patch.object(summarizer, "_summarize", return_value="resumo") as summarize, \
+             mock.patch.object(summarizer, "_summarize_batch") as summarize_batch:
+            self.assertEqual(summarizer.summarize_chunks(iter(_chunks(1))), "resumo")
+        summarize_batch.assert_not_called()
+        summarize.assert_called_once_with(summarizer._document_prompt(_chunks(1)[0]["text"]), SUMMARY_MAX_TOKENS)
+
+if __name__ == "__main__":
+    unittest.main()
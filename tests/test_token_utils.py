@@ -0,0 +1,66 @@
+# test_token_utils.py
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o teste é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from utils import token_utils
+from utils.token_utils import TOKENS_PER_REPLY
+
+def _message(role, tokens):
+    """Mensagem cujo custo, com a contagem falsa, é `tokens`."""
+    return {"role": role, "content": "x" * tokens}
+
+def _fake_count(message):
+    return len(message["content"])
+
+@mock.patch.object(token_utils, "count_tokens_in_message", _fake_count)
+class PackMessagesTest(unittest.TestCase):
+    def setUp(self):
+        self.system = _message("system", 10)
+        self.question = _message("user", 5)
+        # Histórico: sistema + 5 mensagens de 20 tokens cada
+        self.history = [self.system] + [_message("user" if n % 2 else "assistant", 20) for n in range(5)]
+
+    def test_keeps_the_most_recent_history_that_fits(self):
+        fixed = TOKENS_PER_REPLY + 10 + 5
+        messages, total, included = token_utils.pack_messages(
+            [self.system], self.history, [self.question], fixed + 2 * 20 + 19, history_start=1
+        )
+        self.assertEqual(included, 2)
+        self.assertEqual(messages, [self.system] + self.history[-2:] + [self.question])
+        self.assertEqual(total, fixed + 2 * 20)
+
+    def test_whole_history_when_budget_allows(self):
+        messages, total, included = token_utils.pack_messages([self.system], self.history, [self.question], 10000, history_start=1)
+        self.assertEqual(included, 5)
+        self.assertEqual(messages, self.history + [self.question])
+        self.assertEqual(total, TOKENS_PER_REPLY + 10 + 5 + 5 * 20)
+
+    def test_history_stays_contiguous(self):
+        # Uma mensagem grande no meio encerra a seleção, mesmo que as mais antigas coubessem
+        history = [self.system, _message("user", 1), _message("assistant", 50), _message("user", 1)]
+        messages, _, included = token_utils.pack_messages([self.system], history, [self.question], TOKENS_PER_REPLY + 15 + 10, history_start=1)
+        self.assertEqual(included, 1)
+        self.assertEqual(messages, [self.system, history[3], self.question])
+
+    def test_fixed_messages_are_always_included(self):
+        messages, total, included = token_utils.pack_messages([self.system], self.history, [self.question], 1, history_start=1)
+        self.assertEqual(included, 0)
+        self.assertEqual(messages, [self.system, self.question])
+        self.assertGreater(total, 1)
+
+    def test_history_start_skips_the_system_message(self):
+        _, _, included = token_utils.pack_messages([], self.history, [], 10000, history_start=1)
+        self.assertEqual(included, 5)
+        _, _, included = token_utils.pack_messages([], self.history, [], 10000)
+        self.assertEqual(included, 6)
+
+if __name__ == "__main__":
+    unittest.main()
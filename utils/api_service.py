@@ -2,15 +2,24 @@
 
 import os
 import sys
-from openai import OpenAI
-from openai import RateLimitError, APIConnectionError, OpenAIError
+import json
+import time
+import asyncio
+import hashlib
+import atexit
+import threading
+from typing import Iterator
 
 # Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
 # quando o módulo é executado diretamente.
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 sys.path.insert(0, project_root)
 
-from config.config import DEFAULT_MODEL, TEMPERATURE
+from config.config import (
+    DEFAULT_MODEL, TEMPERATURE, COMPLETION_CACHE_ENABLED, COMPLETION_CACHE_DIR, COMPLETION_CACHE_TTL_SECONDS,
+    API_MAX_CONCURRENT_REQUESTS, API_MAX_RETRIES, EMBEDDING_MODEL
+)
+from utils.rate_limiter import RateLimiter, compute_backoff_delay, get_retry_after
 
 # Carrega a chave da API do arquivo .env
 # Verifica se a chave OPENAI_API_KEY está definida como variável de ambiente.
@@ -29,9 +38,251 @@ API_KEY = os.getenv("OPENAI_API_KEY")
 if not API_KEY:
     raise ValueError("A chave OPENAI_API_KEY não foi encontrada. Por favor, defina-a no seu ambiente ou no arquivo .env.")
 
-client = OpenAI(api_key=API_KEY)
+# URL alternativa da API (opcional), útil para proxies ou para testes com um servidor local simulado.
+API_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
 
-def get_openai_completion(messages: list, model: str = DEFAULT_MODEL, temperature: float = TEMPERATURE, max_tokens: int = None) -> str:
+# O pacote openai e o cliente só são carregados na primeira requisição (ou pelo aquecimento em
+# segundo plano do main.py), para que o chatbot chegue ao prompt sem esperar a importação do openai.
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """
+    Retorna o cliente OpenAI compartilhado, criando-o na primeira chamada.
+
+    As novas tentativas são feitas por _create_with_retries (com backoff e limitador de taxa),
+    por isso as tentativas automáticas do cliente são desativadas.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+                _client = OpenAI(api_key=API_KEY, base_url=API_BASE_URL, max_retries=0)
+    return _client
+
+# Limitador compartilhado das cotas de requisições/minuto e tokens/minuto.
+rate_limiter = RateLimiter()
+
+def _retryable_errors() -> tuple:
+    """Erros transitórios que justificam uma nova tentativa."""
+    import openai
+    return (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+
+# Cliente assíncrono e semáforo de concorrência, criados sob demanda para cada event loop
+# (objetos asyncio ficam vinculados ao loop em que foram criados). O estado é separado por thread,
+# pois cada thread roda no máximo um event loop.
+_async_client_local = threading.local()
+
+# Event loop dedicado, em uma thread de segundo plano, onde rodam os lotes das chamadas síncronas
+# (get_openai_completions_batch). Vive enquanto o processo existir, de modo que o cliente AsyncOpenAI,
+# o pool de conexões e o semáforo são compartilhados por todos os lotes, de todas as threads.
+_batch_loop = None
+_batch_loop_lock = threading.Lock()
+
+# --- Cache de Respostas ---
+def compute_request_hash(messages: list, model: str = DEFAULT_MODEL, temperature: float = TEMPERATURE, max_tokens: int = None) -> str:
+    """
+    Calcula um hash normalizado de uma requisição de completion.
+
+    A normalização considera apenas 'role' e 'content' de cada mensagem (sem espaços nas
+    pontas), arredonda a temperatura e serializa tudo com chaves ordenadas, de modo que
+    requisições equivalentes produzam o mesmo hash.
+
+    Args:
+        messages (list): A lista de mensagens da requisição.
+        model (str): O nome do modelo.
+        temperature (float): A temperatura da requisição.
+        max_tokens (int, optional): O limite de tokens da resposta.
+
+    Returns:
+        str: O hash SHA-256 hexadecimal da requisição.
+    """
+    normalized_request = {
+        "messages": [
+            {"role": m.get("role", ""), "content": (m.get("content") or "").strip()}
+            for m in messages
+        ],
+        "model": model,
+        "temperature": round(float(temperature), 4),
+        "max_tokens": max_tokens,
+    }
+    serialized = json.dumps(normalized_request, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+class RequestHasher:
+    """
+    Calcula o mesmo hash de compute_request_hash recebendo as mensagens uma a uma.
+
+    Útil para requisições muito grandes (ex: todos os trechos de um documento), pois nenhuma
+    mensagem precisa ser mantida em memória depois de adicionada.
+    """
+
+    def __init__(self, model: str = DEFAULT_MODEL, temperature: float = TEMPERATURE, max_tokens: int = None):
+        self._tail = {"model": model, "temperature": round(float(temperature), 4)}
+        self._digest = hashlib.sha256()
+        # Chaves ordenadas, como em compute_request_hash: max_tokens, messages, model, temperature
+        self._digest.update(f'{{"max_tokens":{json.dumps(max_tokens)},"messages":['.encode('utf-8'))
+        self._has_messages = False
+
+    def add_message(self, message: dict):
+        """Adiciona a próxima mensagem da requisição ao hash."""
+        normalized_message = {"role": message.get("role", ""), "content": (message.get("content") or "").strip()}
+        serialized = json.dumps(normalized_message, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        if self._has_messages:
+            serialized = "," + serialized
+        self._digest.update(serialized.encode('utf-8'))
+        self._has_messages = True
+
+    def hexdigest(self) -> str:
+        """Retorna o hash SHA-256 hexadecimal da requisição com as mensagens adicionadas até aqui."""
+        digest = self._digest.copy()
+        tail = json.dumps(self._tail, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+        digest.update(f"],{tail[1:]}".encode('utf-8'))
+        return digest.hexdigest()
+
+def _get_completion_cache_path(request_hash: str) -> str:
+    """Retorna o caminho completo para o arquivo de cache de uma resposta."""
+    os.makedirs(COMPLETION_CACHE_DIR, exist_ok=True)
+    return os.path.join(COMPLETION_CACHE_DIR, f"{request_hash}.json")
+
+def get_cached_completion(request_hash: str) -> str or None:
+    """
+    Retorna a resposta em cache para um hash de requisição, se existir e não estiver expirada.
+    Entradas expiradas são removidas ao serem encontradas.
+    """
+    cache_path = _get_completion_cache_path(request_hash)
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if time.time() - cached.get("created_at", 0) > COMPLETION_CACHE_TTL_SECONDS:
+            os.remove(cache_path)
+            return None
+        return cached.get("response") or None
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Aviso: Entrada inválida no cache de respostas '{request_hash}': {e}")
+        return None
+
+def _store_cached_completion(request_hash: str, response: str):
+    """Grava uma resposta no cache (de forma atômica, via arquivo temporário)."""
+    cache_path = _get_completion_cache_path(request_hash)
+    temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp" # Exclusivo de cada processo e thread
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"created_at": time.time(), "response": response}, f, ensure_ascii=False)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        print(f"Aviso: Não foi possível gravar a resposta no cache: {e}")
+
+def purge_expired_completions() -> int:
+    """
+    Remove do cache todas as respostas com idade maior que COMPLETION_CACHE_TTL_SECONDS.
+
+    Returns:
+        int: O número de entradas removidas.
+    """
+    os.makedirs(COMPLETION_CACHE_DIR, exist_ok=True)
+    removed = 0
+    now = time.time()
+    for f_name in os.listdir(COMPLETION_CACHE_DIR):
+        if not f_name.endswith('.json'):
+            continue
+        cache_path = os.path.join(COMPLETION_CACHE_DIR, f_name)
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                created_at = json.load(f).get("created_at", 0)
+        except (OSError, json.JSONDecodeError):
+            created_at = 0 # Entradas corrompidas também são removidas
+        if now - created_at > COMPLETION_CACHE_TTL_SECONDS:
+            try:
+                os.remove(cache_path)
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+# --- Funções Auxiliares ---
+def _build_completion_args(messages: list, model: str, temperature: float, max_tokens: int = None) -> dict:
+    """Constrói o dicionário de argumentos para a chamada da API."""
+    completion_args = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+    }
+    # Adiciona max_tokens apenas se for fornecido (não None)
+    if max_tokens is not None:
+        completion_args["max_tokens"] = max_tokens
+    return completion_args
+
+def _report_api_error(error: Exception):
+    """Exibe uma mensagem amigável para um erro ocorrido ao chamar a API."""
+    from openai import RateLimitError, APIConnectionError, OpenAIError
+    if isinstance(error, RateLimitError):
+        print("Erro de limite de taxa da OpenAI: Muitas requisições. Por favor, espere um pouco.")
+    elif isinstance(error, APIConnectionError):
+        print(f"Erro de conexão com a API da OpenAI: {error}")
+        print("Verifique sua conexão com a internet ou a URL da API.")
+    elif isinstance(error, OpenAIError):
+        print(f"Erro da API OpenAI: {error}")
+        print("Verifique sua chave de API ou se há algum problema com o serviço da OpenAI.")
+    else:
+        print(f"Ocorreu um erro inesperado ao chamar a API: {error}")
+
+def _estimate_request_tokens(completion_args: dict) -> int:
+    """
+    Estima os tokens de uma requisição para o limitador de taxa (prompt + resposta máxima).
+    Usa a aproximação de ~4 caracteres por token para não codificar o prompt novamente.
+    """
+    prompt_chars = sum(len(m.get("content") or "") for m in completion_args.get("messages", []))
+    prompt_chars += sum(len(text) for text in completion_args.get("input", []))
+    return prompt_chars // 4 + (completion_args.get("max_tokens") or 0)
+
+def _announce_retry(error: Exception, attempt: int, delay: float):
+    """Informa ao usuário que uma requisição será repetida."""
+    from openai import RateLimitError
+    reason = "Limite de taxa da OpenAI atingido" if isinstance(error, RateLimitError) else f"Falha temporária na API ({error})"
+    print(f"Aviso: {reason}. Nova tentativa em {delay:.1f}s ({attempt}/{API_MAX_RETRIES})...")
+
+def _create_with_retries(create, **completion_args):
+    """
+    Chama `create` respeitando o limitador de taxa e repetindo erros transitórios
+    com backoff exponencial, jitter e o cabeçalho Retry-After.
+    Após API_MAX_RETRIES novas tentativas, o último erro é propagado.
+    """
+    estimated_tokens = _estimate_request_tokens(completion_args)
+    attempt = 0
+    while True:
+        rate_limiter.acquire(estimated_tokens)
+        try:
+            return create(**completion_args)
+        except _retryable_errors() as e:
+            attempt += 1
+            if attempt > API_MAX_RETRIES:
+                raise
+            delay = compute_backoff_delay(attempt, get_retry_after(e))
+            _announce_retry(e, attempt, delay)
+            time.sleep(delay)
+
+async def _create_with_retries_async(create, **completion_args):
+    """Versão assíncrona de _create_with_retries."""
+    estimated_tokens = _estimate_request_tokens(completion_args)
+    attempt = 0
+    while True:
+        await rate_limiter.acquire_async(estimated_tokens)
+        try:
+            return await create(**completion_args)
+        except _retryable_errors() as e:
+            attempt += 1
+            if attempt > API_MAX_RETRIES:
+                raise
+            delay = compute_backoff_delay(attempt, get_retry_after(e))
+            _announce_retry(e, attempt, delay)
+            await asyncio.sleep(delay)
+
+# --- API Síncrona ---
+def get_openai_completion(messages: list, model: str = DEFAULT_MODEL, temperature: float = TEMPERATURE, max_tokens: int = None, use_cache: bool = False) -> str:
     """
     Obtém uma resposta do modelo de linguagem da OpenAI.
 
@@ -43,35 +294,228 @@ def get_openai_completion(messages: list, model: str = DEFAULT_MODEL, temperatur
         temperature (float): A temperatura para controlar a criatividade da resposta (0.0 a 2.0).
         max_tokens (int, optional): O número máximo de tokens na resposta gerada.
                                     Se None, a API usará seu padrão.
+        use_cache (bool): Se True (e COMPLETION_CACHE_ENABLED estiver ativo), reutiliza uma
+                          resposta já obtida para a mesma requisição e guarda novas respostas.
 
     Returns:
         str: A resposta de texto do modelo, ou uma string vazia se houver um erro.
     """
+    use_cache = use_cache and COMPLETION_CACHE_ENABLED
+    if use_cache:
+        request_hash = compute_request_hash(messages, model, temperature, max_tokens)
+        cached_response = get_cached_completion(request_hash)
+        if cached_response:
+            print("Resposta reutilizada do cache (nenhuma chamada à API foi feita).")
+            return cached_response
+
     try:
-        # Constrói o dicionário de argumentos para a chamada da API
-        completion_args = {
-            "model": model,
-            "messages": messages,
-            "temperature": temperature,
-        }
-        # Adiciona max_tokens apenas se for fornecido (não None)
-        if max_tokens is not None:
-            completion_args["max_tokens"] = max_tokens
+        chat_completion = _create_with_retries(
+            get_client().chat.completions.create, **_build_completion_args(messages, model, temperature, max_tokens)
+        )
+        response = chat_completion.choices[0].message.content
+        if use_cache and response:
+            _store_cached_completion(request_hash, response)
+        return response
+    except Exception as e:
+        _report_api_error(e)
+    return ""
 
-        chat_completion = client.chat.completions.create(**completion_args)
-        return chat_completion.choices[0].message.content
-    except RateLimitError:
-        print("Erro de limite de taxa da OpenAI: Muitas requisições. Por favor, espere um pouco.")
-    except APIConnectionError as e:
-        print(f"Erro de conexão com a API da OpenAI: {e}")
-        print("Verifique sua conexão com a internet ou a URL da API.")
-    except OpenAIError as e:
-        print(f"Erro da API OpenAI: {e}")
-        print("Verifique sua chave de API ou se há algum problema com o serviço da OpenAI.")
+def stream_openai_completion(messages: list, model: str = DEFAULT_MODEL, temperature: float = TEMPERATURE, max_tokens: int = None, stats: dict = None) -> Iterator[str]:
+    """
+    Obtém uma resposta do modelo em modo streaming, entregando os trechos (deltas) conforme chegam.
+
+    Args:
+        messages, model, temperature, max_tokens: Como em get_openai_completion.
+        stats (dict, optional): Se fornecido, é preenchido com as métricas da requisição:
+                                'time_to_first_token' (segundos até o primeiro trecho, ou None),
+                                'total_time' (segundos até o fim) e 'error' (True se a requisição falhou).
+
+    Yields:
+        str: Os trechos de texto da resposta, na ordem em que são gerados.
+    """
+    if stats is None:
+        stats = {}
+    stats.update(time_to_first_token=None, total_time=None, error=False)
+    start_time = time.perf_counter()
+    try:
+        response_stream = _create_with_retries(
+            get_client().chat.completions.create, stream=True, **_build_completion_args(messages, model, temperature, max_tokens)
+        )
+        for chunk in response_stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if stats["time_to_first_token"] is None:
+                    stats["time_to_first_token"] = time.perf_counter() - start_time
+                yield delta
+    except Exception as e:
+        stats["error"] = True
+        _report_api_error(e)
+    finally:
+        stats["total_time"] = time.perf_counter() - start_time
+
+def get_openai_embeddings(texts: list, model: str = EMBEDDING_MODEL) -> list:
+    """
+    Obtém os embeddings de vários textos em uma única requisição à API.
+
+    Args:
+        texts (list): Os textos a serem convertidos em vetores.
+        model (str): O modelo de embeddings da OpenAI.
+
+    Returns:
+        list: Uma lista de vetores (listas de floats), na mesma ordem de `texts`,
+              ou uma lista vazia se houver um erro.
+    """
+    if not texts:
+        return []
+    try:
+        response = _create_with_retries(get_client().embeddings.create, model=model, input=list(texts))
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
     except Exception as e:
-        print(f"Ocorreu um erro inesperado ao chamar a API: {e}")
+        _report_api_error(e)
+    return []
+
+# --- API Assíncrona ---
+def _get_async_state() -> dict:
+    """
+    Retorna o cliente AsyncOpenAI e o semáforo compartilhados do event loop atual.
+
+    O cliente mantém um único pool de conexões HTTP reutilizado por todas as requisições
+    feitas no mesmo loop; o semáforo limita as requisições simultâneas a API_MAX_CONCURRENT_REQUESTS.
+    """
+    loop = asyncio.get_running_loop()
+    state = getattr(_async_client_local, "state", None)
+    if state is None or state["loop"] is not loop:
+        from openai import AsyncOpenAI
+        state = _async_client_local.state = {
+            "loop": loop,
+            "client": AsyncOpenAI(api_key=API_KEY, base_url=API_BASE_URL, max_retries=0),
+            "semaphore": asyncio.Semaphore(API_MAX_CONCURRENT_REQUESTS)
+        }
+    return state
+
+async def close_async_client():
+    """Fecha o cliente assíncrono do event loop atual, liberando as conexões do pool."""
+    state = getattr(_async_client_local, "state", None)
+    if state is not None and state["loop"] is asyncio.get_running_loop():
+        await state["client"].close()
+    _async_client_local.state = None
+
+async def _request_completion_async(state: dict, messages: list, model: str, temperature: float, max_tokens: int, request_hash: str) -> str:
+    """Faz uma requisição com o cliente assíncrono do loop, dentro do limite compartilhado de concorrência."""
+    async with state["semaphore"]:
+        try:
+            chat_completion = await _create_with_retries_async(
+                state["client"].chat.completions.create, **_build_completion_args(messages, model, temperature, max_tokens)
+            )
+            response = chat_completion.choices[0].message.content
+            if request_hash and response:
+                _store_cached_completion(request_hash, response)
+            return response
+        except Exception as e:
+            _report_api_error(e)
     return ""
 
+async def get_openai_completion_async(messages: list, model: str = DEFAULT_MODEL, temperature: float = TEMPERATURE, max_tokens: int = None, use_cache: bool = False, semaphore: asyncio.Semaphore = None) -> str:
+    """
+    Versão assíncrona de get_openai_completion, baseada em AsyncOpenAI.
+
+    Args:
+        messages, model, temperature, max_tokens, use_cache: Como em get_openai_completion.
+        semaphore (asyncio.Semaphore, optional): Semáforo adicional que limita a concorrência (ex: de um lote).
+                                                 O semáforo compartilhado do loop (API_MAX_CONCURRENT_REQUESTS)
+                                                 é sempre respeitado.
+
+    Returns:
+        str: A resposta de texto do modelo, ou uma string vazia se houver um erro.
+    """
+    request_hash = None
+    if use_cache and COMPLETION_CACHE_ENABLED:
+        request_hash = compute_request_hash(messages, model, temperature, max_tokens)
+        cached_response = get_cached_completion(request_hash)
+        if cached_response:
+            return cached_response
+
+    state = _get_async_state()
+    if semaphore is None:
+        return await _request_completion_async(state, messages, model, temperature, max_tokens, request_hash)
+    async with semaphore:
+        return await _request_completion_async(state, messages, model, temperature, max_tokens, request_hash)
+
+async def gather_openai_completions_async(requests: list, concurrency: int = None) -> list:
+    """
+    Executa várias requisições de completion em paralelo e retorna as respostas na ordem de entrada.
+
+    É a forma de pedir um lote a partir de código que já roda em um event loop; fora de um loop,
+    use get_openai_completions_batch.
+
+    Args:
+        requests (list): Lista de dicionários com os argumentos de get_openai_completion_async
+                         (ex: [{"messages": [...], "max_tokens": 500, "use_cache": True}, ...]).
+        concurrency (int, optional): Limite de requisições simultâneas deste lote.
+                                     Se None, vale apenas o limite compartilhado (API_MAX_CONCURRENT_REQUESTS).
+
+    Returns:
+        list: As respostas de texto, uma por requisição (string vazia nas que falharam).
+    """
+    semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+    return await asyncio.gather(
+        *(get_openai_completion_async(semaphore=semaphore, **request) for request in requests)
+    )
+
+def _get_batch_loop() -> asyncio.AbstractEventLoop:
+    """Retorna o event loop dedicado aos lotes síncronos, iniciando a sua thread na primeira chamada."""
+    global _batch_loop
+    if _batch_loop is None:
+        with _batch_loop_lock:
+            if _batch_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="openai-async", daemon=True).start()
+                _batch_loop = loop
+    return _batch_loop
+
+@atexit.register
+def close_batch_loop():
+    """Fecha o cliente assíncrono do loop dedicado e encerra o loop (chamada automaticamente ao sair)."""
+    global _batch_loop
+    with _batch_loop_lock:
+        loop, _batch_loop = _batch_loop, None
+    if loop is None:
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(close_async_client(), loop).result(timeout=5)
+    except Exception as e:
+        print(f"Aviso: Não foi possível fechar o cliente assíncrono da OpenAI: {e}")
+    loop.call_soon_threadsafe(loop.stop)
+
+def get_openai_completions_batch(requests: list, concurrency: int = None) -> list:
+    """
+    Ponto de entrada síncrono para gather_openai_completions_async.
+
+    O lote é enviado ao event loop dedicado (veja _get_batch_loop) e esta chamada aguarda o resultado.
+    O cliente assíncrono e o seu pool de conexões são reutilizados entre os lotes, e a função pode ser
+    chamada de qualquer thread, inclusive de uma que já tenha um event loop em execução.
+
+    Args:
+        requests (list): Lista de dicionários com os argumentos de cada requisição.
+        concurrency (int, optional): Limite de requisições simultâneas deste lote.
+
+    Returns:
+        list: As respostas de texto, na mesma ordem de `requests`.
+    """
+    if not requests:
+        return []
+
+    loop = _get_batch_loop()
+    try:
+        running_loop = asyncio.get_running_loop()
+    except RuntimeError:
+        running_loop = None
+    if running_loop is loop:
+        raise RuntimeError("get_openai_completions_batch não pode ser chamada do loop dos lotes; use gather_openai_completions_async.")
+    return asyncio.run_coroutine_threadsafe(gather_openai_completions_async(requests, concurrency), loop).result()
+
 if __name__ == "__main__":
     print("Testando api_service.py...")
 
@@ -99,3 +543,11 @@ if __name__ == "__main__":
     error_response = get_openai_completion(test_messages, model="modelo_invalido_xyz")
     if not error_response:
         print("Teste de erro bem-sucedido: Não houve resposta (como esperado para modelo inválido).")
+
+    # Teste do lote assíncrono (respostas na ordem de entrada)
+    print("\nTestando get_openai_completions_batch com 3 requisições em paralelo:")
+    batch_responses = get_openai_completions_batch([
+        {"messages": [{"role": "user", "content": f"Responda apenas com o número {n}."}], "max_tokens": 5}
+        for n in range(1, 4)
+    ])
+    print("Respostas do lote:", batch_responses)
@@ -0,0 +1,70 @@
+#chat_client.py
+
+"""
+Cliente de terminal do modo daemon (utils/chat_daemon.py).
+
+Apenas repassa o que é digitado para o socket do daemon e exibe o que ele responde, sem importar
+nenhum módulo pesado: a conexão leva milissegundos, pois o daemon já está com tudo carregado.
+
+Uso:
+    python3 utils/chat_client.py            # conecta na sessão padrão
+    python3 utils/chat_client.py MinhaSessao # conecta e carrega a sessão informada
+"""
+
+import os
+import sys
+import select
+import socket
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o módulo é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from config.config import DAEMON_SOCKET_PATH, COMMANDS
+
+def run_client(socket_path: str = DAEMON_SOCKET_PATH, session_name: str = None) -> int:
+    """
+    Conecta ao daemon e repassa a entrada e a saída do terminal até a conexão ser encerrada.
+
+    Returns:
+        int: O código de saída do processo.
+    """
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(socket_path)
+    except OSError:
+        print(f"O daemon do chatbot não está em execução (socket '{socket_path}').")
+        print("Inicie-o com: python3 utils/chat_daemon.py")
+        return 1
+
+    if session_name:
+        connection.sendall(f"{COMMANDS['load_session']} {session_name}\n".encode("utf-8"))
+
+    stdin_fd = sys.stdin.fileno()
+    stdout = sys.stdout.buffer
+    watched = [connection, stdin_fd]
+    try:
+        while True:
+            ready, _, _ = select.select(watched, [], [])
+            if connection in ready:
+                data = connection.recv(65536)
+                if not data: # O daemon encerrou a conexão (ex: após /sair)
+                    break
+                stdout.write(data)
+                stdout.flush()
+            if stdin_fd in ready:
+                data = os.read(stdin_fd, 65536)
+                if data:
+                    connection.sendall(data)
+                else: # Fim da entrada (Ctrl+D ou fim do arquivo redirecionado)
+                    connection.shutdown(socket.SHUT_WR)
+                    watched.remove(stdin_fd)
+    except KeyboardInterrupt:
+        print("\nDesconectado. A sessão foi salva pelo daemon.")
+    finally:
+        connection.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(run_client(session_name=sys.argv[1] if len(sys.argv) > 1 else None))
@@ -0,0 +1,130 @@
+#chat_daemon.py
+
+"""
+Modo daemon do chatbot: um processo de longa duração que mantém carregados o cliente da OpenAI
+(e seu pool de conexões), o codificador de tokens, os caches e os índices de busca, e atende
+vários terminais por um socket Unix (DAEMON_SOCKET_PATH).
+
+Cada conexão recebe o mesmo prompt e os mesmos comandos (COMMANDS) do `python3 main.py`.
+Os terminais compartilham um único ChatEngine: comandos de sessões diferentes são executados em
+paralelo, e terminais na mesma sessão compartilham o histórico (um comando por vez na sessão). /sair salva a sessão e desconecta o terminal, mas o daemon continua
+em execução (encerre-o com Ctrl+C ou SIGTERM).
+
+O perfil (sessões, resumos e exports) é escolhido ao iniciar o daemon e vale para todos os terminais.
+
+Uso:
+    python3 utils/chat_daemon.py [--perfil NOME] # inicia o daemon
+    python3 utils/chat_client.py [sessao] # conecta um terminal ao daemon
+"""
+
+import io
+import os
+import sys
+import signal
+import argparse
+import socket
+import traceback
+import socketserver
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o módulo é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from config.config import DAEMON_SOCKET_PATH, DEFAULT_SESSION_NAME
+from utils import chat_engine, profiles
+
+# Motor compartilhado por todas as conexões (criado em serve)
+_engine = None
+
+class ChatRequestHandler(socketserver.StreamRequestHandler):
+    """Atende um terminal conectado: o mesmo laço de prompt do main.run_chatbot."""
+
+    def handle(self):
+        reader = io.TextIOWrapper(self.rfile, encoding="utf-8", errors="replace")
+        writer = io.TextIOWrapper(self.wfile, encoding="utf-8", errors="replace", write_through=True)
+        conversation = None
+        with chat_engine.routed_console(reader, writer):
+            try:
+                conversation = _engine.open_conversation(DEFAULT_SESSION_NAME)
+                chat_engine.print_welcome()
+
+                keep_going = True
+                while keep_going:
+                    chat_engine.print_separator()
+                    user_input = input(_engine.get_prompt(conversation)) # Aguarda o terminal sem bloquear as outras conexões
+                    try:
+                        keep_going = _engine.process_input(conversation, user_input)
+                    except Exception as e:
+                        print(f"Ocorreu um erro inesperado: {e}")
+                        traceback.print_exc()
+                print("Sessão salva. Terminal desconectado (o daemon continua em execução).")
+            except (EOFError, OSError):
+                pass # O terminal foi fechado sem /sair
+            finally:
+                if conversation is not None:
+                    _engine.close_conversation(conversation)
+
+def daemon_running(socket_path: str = DAEMON_SOCKET_PATH) -> bool:
+    """Verifica se há um daemon aceitando conexões no socket."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            probe.connect(socket_path)
+        return True
+    except OSError:
+        return False
+
+def _stop_daemon(signum, frame):
+    raise KeyboardInterrupt
+
+def serve(socket_path: str = DAEMON_SOCKET_PATH) -> int:
+    """
+    Inicia o daemon e atende os terminais até receber Ctrl+C ou SIGTERM.
+
+    Returns:
+        int: O código de saída do processo.
+    """
+    if os.path.exists(socket_path):
+        if daemon_running(socket_path):
+            print(f"Já existe um daemon em execução em '{socket_path}'.")
+            return 1
+        os.remove(socket_path) # Socket de um daemon que não foi encerrado corretamente
+
+    global _engine
+    from utils import session_manager
+    print("Carregando o cliente da OpenAI e o codificador de tokens...")
+    chat_engine.warm_up()
+    _engine = chat_engine.ChatEngine()
+    chat_engine.install_console_routing()
+
+    server = socketserver.ThreadingUnixStreamServer(socket_path, ChatRequestHandler, bind_and_activate=False)
+    server.daemon_threads = True
+    previous_umask = os.umask(0o177) # O socket é acessível apenas pelo usuário que iniciou o daemon
+    try:
+        server.server_bind()
+    finally:
+        os.umask(previous_umask)
+    server.server_activate()
+
+    signal.signal(signal.SIGTERM, _stop_daemon)
+    print(f"Daemon do chatbot aguardando conexões em '{socket_path}' (Ctrl+C para encerrar).")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nEncerrando o daemon...")
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        session_manager.flush_pending_saves()
+        chat_engine.wait_for_exports()
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Daemon do chatbot de consulta de PDFs (socket Unix).")
+    parser.add_argument("--perfil", type=profiles.validate_profile_name,
+                        help="Perfil usado pelos terminais (padrão: CHATBOT_PERFIL ou 'default').")
+    args = parser.parse_args()
+    if args.perfil:
+        profiles.set_default_profile(args.perfil)
+    sys.exit(serve())
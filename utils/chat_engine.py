@@ -0,0 +1,1121 @@
+# chat_engine.py
+
+import os
+import sys
+import uuid # Para gerar IDs de resumo
+import datetime # Para o timestamp dos resumos
+import threading
+import contextlib
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o módulo é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from config.config import (
+    DEFAULT_MODEL, TEMPERATURE, MAX_TOKENS_LIMIT, CHAT_CONTEXT_TOKEN_BUDGET,
+    SYSTEM_MESSAGE, SUMMARY_INSTRUCTION_MESSAGE, PDFS_DIR, COMMANDS, SUMMARY_MAX_TOKENS,
+    COMPLETION_CACHE_ENABLED, STREAM_RESPONSES, SHOW_RESPONSE_TIMING, SUMMARY_CHUNK_TOKENS, EXPORT_IN_BACKGROUND,
+    DEFAULT_PROFILE
+)
+from utils import (
+    api_service, session_manager, token_utils, pdf_exporter, extraction_cache, summarizer,
+    retrieval_index, embedding_store, hybrid_retriever, export_jobs, profiles
+)
+
+# --- Funções Auxiliares de Exibição no Terminal ---
+
+def print_separator(char="=", length=60):
+    """Imprime uma linha de separação no terminal."""
+    print(char * length)
+
+def colorize_text(text, color_code, bold=False):
+    """
+    Aplica cores e/ou negrito ao texto para exibição no terminal.
+    Os códigos de cor são padrão ANSI.
+    Ex: 31=vermelho, 32=verde, 33=amarelo, 34=azul, 35=magenta, 36=ciano, 37=branco.
+    """
+    bold_code = "\033[1m" if bold else ""
+    color_start = f"\033[{color_code}m"
+    color_end = "\033[0m" # Código para resetar a formatação
+    return f"{bold_code}{color_start}{text}{color_end}"
+
+def print_welcome():
+    """Exibe a mensagem de boas-vindas."""
+    print_separator()
+    print("Bem-vindo ao Chatbot de Consulta de PDFs!")
+    print("Digite suas perguntas ou um comando (ex: /ajuda para ver os comandos).")
+
+# --- Console por Thread ---
+# Os comandos usam print() e input(). Quando vários terminais são atendidos pelo mesmo processo
+# (modo daemon e servidor), sys.stdin, sys.stdout e sys.stderr são substituídos por streams que
+# repassam a leitura e a escrita para os streams registrados pela thread atual.
+_console = threading.local()
+
+class _RoutedStream:
+    """Stream que repassa as operações ao stream registrado pela thread atual (ou ao stream original)."""
+
+    def __init__(self, name: str, default):
+        self._name = name
+        self._default = default
+
+    def _target(self):
+        streams = getattr(_console, "streams", None)
+        return streams[self._name] if streams else self._default
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def readline(self, *args) -> str:
+        return self._target().readline(*args)
+
+    def __getattr__(self, attribute):
+        return getattr(self._target(), attribute)
+
+def install_console_routing():
+    """Substitui sys.stdin, sys.stdout e sys.stderr pelos streams roteados por thread (uma única vez)."""
+    for name in ("stdin", "stdout", "stderr"):
+        if not isinstance(getattr(sys, name), _RoutedStream):
+            setattr(sys, name, _RoutedStream(name, getattr(sys, name)))
+
+@contextlib.contextmanager
+def routed_console(stdin, stdout):
+    """Direciona print() e input() da thread atual para os streams informados."""
+    previous = getattr(_console, "streams", None)
+    _console.streams = {"stdin": stdin, "stdout": stdout, "stderr": stdout}
+    try:
+        yield
+    finally:
+        _console.streams = previous
+
+# --- Aquecimento ---
+
+def warm_up():
+    """
+    Carrega o que a primeira pergunta vai precisar (o cliente da OpenAI e o codificador de tokens).
+    Executada em segundo plano enquanto o usuário digita; se ela ainda não terminou quando a
+    primeira pergunta chega, a pergunta apenas espera o carregamento em andamento.
+    """
+    try:
+        api_service.get_client()
+        token_utils.get_encoder()
+    except Exception:
+        pass # Um erro aqui se repetirá (e será exibido) no primeiro uso
+
+# --- Exportações em Segundo Plano ---
+
+def format_export_job(job: dict) -> str:
+    """Formata uma linha com o estado de um job de exportação."""
+    progress = ""
+    if job["status"] == export_jobs.STATUS_RUNNING and job["total"]:
+        progress = f" ({job['done']}/{job['total']} mensagens, {job['done'] / job['total']:.0%})"
+    line = f"#{job['id']} '{job['export_name']}' (sessão '{job['session']}'): {job['status']}{progress}"
+    if job["result"] and job["status"] in export_jobs.FINISHED_STATUSES:
+        line += f"\n    {job['result']}"
+    return line
+
+def wait_for_exports():
+    """
+    Aguarda as exportações pendentes antes de encerrar, exibindo o andamento.
+    Um Ctrl+C durante a espera abandona as exportações que ainda não terminaram.
+    """
+    if export_jobs.pending_count() == 0:
+        export_jobs.shutdown()
+        return
+    print(f"Aguardando {export_jobs.pending_count()} exportação(ões) pendente(s). Pressione Ctrl+C para abandoná-las.")
+    try:
+        while not export_jobs.wait_all(timeout=2.0):
+            for job in export_jobs.list_jobs():
+                if job["status"] not in export_jobs.FINISHED_STATUSES:
+                    print(f"- {format_export_job(job)}")
+    except KeyboardInterrupt:
+        abandoned = export_jobs.abandon_all()
+        print(f"\n{abandoned} exportação(ões) abandonada(s). Os PDFs incompletos podem ser excluídos com {COMMANDS['delete_export']}.")
+        return
+    export_jobs.shutdown()
+
+# --- Estado das Sessões ---
+
+class SessionState:
+    """
+    Estado de uma sessão de chat: o histórico e o resumo de PDF ativo.
+
+    Há um único objeto por sessão (de cada perfil) em cada ChatEngine, compartilhado por todos os
+    terminais ou conexões que a usam. O lock garante que apenas um comando ou pergunta altere a sessão por vez.
+    """
+
+    def __init__(self, name: str, chat_history=None, active_api_summary_content: str = None,
+                 active_api_summary_metadata: dict = None, profile: str = None):
+        self.name = name
+        self.profile = profile or profiles.get_current_profile()
+        self.chat_history = chat_history if chat_history is not None else [{"role": "system", "content": SYSTEM_MESSAGE}]
+        self.active_api_summary_content = active_api_summary_content
+        self.active_api_summary_metadata = active_api_summary_metadata
+        self.lock = threading.RLock()
+        self.users = 0 # Conversas com esta sessão ativa
+
+    def save(self):
+        """Agenda o salvamento da sessão (gravado em segundo plano, sem bloquear o prompt)."""
+        with profiles.use_profile(self.profile):
+            session_manager.save_session_in_background(self.name, self.chat_history, self.active_api_summary_content, self.active_api_summary_metadata)
+
+    def reset(self):
+        """Volta ao estado inicial (apenas a mensagem do sistema, sem resumo ativo)."""
+        self.chat_history = [{"role": "system", "content": SYSTEM_MESSAGE}]
+        self.active_api_summary_content = None
+        self.active_api_summary_metadata = None
+
+class Conversation:
+    """
+    Um terminal ou conexão: aponta para a sessão ativa (que pode mudar com /carregar_sessao ou /nova_sessao).
+    O perfil é fixo durante toda a conversa.
+    """
+
+    def __init__(self, session: SessionState, profile: str = None):
+        self.session = session
+        self.profile = profiles.validate_profile_name(profile or profiles.get_current_profile())
+
+class ChatEngine:
+    """
+    Motor do chatbot: executa os comandos (COMMANDS) e as perguntas de uma conversa.
+
+    Pode atender várias conversas ao mesmo tempo (ex: modo daemon e servidor): as sessões ficam em
+    um registro compartilhado, indexado por (perfil, sessão), e cada comando é executado com o lock da
+    sessão da conversa e no perfil dela.
+    A saída é feita com print() e as perguntas interativas com input() (veja routed_console).
+    """
+
+    def __init__(self):
+        self._sessions = {} # (perfil, nome da sessão) -> SessionState
+        # (perfil, nome da sessão) -> Event da leitura em andamento. A leitura é feita fora de _sessions_lock,
+        # para que a leitura lenta de uma sessão não bloqueie o registro (e as demais sessões).
+        self._loading_sessions = {}
+        self._sessions_lock = threading.Lock()
+
+    # --- Sessões e Conversas ---
+
+    def _load_session_state(self, session_name: str) -> SessionState:
+        """Lê uma sessão do perfil atual no armazenamento (ou cria uma nova, se ela não existir)."""
+        # load_session sempre devolve um dicionário (uma sessão padrão, se ela não existir),
+        # então a sessão nova é reconhecida antes da leitura
+        if not session_manager.session_exists(session_name):
+            print(f"Sessão '{session_name}' não encontrada. Iniciando uma nova sessão.")
+            session = SessionState(session_name)
+            session_manager.save_session(session.name, session.chat_history, None, None)
+            return session
+
+        loaded_data = session_manager.load_session(session_name)
+        loaded_chat_history = loaded_data.get("chat_history", [])
+        # Garante que o histórico comece com a mensagem do sistema
+        if (not loaded_chat_history or
+            not isinstance(loaded_chat_history[0], dict) or
+            loaded_chat_history[0].get("role") != "system"):
+            loaded_chat_history = [{"role": "system", "content": SYSTEM_MESSAGE}] + \
+                                  [m for m in loaded_chat_history if isinstance(m, dict) and m.get("role") != "system"]
+        return SessionState(
+            session_name, loaded_chat_history,
+            loaded_data.get("active_api_summary_content", None),
+            loaded_data.get("active_api_summary_metadata", None)
+        )
+
+    def get_session(self, session_name: str, profile: str = None) -> SessionState:
+        """
+        Retorna o estado compartilhado de uma sessão do perfil (por padrão, o da thread atual),
+        lendo-a do armazenamento na primeira vez.
+        """
+        profile = profile or profiles.get_current_profile()
+        key = (profile, session_name)
+        while True:
+            with self._sessions_lock:
+                session = self._sessions.get(key)
+                if session is not None:
+                    return session
+                loading = self._loading_sessions.get(key)
+                if loading is None:
+                    # Esta thread lê a sessão; as outras que pedirem a mesma sessão esperam por ela
+                    loading = self._loading_sessions[key] = threading.Event()
+                    break
+            loading.wait() # Depois, confere de novo: a leitura da outra thread pode ter falhado
+
+        try:
+            with profiles.use_profile(profile):
+                session = self._load_session_state(session_name)
+            with self._sessions_lock:
+                self._sessions[key] = session
+            return session
+        finally:
+            with self._sessions_lock:
+                del self._loading_sessions[key]
+            loading.set()
+
+    def is_session_in_use(self, session_name: str, profile: str = None) -> bool:
+        """Indica se alguma conversa está com a sessão ativa (no perfil informado ou no da thread atual)."""
+        with self._sessions_lock:
+            session = self._sessions.get((profile or profiles.get_current_profile(), session_name))
+            return session is not None and session.users > 0
+
+    def active_sessions(self) -> dict:
+        """Retorna, por perfil, as sessões ativas em alguma conversa e quantas conversas usam cada uma."""
+        active = {}
+        with self._sessions_lock:
+            for (profile, name), session in self._sessions.items():
+                if session.users > 0:
+                    active.setdefault(profile, {})[name] = session.users
+        return active
+
+    def switch_session(self, conversation: Conversation, session_name: str):
+        """Ativa uma sessão (do perfil da conversa) e informa se ela tem um resumo ativo."""
+        session = self.get_session(session_name, conversation.profile)
+        with self._sessions_lock:
+            if conversation.session is not None:
+                conversation.session.users -= 1
+            session.users += 1
+        conversation.session = session
+        if session.active_api_summary_content and session.active_api_summary_metadata:
+            print(f"Resumo ativo: {session.active_api_summary_metadata.get('original_filename', 'PDF Desconhecido')}")
+        else:
+            print("Nenhum resumo de PDF ativo nesta sessão.")
+
+    def open_conversation(self, session_name: str, profile: str = None) -> Conversation:
+        """Inicia uma conversa na sessão informada, no perfil informado (por padrão, o da thread atual)."""
+        conversation = Conversation(None, profile)
+        self.switch_session(conversation, session_name)
+        return conversation
+
+    def close_conversation(self, conversation: Conversation):
+        """Encerra uma conversa, salvando a sessão ativa."""
+        if conversation.session is None:
+            return
+        conversation.session.save()
+        with self._sessions_lock:
+            conversation.session.users -= 1
+        conversation.session = None
+
+    def get_prompt(self, conversation: Conversation) -> str:
+        """Retorna o texto do prompt de entrada, com o nome da sessão da conversa (e o perfil, se não for o padrão)."""
+        label = conversation.session.name
+        if conversation.profile != DEFAULT_PROFILE:
+            label = f"{conversation.profile}/{label}"
+        return f"\n[{label}] {colorize_text('CHATGPT VOCÊ', 34, bold=True)}: " # Azul negrito
+
+    @staticmethod
+    def _valid_name(validate, name: str) -> bool:
+        """
+        Valida um nome digitado como argumento de um comando (sessão ou export). Os nomes viram caminhos
+        de arquivo, e o motor também atende clientes remotos (servidor), então nomes como '../x' são recusados.
+        """
+        try:
+            validate(name)
+            return True
+        except ValueError as e:
+            print(e)
+            return False
+
+    # --- Resumos ---
+
+    def activate_cached_summary(self, session: SessionState, request_hash: str) -> bool:
+        """
+        Ativa um resumo já salvo que foi gerado pela mesma requisição, evitando chamar a API.
+
+        Args:
+            session (SessionState): A sessão em que o resumo será ativado.
+            request_hash (str): O hash da requisição de resumo (api_service.compute_request_hash).
+
+        Returns:
+            bool: True se um resumo foi encontrado e ativado, False caso contrário.
+        """
+        if not COMPLETION_CACHE_ENABLED:
+            return False
+
+        cached_summary = session_manager.find_summary_by_request_hash(request_hash)
+        if not cached_summary:
+            return False
+
+        session.active_api_summary_content = cached_summary["content"]
+        session.active_api_summary_metadata = dict(cached_summary.get("metadata") or {})
+        session.active_api_summary_metadata["summary_id"] = cached_summary.get("id")
+        display_filename = session.active_api_summary_metadata.get("original_filename", "PDF Desconhecido")
+
+        print(f"\nUm resumo idêntico já existe (ID: {cached_summary.get('id')}). Reutilizando-o sem chamar a API.")
+        print(f"Resumo '{display_filename}' definido como contexto ativo para a sessão '{session.name}'.")
+        session.chat_history.append({"role": "system", "content": f"Resumo '{display_filename}' carregado e pronto para consultas."})
+        session.save()
+        return True
+
+    # --- Comandos ---
+
+    def handle_create_manual_summary(self, conversation: Conversation, args: list):
+        """
+        Cria um resumo (reescrito/otimizado) a partir de um texto fornecido pelo usuário e o define
+        como contexto ativo da sessão.
+        Uso: /criar_resumo [nome_do_resumo_opcional] <texto_para_reescrever>
+        Se nenhum texto ou nome for fornecido, o chatbot solicitará.
+        """
+        session = conversation.session
+
+        # --- 1. Obtenção do Nome do Resumo e do Texto de Entrada ---
+        summary_name = None
+        input_text_start_index = 0
+
+        if args:
+            # Heurística: Se o primeiro argumento é uma única palavra ou uma frase curta
+            # sem quebras de linha e menor que um certo limite, considera-o como nome.
+            # Adicionado len(args) > 1 para distinguir entre nome e texto.
+            if len(args[0]) < 50 and ' ' not in args[0] and '\n' not in args[0] and len(args) > 1:
+                summary_name = args[0].strip()
+                input_text_start_index = 1
+            elif len(args) == 1 and not any(char in args[0] for char in [' ', '\n', '.']) and len(args[0]) < 50:
+                # Caso especial: apenas um argumento, curto e sem espaços, pode ser o nome
+                # e o texto virá interativamente.
+                summary_name = args[0].strip()
+                input_text_start_index = 1 # Ainda assim, o texto de entrada virá interativamente
+            else:
+                # Se o primeiro argumento parece ser o início de um texto longo ou tem espaços,
+                # assume-se que o nome será solicitado interativamente (ou será padrão).
+                input_text_start_index = 0
+
+        input_text = " ".join(args[input_text_start_index:]).strip()
+
+        # Se o nome do resumo não foi fornecido como argumento, solicita ao usuário
+        if not summary_name:
+            summary_name_input = input(colorize_text("\nPor favor, digite um nome para este resumo manual (ex: 'Notas de Aula', 'Trecho Importante'). Pressione Enter para nome padrão 'Texto Otimizado - <timestamp>': ", 33, bold=True))
+            if summary_name_input.strip():
+                summary_name = summary_name_input.strip()
+            else:
+                summary_name = f"Texto Otimizado - {datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+        # Se o texto não foi fornecido como argumento, solicita ao usuário
+        if not input_text:
+            print("Nenhum texto fornecido para otimizar. Por favor, digite o texto agora (pressione Enter em uma linha vazia para finalizar, ou Ctrl+D/Cmd+D em uma nova linha para finalizar):")
+            lines = []
+            while True:
+                try:
+                    line = input()
+                    if not line: # Permite uma linha vazia para finalizar entrada, se o usuário pressionar Enter novamente
+                        break
+                    lines.append(line)
+                except EOFError: # Captura Ctrl+D/Cmd+D
+                    break
+            input_text = "\n".join(lines).strip()
+
+        if not input_text:
+            print("Nenhum texto válido fornecido para otimização. Operação cancelada.")
+            return
+
+        print("Texto recebido. Otimizando via OpenAI API (isso pode levar um tempo)...")
+
+        # --- 2. Preparar Mensagens para a API (Reescrita de Texto Ligeira) ---
+        summary_prompt_messages = [
+            {"role": "system", "content": "Você é um assistente que reescreve textos de forma ligeira, mantendo a fidelidade ao original e apenas condensando levemente se necessário para clareza. Seu objetivo é preservar o máximo de detalhes possível. Responda apenas com o texto reescrito."},
+            {"role": "user", "content": f"Reescreva o seguinte texto, mantendo-o o mais fiel possível ao original. Texto:\n\n{input_text}"}
+        ]
+
+        # --- 3. Lógica de Truncamento de Tokens ---
+        prompt_tokens = token_utils.count_tokens_in_messages(summary_prompt_messages)
+
+        max_prompt_tokens_allowed = MAX_TOKENS_LIMIT - SUMMARY_MAX_TOKENS - 200
+
+        if prompt_tokens > max_prompt_tokens_allowed:
+            print(f"Aviso: O texto é muito longo ({prompt_tokens} tokens) para ser processado no modelo atual.")
+            print(f"Truncando o texto para caber no limite de {max_prompt_tokens_allowed} tokens...")
+
+            encoded_text = token_utils.get_encoder().encode(input_text)
+
+            if len(encoded_text) > max_prompt_tokens_allowed:
+                truncated_encoded_text = encoded_text[:max_prompt_tokens_allowed]
+                input_text = token_utils.get_encoder().decode(truncated_encoded_text)
+            else:
+                print("Erro inesperado durante o truncamento: texto não reduzido o suficiente.")
+                return
+
+            # Atualiza a mensagem do usuário com o texto truncado para a reescrita
+            summary_prompt_messages[1]["content"] = f"Reescreva o seguinte texto, mantendo-o o mais fiel possível ao original. Texto:\n\n{input_text}"
+
+            # Recalcula prompt_tokens com o texto truncado
+            prompt_tokens = token_utils.count_tokens_in_messages(summary_prompt_messages)
+            print(f"Texto truncado. Novo tamanho do prompt: {prompt_tokens} tokens.")
+
+        # Verificação final após truncamento
+        if prompt_tokens > MAX_TOKENS_LIMIT - 100: # Uma margem final de segurança
+            print("Erro: O prompt ainda é muito grande mesmo após truncamento. Não é possível otimizar o texto.")
+            return
+
+        # --- 4. Chamada à API e Salvamento do Resumo ---
+        # Se um resumo idêntico (mesmo texto, prompt, modelo e temperatura) já existe, reutiliza-o
+        request_hash = api_service.compute_request_hash(summary_prompt_messages, DEFAULT_MODEL, TEMPERATURE, SUMMARY_MAX_TOKENS)
+        if self.activate_cached_summary(session, request_hash):
+            return
+
+        summary_response = api_service.get_openai_completion(
+            messages=summary_prompt_messages,
+            model=DEFAULT_MODEL,
+            temperature=TEMPERATURE,
+            max_tokens=SUMMARY_MAX_TOKENS,
+            use_cache=True
+        )
+
+        if summary_response:
+            session.active_api_summary_content = summary_response
+            session.active_api_summary_metadata = {
+                "original_filename": summary_name, # Usa o nome fornecido pelo usuário ou gerado
+                "timestamp": datetime.datetime.now().isoformat(),
+                "summary_id": str(uuid.uuid4())
+            }
+            # Salva o resumo (texto otimizado) no sistema de arquivos
+            actual_summary_id = session_manager.save_pdf_summary(session.active_api_summary_content, session.active_api_summary_metadata, request_hash)
+            session.active_api_summary_metadata["summary_id"] = actual_summary_id # Atualiza com o ID real
+
+            print_separator()
+            print(f"\nTexto otimizado '{colorize_text(summary_name, 32, bold=True)}' gerado e definido como contexto ativo para a sessão '{session.name}'.")
+            print(f"ID do Texto Otimizado: {colorize_text(actual_summary_id, 35, bold=True)}. Use {colorize_text('/listar_resumos', 36)} para vê-lo e {colorize_text(f'/carregar_resumo {actual_summary_id}', 36)} para carregá-lo.")
+
+            session.chat_history.append({"role": "system", "content": f"Texto otimizado manual '{summary_name}' carregado e pronto para consultas."})
+            session.save() # Salva a sessão para persistir o resumo ativo
+        else:
+            print("Não foi possível otimizar o texto fornecido.")
+            session.active_api_summary_content = None
+            session.active_api_summary_metadata = None
+
+    def handle_read_pdf(self, conversation: Conversation, file_name: str):
+        """Processa o comando /lerpdf."""
+        session = conversation.session
+        pdf_path = os.path.join(PDFS_DIR, file_name)
+        # Apenas arquivos dentro de PDFS_DIR (sem caminhos absolutos ou '..' que saiam do diretório)
+        pdfs_dir = os.path.realpath(PDFS_DIR)
+        if os.path.commonpath([pdfs_dir, os.path.realpath(pdf_path)]) != pdfs_dir:
+            print(f"Erro: Informe o nome de um PDF dentro de '{PDFS_DIR}'.")
+            return
+        print(f"Lendo PDF de '{pdf_path}'...")
+
+        if not os.path.exists(pdf_path):
+            print(f"Erro: O arquivo PDF não foi encontrado em '{pdf_path}'")
+            return
+        document_key = extraction_cache.compute_pdf_key(pdf_path)
+
+        # Lê sempre em modo estrito: se a extração falhar no meio do documento, nada é indexado nem resumido
+        # (um índice ou resumo de parte do texto ficaria gravado como se fosse o documento inteiro).
+        def iter_pages(quiet=False):
+            return extraction_cache.iter_cached_pages(pdf_path, document_key, quiet=quiet, strict=True)
+
+        # Consome as páginas conforme são lidas do cache de extração e as agrupa
+        # em trechos limitados por tokens. Todo o documento é considerado: documentos longos são
+        # resumidos por map-reduce em vez de truncados. Os trechos nunca são guardados todos em memória:
+        # uma primeira passada calcula o hash e o total de tokens, e o resumo (se necessário) relê o cache.
+        def iter_chunks():
+            return token_utils.iter_token_chunks(iter_pages(quiet=True), SUMMARY_CHUNK_TOKENS)
+
+        try:
+            # Indexa os trechos do documento para a busca (BM25) usada nas perguntas do chat.
+            # Na primeira leitura, as páginas extraídas também alimentam o cache de extração.
+            if not retrieval_index.index_exists(document_key):
+                num_indexed_chunks = retrieval_index.build_index(document_key, iter_pages())
+                if num_indexed_chunks:
+                    print(f"Índice de busca do documento criado com {num_indexed_chunks} trechos.")
+
+            # Calcula os embeddings dos trechos indexados (busca vetorial), se ainda não existirem
+            if not embedding_store.embeddings_exist(document_key):
+                num_embedded_chunks = embedding_store.build_embeddings(document_key)
+                if num_embedded_chunks:
+                    print(f"Embeddings calculados para {num_embedded_chunks} trechos.")
+
+            request_hash, num_chunks, total_tokens = summarizer.scan_document(iter_chunks())
+        except extraction_cache.ExtractionError as e:
+            print(f"Erro: Não foi possível extrair todo o texto do PDF ({e}). O documento não foi indexado nem resumido.")
+            return
+
+        if not num_chunks:
+            print("Erro: Não foi possível extrair texto do PDF ou o arquivo está vazio.")
+            return
+
+        print(f"Texto extraído ({total_tokens} tokens). Gerando resumo do PDF via OpenAI API (isso pode levar um tempo)...")
+
+        # Se um resumo idêntico (mesmo texto, prompt, modelo e temperatura) já existe, reutiliza-o
+        if self.activate_cached_summary(session, request_hash):
+            session.active_api_summary_metadata["document_key"] = document_key # Habilita a busca de trechos
+            session.save()
+            return
+
+        try:
+            summary_response = summarizer.summarize_chunks(iter_chunks(), num_chunks=num_chunks)
+        except extraction_cache.ExtractionError as e: # O cache foi descartado e a nova extração falhou
+            print(f"Erro: {e}")
+            summary_response = None
+
+        if summary_response:
+            session.active_api_summary_content = summary_response
+            session.active_api_summary_metadata = {
+                "original_filename": file_name,
+                "timestamp": datetime.datetime.now().isoformat(),
+                "summary_id": str(uuid.uuid4()), # Gera um ID temporário que será atualizado após salvar
+                "document_key": document_key # Identifica o índice de busca do documento
+            }
+            # Salva o resumo no sistema de arquivos
+            actual_summary_id = session_manager.save_pdf_summary(session.active_api_summary_content, session.active_api_summary_metadata, request_hash)
+            session.active_api_summary_metadata["summary_id"] = actual_summary_id # Atualiza com o ID real
+
+            print(f"\nResumo gerado e definido como contexto ativo para a sessão '{session.name}'.")
+            print("Você pode fazer perguntas sobre o PDF agora.")
+            # Opcional: Adicionar uma mensagem ao histórico indicando que um resumo foi carregado
+            session.chat_history.append({"role": "system", "content": f"Resumo do PDF '{file_name}' carregado e pronto para consultas."})
+        else:
+            print("Não foi possível gerar o resumo do PDF.")
+            session.active_api_summary_content = None
+            session.active_api_summary_metadata = None
+
+    def handle_new_session(self, conversation: Conversation, args: list):
+        """Processa o comando /nova_sessao."""
+        if len(args) < 1:
+            print("Uso: /nova_sessao <nome_da_sessao>")
+            return
+
+        new_session_name = args[0]
+        if not self._valid_name(session_manager.validate_session_name, new_session_name):
+            return
+        conversation.session.save() # Salva a sessão atual antes de mudar
+        # Cria uma nova sessão com estado inicial (se ela já estiver aberta, é reiniciada para todos)
+        with self._sessions_lock:
+            session = self._sessions.get((conversation.profile, new_session_name))
+        # Não espera pelo lock: aguardar a sessão de outro terminal segurando o desta conversa pode travar os dois
+        locked = session is not None and session is not conversation.session
+        if locked and not session.lock.acquire(blocking=False):
+            print(f"A sessão '{new_session_name}' está processando um comando em outro terminal. Tente novamente em instantes.")
+            return
+        try:
+            session_manager.save_session(new_session_name, [{"role": "system", "content": SYSTEM_MESSAGE}], None, None)
+            if session is not None:
+                session.reset()
+        finally:
+            if locked:
+                session.lock.release()
+        self.switch_session(conversation, new_session_name)
+        print(f"Sessão '{new_session_name}' criada e ativada.")
+
+    def handle_load_session(self, conversation: Conversation, args: list):
+        """Processa o comando /carregar_sessao."""
+        if len(args) < 1:
+            print("Uso: /carregar_sessao <nome_da_sessao>")
+            return
+
+        session_to_load = args[0]
+        if not self._valid_name(session_manager.validate_session_name, session_to_load):
+            return
+        if session_manager.session_exists(session_to_load):
+            conversation.session.save() # Salva a sessão atual antes de carregar outra
+            self.switch_session(conversation, session_to_load)
+        else:
+            print(f"Sessão '{session_to_load}' não encontrada.")
+
+    def handle_list_sessions(self, conversation: Conversation):
+        """Processa o comando /listar_sessoes."""
+        sessions = session_manager.list_sessions()
+        if sessions:
+            print("\nSessões salvas:")
+            for session in sessions:
+                status = "(Atual)" if session == conversation.session.name else ""
+                print(f"- {session} {status}")
+        else:
+            print("Nenhuma sessão salva.")
+
+    def handle_delete_session(self, conversation: Conversation, args: list):
+        """Processa o comando /excluir_sessao."""
+        if len(args) < 1:
+            print("Uso: /excluir_sessao <nome_da_sessao>")
+            return
+
+        session_to_delete = args[0]
+        if not self._valid_name(session_manager.validate_session_name, session_to_delete):
+            return
+        if session_to_delete == conversation.session.name:
+            print("Não é possível excluir a sessão ativa. Mude para outra sessão ou crie uma nova primeiro.")
+            return
+        if self.is_session_in_use(session_to_delete, conversation.profile):
+            print(f"Não é possível excluir a sessão '{session_to_delete}': ela está ativa em outro terminal.")
+            return
+
+        if session_manager.session_exists(session_to_delete):
+            session_manager.delete_session(session_to_delete)
+            with self._sessions_lock:
+                self._sessions.pop((conversation.profile, session_to_delete), None)
+            print(f"Sessão '{session_to_delete}' excluída com sucesso.")
+        else:
+            print(f"Sessão '{session_to_delete}' não encontrada.")
+
+    def handle_delete_summary(self, conversation: Conversation, args: list):
+        """Processa o comando /excluir_resumo."""
+        session = conversation.session
+
+        if len(args) < 1:
+            print("Uso: /excluir_resumo <ID_do_resumo_ou_numero>")
+            return
+
+        target_summary_id = None
+        target_summary_filename = "Resumo Desconhecido" # Para mensagens de feedback
+
+        try:
+            # Tenta excluir por número na lista (ex: /excluir_resumo 1)
+            target_summary_data = session_manager.get_summary_info_by_position(int(args[0]))
+            if target_summary_data:
+                target_summary_id = target_summary_data['id']
+                target_summary_filename = target_summary_data['filename']
+            else:
+                print(f"Número '{args[0]}' fora do intervalo. Use /listar_resumos para ver os números válidos.")
+                return
+        except ValueError:
+            # Tenta excluir por ID direto (ex: /excluir_resumo 7ae7cf17-d96d-4640-872e-22ec38bbaf4c)
+            input_id = args[0]
+            target_summary_data = session_manager.get_summary_info(input_id)
+            if not target_summary_data:
+                print(f"ID de resumo '{input_id}' não encontrado.")
+                return
+            target_summary_id = target_summary_data['id']
+            target_summary_filename = target_summary_data['filename']
+
+        if target_summary_id:
+            # Se o resumo a ser excluído é o resumo ativo, descarrega-o primeiro
+            if session.active_api_summary_metadata and session.active_api_summary_metadata.get('summary_id') == target_summary_id:
+                session.active_api_summary_content = None
+                session.active_api_summary_metadata = None
+                print(f"O resumo ativo ('{target_summary_filename}') foi descarregado antes da exclusão.")
+
+            if session_manager.delete_pdf_summary(target_summary_id):
+                print(f"Resumo '{target_summary_filename}' (ID: {target_summary_id}) excluído com sucesso.")
+                session.save() # Salva o estado da sessão após a exclusão para refletir a remoção
+            else:
+                print(f"Não foi possível excluir o resumo com ID '{target_summary_id}'.")
+
+    def handle_export_chat(self, conversation: Conversation, args: list):
+        """
+        Exporta o histórico do chat atual para um arquivo PDF.
+        Uso: /exportar_chat <nome_do_export> [--incremental]
+        Com --incremental, exporta apenas as mensagens novas desde o último export com o mesmo nome.
+        """
+        incremental = "--incremental" in args
+        args = [arg for arg in args if arg != "--incremental"]
+        if not args:
+            print(f"Uso: {COMMANDS['export_chat']} <nome_do_export> [--incremental]. Por favor, forneça um nome para o arquivo PDF.")
+            return
+
+        export_name = args[0] # O nome do export é o primeiro argumento
+        if not export_name:
+            print("O nome do export não pode estar vazio. Por favor, forneça um nome válido.")
+            return
+
+        self.start_export(conversation, export_name, incremental)
+
+    def start_export(self, conversation: Conversation, export_name: str, incremental: bool = False):
+        """
+        Exporta a sessão da conversa para PDF. Com EXPORT_IN_BACKGROUND, agenda um job no processo de
+        exportação e retorna imediatamente; caso contrário, exporta na hora.
+        """
+        session = conversation.session
+        if not EXPORT_IN_BACKGROUND:
+            print(f"Exportando chat da sessão '{session.name}' para PDF '{export_name}.pdf'...")
+            # A função export_chat_to_pdf espera o histórico completo da sessão
+            # E o nome da sessão para organizar os arquivos
+            result = pdf_exporter.export_chat_to_pdf(session.chat_history, session.name, export_name, incremental=incremental)
+            print(result)
+            return
+        session.save() # O processo de exportação lê a sessão do armazenamento
+        job_id = export_jobs.submit_export(session.name, export_name, incremental=incremental)
+        print(f"Exportação #{job_id} da sessão '{session.name}' para '{export_name}.pdf' agendada. "
+              f"Acompanhe com {COMMANDS['export_jobs']} {job_id}.")
+
+    def handle_export_jobs(self, conversation: Conversation, args: list):
+        """
+        Lista os jobs de exportação desta execução (do perfil da conversa) ou mostra o andamento de um deles.
+        Uso: /exportacoes [id_do_job]
+        """
+        if args:
+            try:
+                job = export_jobs.get_job(int(args[0].lstrip("#")))
+            except ValueError:
+                print(f"Uso: {COMMANDS['export_jobs']} [id_do_job]. O ID deve ser um número.")
+                return
+            if job and job["profile"] != conversation.profile:
+                job = None
+            print(format_export_job(job) if job else f"Exportação #{args[0]} não encontrada.")
+            return
+        jobs = [job for job in export_jobs.list_jobs() if job["profile"] == conversation.profile]
+        if not jobs:
+            print("Nenhuma exportação foi agendada nesta execução.")
+            return
+        print("Exportações:")
+        for job in jobs:
+            print(f"- {format_export_job(job)}")
+
+    def handle_list_exports(self, conversation: Conversation, args: list): # 'args' para possível filtro futuro
+        """
+        Lista os PDFs de chat exportados para a sessão atual.
+        Uso: /listar_exports
+        """
+        session_to_list = conversation.session.name # Por padrão, lista da sessão atual
+        if args:
+            # Se um argumento for fornecido, tente listar para essa sessão
+            session_to_list = args[0]
+            if not self._valid_name(session_manager.validate_session_name, session_to_list):
+                return
+            print(f"Listando exports para a sessão: '{session_to_list}'...")
+        else:
+            print(f"Listando exports para a sessão atual: '{session_to_list}'...")
+
+        exports = pdf_exporter.list_exported_pdfs(session_to_list)
+
+        if exports:
+            print(f"\nExports disponíveis para a sessão '{session_to_list}':")
+            for i, exp in enumerate(exports):
+                # O exp retornado é apenas o nome do arquivo, ex: "MeuEstudo.pdf"
+                print(f"  {i+1}. {exp}")
+        else:
+            print(f"Não há exports de chat para a sessão '{session_to_list}'.")
+            exports_dir = profiles.get_profile_paths()["exports"]
+            if args and not os.path.exists(os.path.join(exports_dir, session_to_list)):
+                print(f"O diretório para a sessão '{session_to_list}' não existe em {exports_dir}.")
+
+    def handle_load_export(self, conversation: Conversation, args: list):
+        """
+        'Carrega' (indica o caminho de) um PDF de chat exportado.
+        Uso: /carregar_export <nome_do_export>
+        """
+        if not args:
+            print(f"Uso: {COMMANDS['load_export']} <nome_do_export>. Por favor, forneça o nome do arquivo PDF.")
+            return
+
+        session_name = conversation.session.name
+        export_name = args[0]
+        # Adiciona a extensão .pdf se não estiver presente para a busca
+        if not export_name.lower().endswith(".pdf"):
+            export_name += ".pdf"
+        if not self._valid_name(pdf_exporter.validate_export_filename, export_name):
+            return
+
+        # Tenta obter o caminho completo e verifica se existe
+        full_path = pdf_exporter.get_exported_pdf_path(session_name, export_name)
+
+        if full_path and os.path.exists(full_path):
+            print(f"PDF de exportação '{export_name}' encontrado em: {full_path}")
+            print("Você pode acessar este arquivo diretamente para visualização ou compartilhamento.")
+        else:
+            print(f"PDF de exportação '{export_name}' não encontrado para a sessão '{session_name}'.")
+            print("Verifique se o nome está correto e se ele foi exportado para esta sessão.")
+            self.handle_list_exports(conversation, []) # Sugere listar os exports existentes
+
+    def handle_delete_export(self, conversation: Conversation, args: list):
+        """
+        Exclui um PDF de chat exportado.
+        Uso: /excluir_export <nome_do_export>
+        """
+        if not args:
+            print(f"Uso: {COMMANDS['delete_export']} <nome_do_export>. Por favor, forneça o nome do arquivo PDF a ser excluído.")
+            return
+
+        session_name = conversation.session.name
+        export_name = args[0]
+        # Adiciona a extensão .pdf se não estiver presente para a busca e exclusão
+        if not export_name.lower().endswith(".pdf"):
+            export_name += ".pdf"
+        if not self._valid_name(pdf_exporter.validate_export_filename, export_name):
+            return
+
+        print(f"Tentando excluir o export '{export_name}' da sessão '{session_name}'...")
+        success = pdf_exporter.delete_exported_pdf(session_name, export_name)
+
+        if success:
+            print(f"Export '{export_name}' excluído com sucesso da sessão '{session_name}'.")
+        else:
+            print(f"Falha ao excluir o export '{export_name}'. O arquivo pode não existir ou houve um erro.")
+            self.handle_list_exports(conversation, []) # Sugere listar os exports existentes para ajudar
+
+    def handle_list_summaries(self, conversation: Conversation):
+        """Processa o comando /listar_resumos."""
+        print("Resumos de PDF salvos:")
+        summaries = session_manager.list_summaries()
+        if summaries:
+            for i, summary in enumerate(summaries, 1):
+                print(f"{i}. ID: {summary['id']} | Arquivo Original: {summary['filename']} | Data: {summary['timestamp']}")
+        else:
+            print("Nenhum resumo de PDF encontrado.")
+
+    def handle_load_summary(self, conversation: Conversation, args: list):
+        """Processa o comando /carregar_resumo."""
+        session = conversation.session
+        if len(args) < 1:
+            print("Uso: /carregar_resumo <ID_do_resumo_ou_numero>")
+            return
+
+        summary_to_load_id = None
+        summary_filename_for_display = "PDF Desconhecido" # Usado para mensagens de feedback
+
+        try:
+            # Tenta carregar o resumo pelo número na lista exibida (consulta apenas o catálogo)
+            summary_data_from_list = session_manager.get_summary_info_by_position(int(args[0]))
+            if summary_data_from_list:
+                summary_to_load_id = summary_data_from_list['id']
+                summary_filename_for_display = summary_data_from_list.get('filename', summary_filename_for_display)
+            else:
+                print(f"Número '{args[0]}' fora do intervalo. Use /listar_resumos para ver os números válidos.")
+                return
+        except ValueError:
+            # Se o argumento não for um número, tenta carregar o resumo por ID (string)
+            input_id_string = args[0]
+            s_data = session_manager.get_summary_info(input_id_string)
+            if not s_data:
+                print(f"ID de resumo '{input_id_string}' não encontrado.")
+                return
+            summary_to_load_id = s_data['id']
+            summary_filename_for_display = s_data.get('filename', summary_filename_for_display)
+
+        if summary_to_load_id:
+            # Se um ID válido (seja por número ou string) foi encontrado, tenta carregar o resumo
+            summary_data = session_manager.load_specific_pdf_summary(summary_to_load_id)
+            if summary_data:
+                session.active_api_summary_content = summary_data.get("content")
+                session.active_api_summary_metadata = summary_data.get("metadata")
+
+                # Usa o nome do arquivo dos metadados para exibição, se disponível
+                display_filename = session.active_api_summary_metadata.get('original_filename', summary_filename_for_display)
+
+                print(f"\nResumo '{display_filename}' (ID: {summary_to_load_id}) carregado como contexto ativo.")
+                # Adiciona mensagem ao histórico do chat sobre o resumo carregado
+                session.chat_history.append({"role": "system", "content": f"Resumo '{display_filename}' carregado e pronto para consultas."})
+                session.save() # Salva o estado da sessão com o novo resumo ativo
+            else:
+                print(f"Não foi possível carregar o resumo com ID '{summary_to_load_id}'.")
+
+    def handle_clear_context(self, conversation: Conversation):
+        """Processa o comando /limpar."""
+        # Reseta o histórico, mantendo a mensagem do sistema (o resumo ativo é mantido)
+        conversation.session.chat_history = [{"role": "system", "content": SYSTEM_MESSAGE}]
+        print("Histórico de chat limpo para a sessão atual. O resumo de PDF ativo foi mantido.")
+
+    def handle_retrieval_stats(self, conversation: Conversation):
+        """Processa o comando /estatisticas_busca: exibe o cache e os percentis de latência da busca."""
+        cache_stats = hybrid_retriever.get_cache_stats()
+        print(f"\nCache de consultas: {cache_stats['hits']} acertos, {cache_stats['misses']} falhas, {cache_stats['entries']} consultas em cache.")
+        percentiles = hybrid_retriever.get_latency_percentiles()
+        if not percentiles:
+            print("Nenhuma busca realizada ainda nesta execução.")
+            return
+        print("Latência por etapa da busca (ms):")
+        for stage, stats in percentiles.items():
+            print(f"- {stage:<8} n={stats['count']:<4} p50={stats['p50']:.2f} | p90={stats['p90']:.2f} | p99={stats['p99']:.2f}")
+
+    def handle_help(self, conversation: Conversation):
+        """Exibe a lista de comandos disponíveis."""
+        print("\nComandos disponíveis:")
+        for cmd_name, cmd_value in COMMANDS.items():
+            print(f"- {cmd_value}: {cmd_name.replace('_', ' ').capitalize()}")
+        print("- /sair: Salva a sessão atual e encerra o chatbot.")
+        print("\nPara fazer perguntas normais, basta digitar sua mensagem.")
+        if conversation.session.active_api_summary_content:
+            print("Lembre-se: Há um resumo de PDF ativo. Suas perguntas serão respondidas com base nele.")
+
+    def handle_exit(self, conversation: Conversation):
+        """Processa o comando /sair: oferece a exportação do chat e salva a sessão."""
+        # Inicia um loop para garantir uma resposta válida (s/n)
+        export_decision_made = False
+        while not export_decision_made:
+            user_choice = input("\nDeseja exportar o chat atual para PDF antes de sair? (s/n): ").lower().strip()
+
+            if user_choice == 's':
+                export_name = input("Por favor, digite um nome para o arquivo PDF (ex: MinhaConversaImportante): ").strip()
+                if export_name:
+                    self.start_export(conversation, export_name)
+                else:
+                    print_separator()
+                    print("Nome de exportação vazio. O chat não será exportado.")
+                    print_separator()
+                export_decision_made = True # Sai do loop de decisão
+            elif user_choice == 'n':
+                print_separator()
+                print("Chat não exportado.")
+                export_decision_made = True # Sai do loop de decisão
+            else:
+                # Se a opção for inválida, exibe a mensagem e o loop continua
+                print_separator()
+                print("Opção inválida. Por favor, digite 's' para sim ou 'n' para não.")
+                print_separator()
+
+        # Este bloco só é executado após uma decisão válida (s ou n) ser tomada
+        print_separator()
+        conversation.session.save()
+        session_manager.flush_pending_saves() # Conclui as gravações em segundo plano antes de sair
+
+    # --- Perguntas ---
+
+    def stream_bot_response(self, session: SessionState, messages_for_api: list) -> str:
+        """
+        Exibe a resposta do bot conforme os tokens chegam (streaming).
+
+        Args:
+            session (SessionState): A sessão da pergunta (o nome aparece no prefixo da resposta).
+            messages_for_api (list): As mensagens a serem enviadas à API.
+
+        Returns:
+            str: A resposta completa montada a partir dos trechos recebidos,
+                 ou uma string vazia se a requisição falhar.
+        """
+        stats = {}
+        response_parts = []
+        print(f"[{session.name}] {colorize_text('BOT', 36, bold=True)}: ", end="", flush=True)
+        for delta in api_service.stream_openai_completion(messages_for_api, DEFAULT_MODEL, TEMPERATURE, stats=stats):
+            response_parts.append(delta)
+            print(colorize_text(delta, 36, bold=False), end="", flush=True)
+        print()
+
+        if stats.get("error"):
+            return ""
+
+        if SHOW_RESPONSE_TIMING and stats.get("time_to_first_token") is not None:
+            print(colorize_text(
+                f"(primeiro token em {stats['time_to_first_token']:.2f}s | resposta completa em {stats['total_time']:.2f}s)", 90
+            ))
+        return "".join(response_parts)
+
+    def build_messages(self, session: SessionState, user_message: dict) -> tuple:
+        """
+        Monta as mensagens de uma pergunta: o resumo ativo, a mensagem do sistema, o histórico que
+        couber no orçamento de tokens, os trechos relevantes do documento e a pergunta.
+
+        Returns:
+            tuple: (mensagens_para_a_api, total_de_tokens).
+        """
+        # Mensagens fixas: o resumo ativo (se houver) e a mensagem do sistema, que está em chat_history[0]
+        leading_messages = []
+
+        # Incluir mensagem de instrução de resumo se houver um resumo ativo
+        if session.active_api_summary_content:
+            summary_context_message = {
+                "role": "user",
+                "content": f"{SUMMARY_INSTRUCTION_MESSAGE}\n\nResumo do Documento:\n{session.active_api_summary_content}"
+            }
+            leading_messages.append(summary_context_message)
+        leading_messages.append(session.chat_history[0]) # Mensagem do sistema
+
+        # Recuperar, pela busca híbrida (BM25 + embeddings), os trechos do documento mais relevantes para a pergunta.
+        # Eles vão em uma mensagem separada, logo antes da pergunta, para que a mensagem do
+        # resumo permaneça igual entre os turnos.
+        trailing_messages = []
+        document_key = (session.active_api_summary_metadata or {}).get("document_key")
+        if session.active_api_summary_content and document_key:
+            retrieved_chunks = hybrid_retriever.retrieve_context(document_key, user_message["content"])
+            if retrieved_chunks:
+                trailing_messages.append({
+                    "role": "user",
+                    "content": f"Trechos do documento relevantes para a próxima pergunta:\n\n{retrieval_index.format_context(retrieved_chunks)}"
+                })
+        trailing_messages.append(user_message)
+
+        # Adicionar o histórico mais recente que couber no orçamento de tokens, seguido da pergunta atual
+        messages_for_api, api_prompt_tokens, _ = token_utils.pack_messages(
+            leading_messages, session.chat_history, trailing_messages, min(CHAT_CONTEXT_TOKEN_BUDGET, MAX_TOKENS_LIMIT),
+            history_start=1 # A mensagem do sistema (chat_history[0]) já está em leading_messages
+        )
+        return messages_for_api, api_prompt_tokens
+
+    def answer_question(self, conversation: Conversation, user_input: str):
+        """Envia uma pergunta ao chatbot, exibe a resposta e a adiciona ao histórico da sessão."""
+        session = conversation.session
+        user_message = {"role": "user", "content": user_input}
+        messages_for_api, api_prompt_tokens = self.build_messages(session, user_message)
+
+        # Se o prompt for muito longo, alertar e não enviar
+        if api_prompt_tokens > MAX_TOKENS_LIMIT:
+            print(f"Aviso: Sua pergunta e o resumo ativo excedem o limite de tokens do modelo ({api_prompt_tokens} tokens). Por favor, faça uma pergunta mais curta ou carregue um resumo menor.")
+            return
+        print_separator()
+        if STREAM_RESPONSES:
+            bot_response = self.stream_bot_response(session, messages_for_api)
+        else:
+            print("Gerando resposta (isso pode levar um tempo)...")
+            bot_response = api_service.get_openai_completion(
+                messages=messages_for_api,
+                model=DEFAULT_MODEL,
+                temperature=TEMPERATURE
+            )
+            if bot_response:
+                print_separator()
+                print(f"[{session.name}] {colorize_text('BOT', 36, bold=True)}: {colorize_text(bot_response, 36, bold=False)}")
+
+        if bot_response:
+            session.chat_history.append(user_message) # Adiciona a pergunta do usuário
+            session.chat_history.append({"role": "assistant", "content": bot_response}) # Adiciona a resposta do bot
+            session.save() # Salva a sessão após cada interação
+        else:
+            print_separator()
+            print("Não foi possível obter uma resposta do chatbot.")
+
+    # --- Entrada ---
+
+    def process_input(self, conversation: Conversation, user_input: str) -> bool:
+        """
+        Processa uma linha digitada pelo usuário: executa o comando ou envia a pergunta ao chatbot.
+        A linha é processada com o lock da sessão da conversa, no perfil da conversa.
+
+        Returns:
+            bool: False se o usuário pediu para sair (/sair), True caso contrário.
+        """
+        if not user_input.strip(): # Não processa entrada vazia
+            return True
+
+        with profiles.use_profile(conversation.profile), conversation.session.lock:
+            if not user_input.startswith('/'):
+                # Se não for um comando, é uma pergunta ao chatbot
+                self.answer_question(conversation, user_input)
+                return True
+
+            parts = user_input.split(maxsplit=1)
+            command = parts[0].lower()
+            args = parts[1].split() if len(parts) > 1 else []
+
+            if command == COMMANDS["exit"]:
+                self.handle_exit(conversation)
+                return False
+            if command == COMMANDS["read_pdf"]:
+                if args:
+                    self.handle_read_pdf(conversation, args[0])
+                else:
+                    print("Uso: /lerpdf <nome_do_arquivo.pdf>")
+                return True
+
+            handlers = {
+                COMMANDS["new_session"]: lambda: self.handle_new_session(conversation, args),
+                COMMANDS["load_session"]: lambda: self.handle_load_session(conversation, args),
+                COMMANDS["list_sessions"]: lambda: self.handle_list_sessions(conversation),
+                COMMANDS["delete_session"]: lambda: self.handle_delete_session(conversation, args),
+                COMMANDS["create_manual_summary"]: lambda: self.handle_create_manual_summary(conversation, args),
+                COMMANDS["list_summaries"]: lambda: self.handle_list_summaries(conversation),
+                COMMANDS["load_summary"]: lambda: self.handle_load_summary(conversation, args),
+                COMMANDS["delete_summary"]: lambda: self.handle_delete_summary(conversation, args),
+                COMMANDS["clear_context"]: lambda: self.handle_clear_context(conversation),
+                COMMANDS["help"]: lambda: self.handle_help(conversation),
+                COMMANDS["export_chat"]: lambda: self.handle_export_chat(conversation, args),
+                COMMANDS["list_exports"]: lambda: self.handle_list_exports(conversation, args),
+                COMMANDS["delete_export"]: lambda: self.handle_delete_export(conversation, args),
+                COMMANDS["export_jobs"]: lambda: self.handle_export_jobs(conversation, args),
+                COMMANDS["retrieval_stats"]: lambda: self.handle_retrieval_stats(conversation),
+            }
+            handler = handlers.get(command)
+            if handler:
+                handler()
+            else:
+                print(f"Comando '{command}' não reconhecido. Digite /ajuda para ver os comandos.")
+            return True
+
+if __name__ == "__main__":
+    print("Testando chat_engine.py...")
+    import io
+    engine = ChatEngine()
+    conversation = engine.open_conversation("sessao_teste_chat_engine")
+    output = io.StringIO()
+    with routed_console(io.StringIO("n\n"), output):
+        install_console_routing()
+        engine.process_input(conversation, "/listar_sessoes")
+        engine.process_input(conversation, "/ajuda")
+        keep_going = engine.process_input(conversation, "/sair")
+    print(output.getvalue())
+    print(f"Continuar após /sair: {keep_going}")
+    engine.close_conversation(conversation)
+    session_manager.delete_session("sessao_teste_chat_engine")
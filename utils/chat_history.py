@@ -0,0 +1,157 @@
+# chat_history.py
+
+import os
+import sys
+from typing import Callable, Iterator, List
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o módulo é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from config.config import SESSION_HISTORY_PAGE_SIZE
+
+class ChatHistory:
+    """
+    Histórico de chat carregado sob demanda.
+
+    Apenas a primeira mensagem (a mensagem do sistema) e as mensagens mais recentes ficam em memória
+    ao carregar a sessão. As mensagens mais antigas são lidas do armazenamento, em páginas, somente
+    quando alguém as acessa (ex: ao exportar o chat ou quando o orçamento de tokens alcança o passado).
+
+    Comporta-se como uma lista somente de anexação: len(), índices, fatias, iteração, reversed(),
+    append(), extend() e copy(). Índices e len() sempre se referem ao histórico completo.
+    """
+
+    def __init__(self, messages: list = None):
+        """Cria um histórico com todas as mensagens já em memória."""
+        messages = list(messages or [])
+        self._first = messages[:1] # A mensagem do sistema (sempre em memória)
+        self._tail = messages[1:] # Mensagens em memória a partir de self._offset
+        self._offset = len(self._first)
+        self._loader = None
+        self._page_size = SESSION_HISTORY_PAGE_SIZE
+
+    @classmethod
+    def from_window(cls, first_message: dict, tail: list, total: int,
+                    loader: Callable[[int, int], List[dict]], page_size: int = None) -> "ChatHistory":
+        """
+        Cria um histórico em que só a primeira mensagem e as últimas estão em memória.
+
+        Args:
+            first_message (dict): A mensagem de índice 0 (ou None se o histórico estiver vazio).
+            tail (list): As últimas mensagens do histórico.
+            total (int): O número total de mensagens do histórico.
+            loader (Callable): Função loader(inicio, fim) que devolve as mensagens no intervalo [inicio, fim).
+            page_size (int, optional): Mensagens lidas por vez. Se None, usa SESSION_HISTORY_PAGE_SIZE.
+        """
+        history = cls()
+        history._first = [first_message] if first_message is not None else []
+        history._tail = list(tail)
+        history._offset = total - len(history._tail)
+        if history._offset < len(history._first):
+            # A janela já inclui o início: a mensagem de índice 0 não pode aparecer duas vezes
+            history._tail = history._tail[len(history._first) - history._offset:]
+            history._offset = len(history._first)
+        history._loader = loader
+        history._page_size = page_size or SESSION_HISTORY_PAGE_SIZE
+        return history
+
+    @property
+    def loaded_count(self) -> int:
+        """Número de mensagens atualmente em memória."""
+        return len(self._first) + len(self._tail)
+
+    def _load_until(self, index: int):
+        """Lê páginas mais antigas até que a mensagem de índice `index` esteja em memória."""
+        while index < self._offset:
+            start = max(len(self._first), min(index, self._offset - self._page_size))
+            page = self._loader(start, self._offset)
+            if len(page) != self._offset - start:
+                raise IndexError(f"O armazenamento devolveu {len(page)} mensagens para o intervalo [{start}, {self._offset}).")
+            self._tail[0:0] = page
+            self._offset = start
+
+    def __len__(self) -> int:
+        return self._offset + len(self._tail)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Índice do histórico fora do intervalo.")
+        if index < len(self._first):
+            return self._first[index]
+        if index < self._offset:
+            self._load_until(index)
+        return self._tail[index - self._offset]
+
+    def __iter__(self) -> Iterator[dict]:
+        return self.iter_from(0)
+
+    def iter_from(self, start: int) -> Iterator[dict]:
+        """
+        Itera as mensagens a partir do índice `start`. As páginas antigas são lidas e descartadas
+        durante a iteração, sem ficar em memória (útil para exportar sessões longas).
+        """
+        start = max(start, 0)
+        if start < len(self._first):
+            yield from self._first[start:]
+            start = len(self._first)
+        for page_start in range(start, self._offset, self._page_size):
+            yield from self._loader(page_start, min(page_start + self._page_size, self._offset))
+        yield from list(self._tail[max(0, start - self._offset):])
+
+    def __reversed__(self) -> Iterator[dict]:
+        for index in range(len(self) - 1, -1, -1):
+            yield self[index]
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __repr__(self) -> str:
+        return f"ChatHistory({len(self)} mensagens, {self.loaded_count} em memória)"
+
+    def append(self, message: dict):
+        if not self._first and self._offset == 0:
+            self._first.append(message)
+            self._offset = 1
+        else:
+            self._tail.append(message)
+
+    def extend(self, messages):
+        for message in messages:
+            self.append(message)
+
+    def copy(self) -> "ChatHistory":
+        """Cópia rasa: copia apenas as mensagens em memória e compartilha o leitor das páginas antigas."""
+        history = ChatHistory()
+        history._first = list(self._first)
+        history._tail = list(self._tail)
+        history._offset = self._offset
+        history._loader = self._loader
+        history._page_size = self._page_size
+        return history
+
+if __name__ == "__main__":
+    print("Testando chat_history.py...")
+    stored = [{"role": "system", "content": "Sistema"}] + [{"role": "user", "content": f"Mensagem {i}"} for i in range(1, 50)]
+    loads = []
+
+    def loader(start, end):
+        loads.append((start, end))
+        return stored[start:end]
+
+    history = ChatHistory.from_window(stored[0], stored[-5:], len(stored), loader, page_size=10)
+    print(history)
+    assert len(history) == 50 and history[0] == stored[0] and history[-1] == stored[-1]
+    assert history[40] == stored[40]
+    print("Páginas lidas para acessar a mensagem 40:", loads)
+    history.append({"role": "assistant", "content": "Nova"})
+    assert list(history) == stored + [{"role": "assistant", "content": "Nova"}]
+    assert history[1:3] == stored[1:3]
+    assert list(history.iter_from(45)) == stored[45:] + [{"role": "assistant", "content": "Nova"}]
+    print(history)
+    print("OK")
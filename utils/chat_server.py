@@ -0,0 +1,612 @@
+#chat_server.py
+
+"""
+Servidor HTTP + WebSocket do chatbot (asyncio, apenas a biblioteca padrão).
+
+Vários usuários conversam ao mesmo tempo pelo navegador ou por qualquer cliente WebSocket, com os
+mesmos comandos (COMMANDS) do `python3 main.py`. As respostas do bot chegam conforme são geradas.
+
+- O laço de eventos apenas lê e envia mensagens: cada comando ou pergunta é executado pelo
+  ChatEngine em um pool limitado de trabalhadores (SERVER_MAX_WORKERS). Um resumo demorado ocupa
+  um trabalhador, e não o servidor.
+- Cada sessão executa um comando por vez. Os comandos seguintes da mesma sessão esperam no laço de
+  eventos, sem ocupar trabalhadores que poderiam atender outras sessões.
+- Todas as rotas aceitam ?perfil=NOME (veja profiles.py): cada perfil tem as suas próprias sessões,
+  resumos e exports. Sem o parâmetro, usa o perfil escolhido na inicialização (--perfil).
+
+Rotas:
+    GET  /                    Página com um terminal simples no navegador.
+    GET  /ws?sessao=NOME      WebSocket. O cliente envia linhas de texto (como no terminal) e recebe
+                              mensagens JSON: {"type": "output", "text": ...} com a saída,
+                              {"type": "input"} quando o servidor aguarda uma linha e
+                              {"type": "closed"} quando a conversa termina (ex: após /sair).
+    POST /api/mensagem?sessao=NOME
+                              Executa uma linha (o corpo da requisição) e devolve a saída em
+                              streaming (chunked). Comandos que pedem confirmação são cancelados.
+    GET  /api/sessoes         Sessões salvas do perfil (JSON).
+    GET  /api/perfis          Perfis existentes (JSON).
+    GET  /api/status          Conexões, sessões em uso (por perfil) e comandos em andamento (JSON).
+
+Uso:
+    python3 utils/chat_server.py [--host 127.0.0.1] [--porta 8765] [--trabalhadores 4] [--perfil NOME]
+"""
+
+import os
+import sys
+import json
+import base64
+import signal
+import struct
+import asyncio
+import hashlib
+import argparse
+import traceback
+import urllib.parse
+import concurrent.futures
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o módulo é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from config.config import (
+    DEFAULT_SESSION_NAME, SERVER_HOST, SERVER_PORT, SERVER_MAX_WORKERS, SERVER_INPUT_TIMEOUT_SECONDS
+)
+from utils import chat_engine, session_manager, export_jobs, profiles
+
+# Tamanho máximo de uma mensagem WebSocket ou do corpo de uma requisição (em bytes)
+MAX_MESSAGE_BYTES = 1024 * 1024
+
+# GUID fixo do handshake do WebSocket (RFC 6455, seção 1.3)
+_WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# Opcodes dos frames do WebSocket
+_OP_CONTINUATION, _OP_TEXT, _OP_BINARY, _OP_CLOSE, _OP_PING, _OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+# Itens especiais da fila de saída de uma conexão
+_INPUT_REQUEST = {"type": "input"}
+_END = object()
+
+class _WebSocketError(Exception):
+    """Violação do protocolo WebSocket; `code` é o código de fechamento enviado ao cliente."""
+
+    def __init__(self, code: int, reason: str):
+        super().__init__(reason)
+        self.code = code
+
+class WebSocket:
+    """Conexão WebSocket (RFC 6455) sobre os streams do asyncio, do lado do servidor."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._write_lock = asyncio.Lock()
+        self.closed = False
+
+    async def _send_frame(self, opcode: int, payload: bytes = b""):
+        length = len(payload)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, length)
+        elif length < (1 << 16):
+            header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+        async with self._write_lock:
+            self._writer.write(header + payload)
+            await self._writer.drain()
+
+    async def send_json(self, message: dict):
+        await self._send_frame(_OP_TEXT, json.dumps(message, ensure_ascii=False).encode("utf-8"))
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            await self._send_frame(_OP_CLOSE, struct.pack("!H", code) + reason.encode("utf-8")[:120])
+        except (ConnectionError, RuntimeError):
+            pass
+
+    async def _read_frame(self) -> tuple:
+        first, second = await self._reader.readexactly(2)
+        fin, opcode, masked, length = bool(first & 0x80), first & 0x0F, bool(second & 0x80), second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", await self._reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", await self._reader.readexactly(8))[0]
+        if not masked:
+            raise _WebSocketError(1002, "frames do cliente devem ser mascarados")
+        if length > MAX_MESSAGE_BYTES:
+            raise _WebSocketError(1009, "mensagem muito grande")
+        mask = await self._reader.readexactly(4)
+        payload = await self._reader.readexactly(length)
+        if length:
+            # Desmascara a carga inteira de uma vez (XOR com a máscara repetida)
+            repeated_mask = (mask * (length // 4 + 1))[:length]
+            payload = (int.from_bytes(payload, "big") ^ int.from_bytes(repeated_mask, "big")).to_bytes(length, "big")
+        return fin, opcode, payload
+
+    async def receive(self) -> str or None:
+        """
+        Aguarda a próxima mensagem de texto, respondendo a pings e juntando mensagens fragmentadas.
+
+        Returns:
+            str or None: O texto recebido, ou None se a conexão foi fechada.
+        """
+        fragments = []
+        try:
+            while True:
+                fin, opcode, payload = await self._read_frame()
+                if opcode == _OP_PING:
+                    await self._send_frame(_OP_PONG, payload)
+                elif opcode == _OP_PONG:
+                    continue
+                elif opcode == _OP_CLOSE:
+                    await self.close()
+                    return None
+                elif opcode in (_OP_TEXT, _OP_BINARY, _OP_CONTINUATION):
+                    if (opcode == _OP_CONTINUATION) != bool(fragments):
+                        raise _WebSocketError(1002, "fragmentação inválida")
+                    fragments.append(payload)
+                    if sum(len(fragment) for fragment in fragments) > MAX_MESSAGE_BYTES:
+                        raise _WebSocketError(1009, "mensagem muito grande")
+                    if fin:
+                        return b"".join(fragments).decode("utf-8", errors="replace")
+                else:
+                    raise _WebSocketError(1002, "opcode desconhecido")
+        except _WebSocketError as e:
+            await self.close(e.code, str(e))
+            return None
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self.closed = True
+            return None
+
+# --- Console das Conexões ---
+# Os comandos usam print() e input() (veja chat_engine.routed_console). Aqui, a saída de um
+# comando é repassada ao laço de eventos e a entrada vem das linhas recebidas pela conexão.
+
+class _LoopWriter:
+    """stdout de um comando: repassa cada trecho escrito ao laço de eventos."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, callback):
+        self._loop = loop
+        self._callback = callback
+
+    def write(self, text: str) -> int:
+        if text:
+            try:
+                self._loop.call_soon_threadsafe(self._callback, text)
+            except RuntimeError:
+                pass # O servidor foi encerrado enquanto o comando ainda executava
+        return len(text)
+
+    def flush(self):
+        pass
+
+class _LoopReader:
+    """stdin de um comando: lê as linhas enviadas pela conexão (None = sem entrada interativa)."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, lines: asyncio.Queue = None, on_wait=None):
+        self._loop = loop
+        self._lines = lines
+        self._on_wait = on_wait
+
+    def readline(self, *args) -> str:
+        if self._lines is None:
+            return "" # Fim da entrada: input() gera EOFError
+        try:
+            if self._on_wait:
+                self._loop.call_soon_threadsafe(self._on_wait)
+            future = asyncio.run_coroutine_threadsafe(self._lines.get(), self._loop)
+            line = future.result(timeout=SERVER_INPUT_TIMEOUT_SECONDS)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            return ""
+        except (RuntimeError, concurrent.futures.CancelledError):
+            return "" # O servidor foi encerrado
+        if line is None: # A conexão foi fechada; mantém o aviso na fila para o laço da conexão
+            self._loop.call_soon_threadsafe(self._lines.put_nowait, None)
+            return ""
+        return line + "\n"
+
+class ChatServer:
+    """Servidor HTTP + WebSocket que atende as conversas com um ChatEngine compartilhado."""
+
+    def __init__(self, engine: chat_engine.ChatEngine = None, max_workers: int = SERVER_MAX_WORKERS):
+        self.engine = engine or chat_engine.ChatEngine()
+        self.max_workers = max_workers
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chat-server")
+        self._session_locks = {}
+        self._connections = 0
+        self._running_commands = 0
+
+    # --- Execução dos Comandos ---
+
+    def _session_lock(self, profile: str, session_name: str) -> asyncio.Lock:
+        """Lock (do laço de eventos) que enfileira os comandos de uma sessão antes do pool de trabalhadores."""
+        return self._session_locks.setdefault((profile, session_name), asyncio.Lock())
+
+    async def _run_in_pool(self, stdin, stdout, function, *args):
+        """Executa a função em um trabalhador, com print() e input() direcionados para a conexão."""
+        def call():
+            with chat_engine.routed_console(stdin, stdout):
+                return function(*args)
+        self._running_commands += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, call)
+        finally:
+            self._running_commands -= 1
+
+    def _process_line(self, conversation: chat_engine.Conversation, line: str) -> bool:
+        """Executa uma linha no ChatEngine (em um trabalhador). Retorna False após /sair."""
+        try:
+            return self.engine.process_input(conversation, line)
+        except EOFError:
+            print("\nComando cancelado: nenhuma resposta recebida.")
+            return True
+        except Exception as e:
+            print(f"Ocorreu um erro inesperado: {e}")
+            traceback.print_exc()
+            return True
+
+    async def _close_conversation(self, conversation: chat_engine.Conversation):
+        """Encerra a conversa em um trabalhador, para que o salvamento e o registro de sessões não bloqueiem o laço."""
+        try:
+            closing = asyncio.get_running_loop().run_in_executor(self._executor, self.engine.close_conversation, conversation)
+        except RuntimeError: # Pool de trabalhadores já encerrado (servidor parando)
+            self.engine.close_conversation(conversation)
+            return
+        await closing
+
+    async def _execute(self, conversation: chat_engine.Conversation, stdin, stdout, line: str) -> bool:
+        async with self._session_lock(conversation.profile, conversation.session.name):
+            return await self._run_in_pool(stdin, stdout, self._process_line, conversation, line)
+
+    # --- WebSocket ---
+
+    async def _send_output(self, websocket: WebSocket, outbox: asyncio.Queue):
+        """Envia a saída da conversa, juntando em uma mensagem os trechos que já estão na fila."""
+        pending = None
+        while True:
+            item = pending if pending is not None else await outbox.get()
+            pending = None
+            if item is _END:
+                return
+            if isinstance(item, str):
+                parts = [item]
+                while not outbox.empty():
+                    following = outbox.get_nowait()
+                    if not isinstance(following, str):
+                        pending = following
+                        break
+                    parts.append(following)
+                item = {"type": "output", "text": "".join(parts)}
+            if not websocket.closed:
+                try:
+                    await websocket.send_json(item)
+                except ConnectionError:
+                    websocket.closed = True
+
+    async def _receive_lines(self, websocket: WebSocket, lines: asyncio.Queue):
+        """Coloca na fila as linhas recebidas (None quando a conexão é fechada)."""
+        try:
+            while True:
+                message = await websocket.receive()
+                if message is None:
+                    return
+                for line in message.splitlines() or [""]:
+                    lines.put_nowait(line)
+        finally:
+            lines.put_nowait(None)
+
+    async def _run_websocket(self, websocket: WebSocket, profile: str, session_name: str):
+        """Laço de prompt de uma conexão WebSocket (o equivalente ao main.run_chatbot)."""
+        loop = asyncio.get_running_loop()
+        lines = asyncio.Queue()
+        outbox = asyncio.Queue()
+        stdout = _LoopWriter(loop, outbox.put_nowait)
+        stdin = _LoopReader(loop, lines, on_wait=lambda: outbox.put_nowait(_INPUT_REQUEST))
+        sender = asyncio.create_task(self._send_output(websocket, outbox))
+        receiver = asyncio.create_task(self._receive_lines(websocket, lines))
+        conversation = None
+        self._connections += 1
+        try:
+            async with self._session_lock(profile, session_name):
+                conversation = await self._run_in_pool(stdin, stdout, self.engine.open_conversation, session_name, profile)
+            await self._run_in_pool(stdin, stdout, chat_engine.print_welcome)
+
+            keep_going = True
+            while keep_going:
+                outbox.put_nowait("=" * 60 + "\n" + self.engine.get_prompt(conversation))
+                outbox.put_nowait(_INPUT_REQUEST)
+                line = await lines.get()
+                if line is None:
+                    break
+                keep_going = await self._execute(conversation, stdin, stdout, line)
+            if not keep_going:
+                outbox.put_nowait("Sessão salva. Conexão encerrada.\n")
+                outbox.put_nowait({"type": "closed"})
+        finally:
+            self._connections -= 1
+            if conversation is not None:
+                await self._close_conversation(conversation)
+            outbox.put_nowait(_END)
+            receiver.cancel()
+            await asyncio.gather(sender, receiver, return_exceptions=True)
+            await websocket.close()
+
+    # --- HTTP ---
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> tuple or None:
+        """Lê a linha de requisição e os cabeçalhos. Retorna (método, caminho, parâmetros, cabeçalhos)."""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            return None
+        request_line, *header_lines = head.decode("latin-1").split("\r\n")
+        method, target, _version = request_line.split(" ", 2)
+        headers = {}
+        for header_line in header_lines:
+            if ":" in header_line:
+                name, value = header_line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        url = urllib.parse.urlsplit(target)
+        params = {name: values[-1] for name, values in urllib.parse.parse_qs(url.query).items()}
+        return method.upper(), url.path, params, headers
+
+    @staticmethod
+    async def _send_response(writer: asyncio.StreamWriter, status: str, body, content_type: str = "application/json; charset=utf-8"):
+        if not isinstance(body, bytes):
+            body = (body if isinstance(body, str) else json.dumps(body, ensure_ascii=False)).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+    @staticmethod
+    def _profile_from(params: dict) -> str or None:
+        """Perfil informado em ?perfil= (ou o padrão). None se o nome for inválido."""
+        try:
+            return profiles.validate_profile_name(params.get("perfil") or profiles.get_current_profile())
+        except ValueError:
+            return None
+
+    def _target_from(self, params: dict) -> tuple:
+        """Retorna (perfil, sessão) dos parâmetros da URL, ou (None, mensagem de erro) se algum for inválido."""
+        profile = self._profile_from(params)
+        if profile is None:
+            return None, "nome de perfil inválido"
+        session_name = params.get("sessao", DEFAULT_SESSION_NAME)
+        try:
+            session_manager.validate_session_name(session_name)
+        except ValueError:
+            return None, "nome de sessão inválido"
+        return profile, session_name
+
+    @staticmethod
+    def _origin_allowed(headers: dict) -> bool:
+        """
+        Rejeita requisições feitas por páginas de outros sites: o navegador envia a origem da página no
+        cabeçalho Origin (inclusive em POSTs simples, que não passam por preflight de CORS).
+        Clientes que não são navegadores (ex: curl) não enviam Origin e são aceitos.
+        """
+        origin = headers.get("origin")
+        return not origin or urllib.parse.urlsplit(origin).netloc == headers.get("host")
+
+    async def _handle_websocket(self, reader, writer, params: dict, headers: dict):
+        if not self._origin_allowed(headers):
+            await self._send_response(writer, "403 Forbidden", {"erro": "origem não permitida"})
+            return
+        key = headers.get("sec-websocket-key")
+        if "websocket" not in headers.get("upgrade", "").lower() or not key or headers.get("sec-websocket-version") != "13":
+            await self._send_response(writer, "400 Bad Request", {"erro": "handshake WebSocket inválido"})
+            return
+        profile, session_name = self._target_from(params)
+        if profile is None:
+            await self._send_response(writer, "400 Bad Request", {"erro": session_name})
+            return
+
+        accept = base64.b64encode(hashlib.sha1((key + _WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode("latin-1")
+        )
+        await writer.drain()
+        await self._run_websocket(WebSocket(reader, writer), profile, session_name)
+
+    async def _handle_message(self, reader, writer, params: dict, headers: dict):
+        """POST /api/mensagem: executa uma linha e devolve a saída em streaming (chunked)."""
+        if not self._origin_allowed(headers):
+            await self._send_response(writer, "403 Forbidden", {"erro": "origem não permitida"})
+            return
+        profile, session_name = self._target_from(params)
+        try:
+            length = int(headers.get("content-length", ""))
+        except ValueError:
+            await self._send_response(writer, "411 Length Required", {"erro": "informe o Content-Length"})
+            return
+        if profile is None or length > MAX_MESSAGE_BYTES:
+            status = "400 Bad Request" if profile is None else "413 Payload Too Large"
+            await self._send_response(writer, status, {"erro": session_name if profile is None else "mensagem muito grande"})
+            return
+        line = (await reader.readexactly(length)).decode("utf-8", errors="replace").strip()
+
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; charset=utf-8\r\n"
+                     b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+        loop = asyncio.get_running_loop()
+        outbox = asyncio.Queue()
+        stdout = _LoopWriter(loop, outbox.put_nowait)
+        stdin = _LoopReader(loop) # Sem entrada interativa
+
+        async def forward_output():
+            finished = False
+            while not finished:
+                parts = [await outbox.get()]
+                while not outbox.empty():
+                    parts.append(outbox.get_nowait())
+                if parts[-1] is _END: # _END é sempre o último item da fila
+                    finished = True
+                    parts.pop()
+                data = "".join(parts).encode("utf-8")
+                if data:
+                    writer.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                    await writer.drain()
+
+        forwarder = asyncio.create_task(forward_output())
+        conversation = None
+        self._connections += 1
+        try:
+            async with self._session_lock(profile, session_name):
+                conversation = await self._run_in_pool(stdin, stdout, self.engine.open_conversation, session_name, profile)
+            await self._execute(conversation, stdin, stdout, line)
+        finally:
+            self._connections -= 1
+            if conversation is not None:
+                await self._close_conversation(conversation)
+            outbox.put_nowait(_END)
+            await forwarder
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await self._read_request(reader)
+            if request is None:
+                return
+            method, path, params, headers = request
+            if method == "GET" and path == "/":
+                await self._send_response(writer, "200 OK", _INDEX_HTML, "text/html; charset=utf-8")
+            elif method == "GET" and path == "/ws":
+                await self._handle_websocket(reader, writer, params, headers)
+            elif method == "POST" and path == "/api/mensagem":
+                await self._handle_message(reader, writer, params, headers)
+            elif method == "GET" and path == "/api/sessoes":
+                profile = self._profile_from(params)
+                if profile is None:
+                    await self._send_response(writer, "400 Bad Request", {"erro": "nome de perfil inválido"})
+                    return
+
+                def list_sessions():
+                    with profiles.use_profile(profile):
+                        return session_manager.list_sessions()
+                sessions = await asyncio.get_running_loop().run_in_executor(self._executor, list_sessions)
+                await self._send_response(writer, "200 OK", {"perfil": profile, "sessoes": sessions})
+            elif method == "GET" and path == "/api/perfis":
+                names = await asyncio.get_running_loop().run_in_executor(self._executor, profiles.list_profiles)
+                await self._send_response(writer, "200 OK", {"perfis": names, "padrao": profiles.get_current_profile()})
+            elif method == "GET" and path == "/api/status":
+                await self._send_response(writer, "200 OK", {
+                    "conexoes": self._connections,
+                    "sessoes_em_uso": self.engine.active_sessions(),
+                    "comandos_em_andamento": self._running_commands,
+                    "trabalhadores": self.max_workers,
+                    "exportacoes_pendentes": export_jobs.pending_count(),
+                })
+            else:
+                await self._send_response(writer, "404 Not Found", {"erro": "rota não encontrada"})
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass # Cliente desconectado ou requisição malformada
+        except asyncio.CancelledError:
+            pass # Servidor encerrado com a conexão aberta (a conversa já foi salva no finally)
+        finally:
+            writer.close()
+
+    # --- Inicialização ---
+
+    async def serve(self, host: str = SERVER_HOST, port: int = SERVER_PORT):
+        """Atende as conexões até receber SIGTERM (ou até a tarefa ser cancelada, ex: Ctrl+C)."""
+        loop = asyncio.get_running_loop()
+        stop = asyncio.Event()
+        loop.add_signal_handler(signal.SIGTERM, stop.set)
+        server = await asyncio.start_server(self._handle_connection, host, port)
+        print(f"Servidor do chatbot em http://{host}:{port}/ com {self.max_workers} trabalhador(es) (Ctrl+C para encerrar).")
+        async with server:
+            await stop.wait()
+
+    def shutdown(self):
+        """Libera os trabalhadores sem aguardar comandos presos esperando resposta do usuário."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+def serve(host: str = SERVER_HOST, port: int = SERVER_PORT, max_workers: int = SERVER_MAX_WORKERS) -> int:
+    """
+    Inicia o servidor e atende as conexões até receber Ctrl+C ou SIGTERM.
+
+    Returns:
+        int: O código de saída do processo.
+    """
+    print("Carregando o cliente da OpenAI e o codificador de tokens...")
+    chat_engine.warm_up()
+    chat_engine.install_console_routing()
+    server = ChatServer(max_workers=max_workers)
+    try:
+        asyncio.run(server.serve(host, port))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"Não foi possível iniciar o servidor em {host}:{port}: {e}")
+        return 1
+    finally:
+        print("\nEncerrando o servidor...")
+        server.shutdown()
+        session_manager.flush_pending_saves()
+        chat_engine.wait_for_exports()
+    return 0
+
+# Página do terminal no navegador: envia cada linha digitada e exibe a saída (sem os códigos de cor ANSI)
+_INDEX_HTML = """<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<title>Chatbot de Consulta de PDFs</title>
+<style>
+  body { margin: 0; background: #111; color: #ddd; font: 14px monospace; display: flex; flex-direction: column; height: 100vh; }
+  #saida { flex: 1; overflow-y: auto; margin: 0; padding: 12px; white-space: pre-wrap; }
+  #entrada { border: 0; border-top: 1px solid #333; background: #1b1b1b; color: #fff; font: inherit; padding: 10px; }
+</style>
+</head>
+<body>
+<pre id="saida"></pre>
+<input id="entrada" autofocus placeholder="Digite uma pergunta ou um comando (/ajuda)">
+<script>
+  const saida = document.getElementById("saida");
+  const entrada = document.getElementById("entrada");
+  const parametros = new URLSearchParams(location.search);
+  const consulta = new URLSearchParams();
+  for (const nome of ["sessao", "perfil"]) if (parametros.get(nome)) consulta.set(nome, parametros.get(nome));
+  const ws = new WebSocket(`ws://${location.host}/ws${consulta.toString() ? "?" + consulta : ""}`);
+  const escrever = (texto) => {
+    saida.textContent += texto.replace(/\\x1b\\[[0-9;]*m/g, "");
+    saida.scrollTop = saida.scrollHeight;
+  };
+  ws.onmessage = (evento) => {
+    const mensagem = JSON.parse(evento.data);
+    if (mensagem.type === "output") escrever(mensagem.text);
+    else if (mensagem.type === "input") entrada.focus();
+    else if (mensagem.type === "closed") entrada.disabled = true;
+  };
+  ws.onclose = () => { entrada.disabled = true; escrever("\\n[Conexão encerrada]\\n"); };
+  entrada.addEventListener("keydown", (evento) => {
+    if (evento.key !== "Enter" || ws.readyState !== WebSocket.OPEN) return;
+    escrever(entrada.value + "\\n");
+    ws.send(entrada.value);
+    entrada.value = "";
+  });
+</script>
+</body>
+</html>
+"""
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor HTTP + WebSocket do chatbot de consulta de PDFs.")
+    parser.add_argument("--host", default=SERVER_HOST, help="Endereço em que o servidor escuta.")
+    parser.add_argument("--porta", type=int, default=SERVER_PORT, help="Porta do servidor.")
+    parser.add_argument("--trabalhadores", type=int, default=SERVER_MAX_WORKERS,
+                        help="Quantos comandos/perguntas são executados ao mesmo tempo.")
+    parser.add_argument("--perfil", type=profiles.validate_profile_name,
+                        help="Perfil usado pelas conexões que não informam ?perfil= (padrão: CHATBOT_PERFIL ou 'default').")
+    args = parser.parse_args()
+    if args.perfil:
+        profiles.set_default_profile(args.perfil)
+    sys.exit(serve(args.host, args.porta, args.trabalhadores))
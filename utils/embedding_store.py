@@ -0,0 +1,266 @@
+#embedding_store.py
+
+import os
+import sys
+import json
+import math
+import zlib
+import threading
+from collections import Counter
+from typing import TYPE_CHECKING, List, Tuple
+if TYPE_CHECKING:
+    import numpy as np # Importado dentro das funções, para não atrasar a inicialização do chatbot
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o módulo é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from config.config import (
+    INDEXES_DIR, RETRIEVAL_TOP_K, EMBEDDING_BACKEND, EMBEDDING_MODEL,
+    HASHING_EMBEDDING_DIM, EMBEDDING_DTYPE, EMBEDDING_BATCH_SIZE
+)
+from utils import retrieval_index
+
+# Número de linhas da matriz convertidas para float32 de cada vez durante a busca.
+# Limita a memória usada mesmo quando a matriz em disco é grande.
+_SEARCH_BLOCK_ROWS = 8192
+
+# Matrizes já abertas (memory-mapped) neste processo, por (documento, embedder).
+_loaded_matrices = {}
+
+# --- Embedders ---
+class HashingEmbedder:
+    """
+    Embedder local, sem dependências externas: cada termo (e cada par de termos vizinhos)
+    é mapeado por hash para uma dimensão do vetor, com sinal também definido por hash.
+    Funciona offline e é determinístico entre execuções.
+    """
+
+    def __init__(self, dim: int = HASHING_EMBEDDING_DIM):
+        self.dim = dim
+        self.name = f"hashing{dim}"
+
+    def _features(self, text: str) -> Counter:
+        terms = retrieval_index.tokenize(text)
+        bigrams = [f"{first} {second}" for first, second in zip(terms, terms[1:])]
+        return Counter(terms + bigrams)
+
+    def embed(self, texts: List[str]) -> "np.ndarray":
+        import numpy as np
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, frequency in self._features(text).items():
+                feature_hash = zlib.crc32(feature.encode('utf-8'))
+                sign = 1.0 if (feature_hash >> 31) & 1 else -1.0
+                vectors[row, feature_hash % self.dim] += sign * (1.0 + math.log(frequency))
+        return vectors
+
+class OpenAIEmbedder:
+    """Embedder que usa a API de embeddings da OpenAI (via api_service, em lotes)."""
+
+    def __init__(self, model: str = EMBEDDING_MODEL):
+        self.model = model
+        self.name = f"openai-{model}"
+
+    def embed(self, texts: List[str]) -> "np.ndarray or None":
+        from utils import api_service # Importado aqui para que o modo offline não exija a chave da API
+        embeddings = api_service.get_openai_embeddings(texts, self.model)
+        if len(embeddings) != len(texts):
+            return None
+        import numpy as np
+        return np.asarray(embeddings, dtype=np.float32)
+
+# Embedders disponíveis, por nome (veja EMBEDDING_BACKEND em config.py).
+EMBEDDERS = {
+    "hashing": HashingEmbedder,
+    "openai": OpenAIEmbedder,
+}
+
+def get_embedder(backend: str = None):
+    """
+    Retorna uma instância do embedder configurado.
+
+    Args:
+        backend (str, optional): O nome do embedder (uma chave de EMBEDDERS). Se None, usa EMBEDDING_BACKEND.
+    """
+    backend = backend or EMBEDDING_BACKEND
+    if backend not in EMBEDDERS:
+        raise ValueError(f"Embedder '{backend}' desconhecido. Opções: {', '.join(EMBEDDERS)}.")
+    return EMBEDDERS[backend]()
+
+# --- Funções Auxiliares ---
+def _get_matrix_path(document_key: str, embedder) -> str:
+    """Retorna o caminho do arquivo .npy com os embeddings de um documento."""
+    return os.path.join(INDEXES_DIR, document_key, f"embeddings_{embedder.name}.npy")
+
+def _normalize_rows(vectors: "np.ndarray") -> "np.ndarray":
+    """Normaliza cada linha para norma 1, de modo que o produto escalar seja a similaridade de cosseno."""
+    import numpy as np
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+# --- Construção e Carregamento ---
+def build_embeddings(document_key: str, embedder=None) -> int:
+    """
+    Calcula e grava os embeddings de todos os trechos indexados de um documento.
+
+    Os trechos vêm do índice de busca (retrieval_index), que precisa existir. Os vetores são
+    normalizados e gravados lote a lote diretamente em um arquivo .npy mapeado em memória,
+    de modo que a matriz completa nunca precisa caber na RAM. Os metadados (embedder,
+    dimensões, tipo) ficam em um arquivo .json ao lado.
+
+    Args:
+        document_key (str): Identificador do documento (o mesmo do índice de busca).
+        embedder (optional): O embedder a ser usado. Se None, usa get_embedder().
+
+    Returns:
+        int: O número de trechos com embeddings gravados (0 se não houver trechos ou em caso de erro).
+    """
+    import numpy as np
+    embedder = embedder or get_embedder()
+    index_data = retrieval_index.load_index(document_key)
+    if not index_data or not index_data["num_chunks"]:
+        return 0
+
+    num_chunks = index_data["num_chunks"]
+    matrix_path = _get_matrix_path(document_key, embedder)
+    temp_path = f"{matrix_path}.{os.getpid()}.{threading.get_ident()}.tmp.npy"
+    matrix = None
+    row = 0
+    batch = []
+    try:
+        for chunk in retrieval_index.iter_chunks(document_key):
+            batch.append(chunk["text"])
+            if len(batch) < EMBEDDING_BATCH_SIZE and chunk["chunk_id"] < num_chunks - 1:
+                continue
+            vectors = embedder.embed(batch)
+            if vectors is None:
+                print("Erro: Não foi possível calcular os embeddings dos trechos.")
+                return 0
+            if matrix is None:
+                matrix = np.lib.format.open_memmap(
+                    temp_path, mode='w+', dtype=np.dtype(EMBEDDING_DTYPE), shape=(num_chunks, vectors.shape[1])
+                )
+            matrix[row:row + len(batch)] = _normalize_rows(vectors)
+            row += len(batch)
+            batch = []
+
+        if matrix is None or row != num_chunks:
+            # O índice informa mais trechos do que foi possível ler (ex: índice apagado ou incompleto)
+            print(f"Erro: O índice de busca do documento está incompleto ({row + len(batch)} de {num_chunks} trechos). "
+                  "Os embeddings não foram gravados.")
+            return 0
+        matrix.flush()
+        dim = matrix.shape[1]
+        del matrix
+        matrix = None
+        os.replace(temp_path, matrix_path)
+        with open(f"{os.path.splitext(matrix_path)[0]}.json", 'w', encoding='utf-8') as f:
+            json.dump({"embedder": embedder.name, "num_chunks": num_chunks, "dim": dim, "dtype": EMBEDDING_DTYPE}, f)
+    finally:
+        del matrix
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    _loaded_matrices.pop((document_key, embedder.name), None)
+    retrieval_index.notify_reindexed(document_key)
+    return row
+
+def embeddings_exist(document_key: str, embedder=None) -> bool:
+    """Verifica se os embeddings de um documento já foram calculados com o embedder indicado."""
+    return os.path.exists(_get_matrix_path(document_key, embedder or get_embedder()))
+
+def load_embeddings(document_key: str, embedder=None) -> "np.ndarray or None":
+    """
+    Abre a matriz de embeddings de um documento em modo memory-mapped (somente leitura).
+
+    Nada é lido do disco além do cabeçalho: as linhas são carregadas pelo sistema operacional
+    sob demanda, durante a busca. Por isso a abertura leva apenas milissegundos.
+
+    Returns:
+        np.ndarray or None: A matriz (num_trechos x dimensões), ou None se não existir.
+    """
+    embedder = embedder or get_embedder()
+    cache_key = (document_key, embedder.name)
+    if cache_key not in _loaded_matrices:
+        matrix_path = _get_matrix_path(document_key, embedder)
+        if not os.path.exists(matrix_path):
+            return None
+        import numpy as np
+        _loaded_matrices[cache_key] = np.load(matrix_path, mmap_mode='r')
+    return _loaded_matrices[cache_key]
+
+# --- Busca ---
+def search_ids(document_key: str, query: str, top_k: int = RETRIEVAL_TOP_K, embedder=None) -> List[Tuple[int, float]]:
+    """
+    Retorna os trechos mais similares à consulta (similaridade de cosseno).
+
+    A pontuação de todos os trechos é um produto matriz-vetor em lote (feito em blocos de
+    linhas, para limitar a memória), seguido de uma seleção parcial dos top-k.
+
+    Returns:
+        List[Tuple[int, float]]: Pares (id_do_trecho, similaridade), do mais para o menos similar.
+    """
+    embedder = embedder or get_embedder()
+    matrix = load_embeddings(document_key, embedder)
+    if matrix is None or not len(matrix):
+        return []
+    query_vectors = embedder.embed([query])
+    if query_vectors is None:
+        return []
+    query_vector = _normalize_rows(query_vectors)[0]
+
+    import numpy as np
+
+    scores = np.empty(len(matrix), dtype=np.float32)
+    for start in range(0, len(matrix), _SEARCH_BLOCK_ROWS):
+        block = np.asarray(matrix[start:start + _SEARCH_BLOCK_ROWS], dtype=np.float32)
+        scores[start:start + len(block)] = block @ query_vector
+
+    top_k = min(top_k, len(scores))
+    top_ids = np.argpartition(-scores, top_k - 1)[:top_k]
+    top_ids = top_ids[np.argsort(-scores[top_ids])]
+    return [(int(chunk_id), float(scores[chunk_id])) for chunk_id in top_ids]
+
+def search(document_key: str, query: str, top_k: int = RETRIEVAL_TOP_K, embedder=None) -> List[dict]:
+    """
+    Busca os trechos mais similares à consulta e os lê do índice de trechos.
+
+    Returns:
+        List[dict]: Os trechos encontrados (com a chave 'score'), do mais para o menos similar.
+    """
+    ranked = search_ids(document_key, query, top_k, embedder)
+    chunks = retrieval_index.read_chunks(document_key, [chunk_id for chunk_id, _ in ranked])
+    for chunk, (_, score) in zip(chunks, ranked):
+        chunk["score"] = score
+    return chunks
+
+if __name__ == "__main__":
+    import time
+    print("Testando embedding_store.py...")
+
+    test_key = "documento_de_teste_embeddings"
+    test_pages = [
+        (page_number, f"Página {page_number}. " + text)
+        for page_number, text in enumerate([
+            "Introdução às redes de computadores. O modelo OSI possui sete camadas.",
+            "A camada de transporte usa os protocolos TCP e UDP. O TCP garante a entrega ordenada.",
+            "Endereçamento IP: máscaras de sub-rede dividem uma rede em partes menores.",
+        ] * 200, start=1)
+    ]
+    print(f"Trechos indexados: {retrieval_index.build_index(test_key, test_pages, chunk_tokens=60)}")
+
+    start = time.perf_counter()
+    print(f"Embeddings gravados: {build_embeddings(test_key)} ({time.perf_counter() - start:.2f}s)")
+
+    _loaded_matrices.clear()
+    start = time.perf_counter()
+    test_matrix = load_embeddings(test_key)
+    print(f"Matriz {test_matrix.shape} ({test_matrix.dtype}) aberta em {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for result in search(test_key, "protocolos da camada de transporte", top_k=3):
+        print(f"- ({result['score']:.3f}) páginas {result['first_page']}-{result['last_page']}: {result['text'][:60]}...")
+
+    retrieval_index.delete_index(test_key)
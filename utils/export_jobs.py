@@ -0,0 +1,241 @@
+# export_jobs.py
+
+import os
+import sys
+import signal
+import datetime
+import threading
+import multiprocessing
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o módulo é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from config.config import SESSION_TAIL_MESSAGES
+
+# Estados de um job de exportação
+STATUS_PENDING = "pendente"
+STATUS_RUNNING = "em andamento"
+STATUS_DONE = "concluído"
+STATUS_FAILED = "falhou"
+STATUS_ABANDONED = "abandonado"
+FINISHED_STATUSES = (STATUS_DONE, STATUS_FAILED, STATUS_ABANDONED)
+
+# --- Processo de Exportação ---
+
+def _worker_main(job_queue, event_queue):
+    """
+    Laço do processo de exportação: lê os jobs da fila, um por vez, e informa o andamento
+    pela fila de eventos. A sessão é lida do armazenamento (e não recebida do processo principal),
+    para que o histórico não precise ser copiado entre os processos. Cada job usa o perfil de quem o agendou.
+    """
+    # O Ctrl+C no terminal é tratado pelo processo principal (que decide se abandona os jobs)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from utils import session_manager, pdf_exporter, profiles
+
+    while True:
+        job = job_queue.get()
+        if job is None:
+            break
+        job_id, profile, session_name, export_name, incremental = job
+        try:
+            with profiles.use_profile(profile):
+                chat_history = session_manager.get_storage_backend().load_session_window(session_name, SESSION_TAIL_MESSAGES)
+                if chat_history is None:
+                    raise ValueError(f"A sessão '{session_name}' não foi encontrada.")
+                chat_history = chat_history.get("chat_history", [])
+                event_queue.put(("started", job_id, len(chat_history)))
+                result = pdf_exporter.export_chat_to_pdf(
+                    chat_history, session_name, export_name, incremental=incremental,
+                    progress_callback=lambda done, total: event_queue.put(("progress", job_id, done, total))
+                )
+            event_queue.put(("done", job_id, result))
+        except Exception as e:
+            event_queue.put(("failed", job_id, str(e)))
+    session_manager.close_storage_backends()
+
+# --- Fila de Jobs (processo principal) ---
+_jobs = {}
+_jobs_condition = threading.Condition()
+_next_job_id = 1
+_process = None
+_job_queue = None
+_event_queue = None
+_listener = None
+
+def _ensure_worker():
+    """Inicia o processo de exportação e a thread que acompanha seus eventos, se ainda não estiverem ativos."""
+    global _process, _job_queue, _event_queue, _listener
+    if _process is not None and _process.is_alive():
+        return
+    context = multiprocessing.get_context("spawn")
+    _job_queue = context.Queue()
+    _event_queue = context.Queue()
+    _process = context.Process(target=_worker_main, args=(_job_queue, _event_queue), name="export-worker", daemon=True)
+    _process.start()
+    _listener = threading.Thread(target=_listen_events, args=(_process, _event_queue), name="export-events", daemon=True)
+    _listener.start()
+
+def _listen_events(process, event_queue):
+    """Atualiza os jobs conforme os eventos do processo de exportação chegam."""
+    while True:
+        try:
+            event = event_queue.get(timeout=0.5)
+        except Exception: # queue.Empty (ou a fila foi fechada)
+            if not process.is_alive():
+                break
+            continue
+        kind, job_id = event[0], event[1]
+        with _jobs_condition:
+            job = _jobs.get(job_id)
+            if job is None or job["status"] in FINISHED_STATUSES:
+                continue
+            if kind == "started":
+                job["status"] = STATUS_RUNNING
+                job["total"] = event[2]
+            elif kind == "progress":
+                job["done"], job["total"] = event[2], event[3]
+            elif kind == "done":
+                job["status"] = STATUS_DONE
+                job["result"] = event[2]
+            elif kind == "failed":
+                job["status"] = STATUS_FAILED
+                job["result"] = event[2]
+            if job["status"] in FINISHED_STATUSES:
+                job["finished_at"] = datetime.datetime.now().isoformat()
+                print(f"\n[Exportação #{job_id} {job['status']}] {job['result']}")
+            _jobs_condition.notify_all()
+
+    # O processo terminou (ex: foi encerrado ou falhou): os jobs que ele não concluiu não vão mais avançar
+    with _jobs_condition:
+        for job in _jobs.values():
+            if job["worker_pid"] == process.pid and job["status"] not in FINISHED_STATUSES:
+                job["status"] = STATUS_FAILED
+                job["result"] = "O processo de exportação terminou antes de concluir o job."
+                job["finished_at"] = datetime.datetime.now().isoformat()
+                print(f"\n[Exportação #{job['id']} {job['status']}] {job['result']}")
+        _jobs_condition.notify_all()
+
+def submit_export(session_name: str, export_name: str, incremental: bool = False) -> int:
+    """
+    Agenda a exportação de uma sessão para PDF e retorna imediatamente o ID do job.
+
+    As gravações pendentes da sessão são concluídas antes, para que o processo de exportação
+    leia o histórico atual do armazenamento. A sessão é lida do perfil da thread atual.
+
+    Args:
+        session_name (str): O nome da sessão a ser exportada.
+        export_name (str): O nome do arquivo PDF.
+        incremental (bool): Se True, exporta apenas as mensagens novas desde o último export com esse nome.
+
+    Returns:
+        int: O ID do job (use get_job ou list_jobs para acompanhar o andamento).
+    """
+    global _next_job_id
+    from utils import session_manager, profiles
+    profile = profiles.get_current_profile()
+    session_manager.flush_pending_saves(profile=profile, session_name=session_name)
+    with _jobs_condition:
+        job_id = _next_job_id
+        _next_job_id += 1
+        _ensure_worker()
+        _jobs[job_id] = {
+            "id": job_id,
+            "profile": profile,
+            "session": session_name,
+            "export_name": export_name,
+            "incremental": incremental,
+            "status": STATUS_PENDING,
+            "done": 0,
+            "total": None,
+            "result": None,
+            "submitted_at": datetime.datetime.now().isoformat(),
+            "finished_at": None,
+            "worker_pid": _process.pid
+        }
+        _job_queue.put((job_id, profile, session_name, export_name, incremental))
+    return job_id
+
+def get_job(job_id: int) -> dict or None:
+    """Retorna uma cópia do job com o ID informado, ou None se ele não existir."""
+    with _jobs_condition:
+        job = _jobs.get(job_id)
+        return dict(job) if job else None
+
+def list_jobs() -> list:
+    """Retorna uma cópia de todos os jobs desta execução, do mais antigo para o mais recente."""
+    with _jobs_condition:
+        return [dict(job) for job in _jobs.values()]
+
+def pending_count() -> int:
+    """Retorna o número de jobs ainda não concluídos."""
+    with _jobs_condition:
+        return sum(1 for job in _jobs.values() if job["status"] not in FINISHED_STATUSES)
+
+def wait_all(timeout: float = None) -> bool:
+    """
+    Aguarda a conclusão de todos os jobs.
+
+    Args:
+        timeout (float, optional): Tempo máximo de espera, em segundos. Se None, espera indefinidamente.
+
+    Returns:
+        bool: True se não há mais jobs pendentes; False se o tempo acabou antes.
+    """
+    with _jobs_condition:
+        return _jobs_condition.wait_for(
+            lambda: all(job["status"] in FINISHED_STATUSES for job in _jobs.values()), timeout
+        )
+
+def abandon_all() -> int:
+    """
+    Abandona os jobs pendentes, encerrando o processo de exportação.
+    Os PDFs de um job interrompido podem ficar incompletos.
+
+    Returns:
+        int: O número de jobs abandonados.
+    """
+    global _process
+    with _jobs_condition:
+        abandoned = 0
+        for job in _jobs.values():
+            if job["status"] not in FINISHED_STATUSES:
+                job["status"] = STATUS_ABANDONED
+                job["finished_at"] = datetime.datetime.now().isoformat()
+                abandoned += 1
+        _jobs_condition.notify_all()
+    if _process is not None and _process.is_alive():
+        _process.terminate()
+        _process.join()
+    _process = None
+    return abandoned
+
+def shutdown(timeout: float = 5.0):
+    """Encerra o processo de exportação depois que ele terminar os jobs já agendados."""
+    global _process
+    if _process is None:
+        return
+    if _process.is_alive():
+        _job_queue.put(None)
+        _process.join(timeout)
+        if _process.is_alive():
+            _process.terminate()
+            _process.join()
+    _process = None
+
+if __name__ == "__main__":
+    print("Testando export_jobs.py...")
+    from utils import session_manager
+    session_name = "sessao_teste_export_jobs"
+    history = [{"role": "system", "content": "Sistema"}]
+    for i in range(120):
+        history.append({"role": "user" if i % 2 == 0 else "assistant", "content": f"Mensagem {i}"})
+    session_manager.save_session(session_name, history)
+
+    job_id = submit_export(session_name, "teste_export_jobs")
+    print(f"Job #{job_id} agendado: {get_job(job_id)['status']}")
+    wait_all()
+    print(get_job(job_id))
+    shutdown()
+    session_manager.delete_session(session_name)
@@ -0,0 +1,216 @@
+#extraction_cache.py
+
+import os
+import sys
+import json
+import hashlib
+import threading
+from typing import Iterator, Tuple
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o módulo é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from config.config import EXTRACTION_CACHE_DIR, EXTRACTION_CACHE_MAX_BYTES
+from utils import pdf_processor
+
+# Contadores de acertos/falhas do cache no processo atual.
+_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+class ExtractionError(Exception):
+    """Levantada por iter_cached_pages(strict=True) quando o texto do PDF não pôde ser lido até a última página."""
+
+# --- Funções Auxiliares ---
+def _ensure_dir_exists(directory_path: str):
+    """Garante que um diretório exista. Se não existir, ele é criado."""
+    os.makedirs(directory_path, exist_ok=True)
+
+def _get_cache_path(cache_key: str) -> str:
+    """Retorna o caminho completo para o arquivo de cache de um documento."""
+    _ensure_dir_exists(EXTRACTION_CACHE_DIR)
+    return os.path.join(EXTRACTION_CACHE_DIR, f"{cache_key}.jsonl")
+
+def compute_pdf_key(pdf_path: str) -> str:
+    """
+    Calcula a chave de cache de um PDF a partir do hash SHA-256 dos seus bytes
+    e da versão do extrator.
+
+    Args:
+        pdf_path (str): O caminho completo para o arquivo PDF.
+
+    Returns:
+        str: A chave hexadecimal usada como nome do arquivo de cache.
+    """
+    digest = hashlib.sha256()
+    digest.update(pdf_processor.get_extractor_version().encode('utf-8'))
+    with open(pdf_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _evict_if_needed():
+    """Remove os documentos usados há mais tempo até o cache caber em EXTRACTION_CACHE_MAX_BYTES."""
+    entries = []
+    for f_name in os.listdir(EXTRACTION_CACHE_DIR):
+        if f_name.endswith('.jsonl'):
+            path = os.path.join(EXTRACTION_CACHE_DIR, f_name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries): # Mais antigos (menos usados) primeiro
+        if total_size <= EXTRACTION_CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+            total_size -= size
+            _cache_stats["evictions"] += 1
+        except OSError as e:
+            print(f"Aviso: Não foi possível remover '{path}' do cache de extração: {e}")
+
+def _iter_cache_file(cache_path: str) -> Iterator[Tuple[int, str]]:
+    """Lê as páginas de um arquivo de cache, uma linha JSON por página."""
+    with open(cache_path, 'r', encoding='utf-8') as f:
+        for page_num, line in enumerate(f, start=1):
+            yield page_num, json.loads(line)
+
+def iter_cached_pages(pdf_path: str, cache_key: str = None, quiet: bool = False, strict: bool = False) -> Iterator[Tuple[int, str]]:
+    """
+    Extrai as páginas de um PDF usando o cache de extração quando possível.
+
+    Em caso de acerto, as páginas são lidas do cache sem abrir o PDF com o PyPDF2.
+    Em caso de falha, as páginas vêm de pdf_processor.iter_pdf_pages e são gravadas
+    no cache enquanto são entregues. O cache só é gravado se o documento for lido
+    até a última página; leituras interrompidas ou com erro de extração não deixam entradas incompletas.
+
+    Args:
+        pdf_path (str): O caminho completo para o arquivo PDF.
+        cache_key (str, optional): A chave já calculada com compute_pdf_key, para não ler o PDF novamente.
+        quiet (bool): Se True, não informa quando o texto vem do cache.
+        strict (bool): Se True, um erro de extração levanta ExtractionError (depois das páginas já entregues),
+                       em vez de apenas encerrar a leitura; assim o chamador sabe que o texto está incompleto.
+
+    Yields:
+        Tuple[int, str]: Pares (numero_da_pagina, texto), como em pdf_processor.iter_pdf_pages.
+    """
+    if not os.path.exists(pdf_path):
+        if strict:
+            raise ExtractionError(f"O arquivo PDF não foi encontrado em '{pdf_path}'")
+        print(f"Erro: O arquivo PDF não foi encontrado em '{pdf_path}'")
+        return
+
+    try:
+        cache_path = _get_cache_path(cache_key or compute_pdf_key(pdf_path))
+    except OSError as e:
+        print(f"Aviso: Não foi possível usar o cache de extração: {e}")
+        try:
+            yield from pdf_processor.iter_pdf_pages(pdf_path, strict=strict)
+        except Exception as e:
+            raise ExtractionError(f"Erro ao extrair texto do PDF '{pdf_path}': {e}") from e
+        return
+
+    pages_already_yielded = 0
+    if os.path.exists(cache_path):
+        _cache_stats["hits"] += 1
+        if not quiet:
+            print("Texto do PDF encontrado no cache de extração.")
+        try:
+            os.utime(cache_path) # Marca como usado recentemente (LRU)
+        except OSError:
+            pass
+        try:
+            for page in _iter_cache_file(cache_path):
+                yield page
+                pages_already_yielded += 1
+            return
+        except (OSError, ValueError) as e: # ValueError inclui JSONDecodeError e UnicodeDecodeError
+            print(f"Aviso: Entrada inválida no cache de extração ({e}). Extraindo o PDF novamente.")
+            try:
+                os.remove(cache_path)
+            except OSError:
+                pass
+
+    _cache_stats["misses"] += 1
+    # Temporário exclusivo do processo e da thread: leituras simultâneas do mesmo PDF não se misturam
+    temp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    completed = False
+    pages_written = 0
+    extraction_error = None
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as cache_file:
+            # strict: um erro no meio do documento encerra a leitura sem marcá-la como completa
+            for page_num, page_text in pdf_processor.iter_pdf_pages(pdf_path, strict=True):
+                cache_file.write(json.dumps(page_text, ensure_ascii=False) + "\n")
+                pages_written += 1
+                # Após uma entrada inválida, as páginas já entregues a partir dela não são repetidas
+                if pages_written > pages_already_yielded:
+                    yield page_num, page_text
+        completed = True
+    except Exception as e:
+        if not strict:
+            print(f"Erro ao extrair texto do PDF '{pdf_path}': {e}")
+        extraction_error = e
+    finally:
+        if completed and pages_written:
+            # Se outra leitura já gravou a entrada, o conteúdo é o mesmo: substituí-la é inofensivo
+            os.replace(temp_path, cache_path)
+            _evict_if_needed()
+        elif os.path.exists(temp_path):
+            os.remove(temp_path)
+    if strict and extraction_error is not None:
+        raise ExtractionError(f"Erro ao extrair texto do PDF '{pdf_path}': {extraction_error}") from extraction_error
+
+def get_cache_stats() -> dict:
+    """
+    Retorna os contadores do cache de extração no processo atual.
+
+    Returns:
+        dict: Dicionário com 'hits', 'misses', 'evictions', 'entries' e 'size_bytes'.
+    """
+    _ensure_dir_exists(EXTRACTION_CACHE_DIR)
+    sizes = [
+        os.path.getsize(os.path.join(EXTRACTION_CACHE_DIR, f_name))
+        for f_name in os.listdir(EXTRACTION_CACHE_DIR)
+        if f_name.endswith('.jsonl')
+    ]
+    return dict(_cache_stats, entries=len(sizes), size_bytes=sum(sizes))
+
+def clear_cache() -> int:
+    """
+    Remove todas as entradas do cache de extração.
+
+    Returns:
+        int: O número de documentos removidos.
+    """
+    _ensure_dir_exists(EXTRACTION_CACHE_DIR)
+    removed = 0
+    for f_name in os.listdir(EXTRACTION_CACHE_DIR):
+        if f_name.endswith('.jsonl'):
+            try:
+                os.remove(os.path.join(EXTRACTION_CACHE_DIR, f_name))
+                removed += 1
+            except OSError as e:
+                print(f"Aviso: Não foi possível remover '{f_name}' do cache de extração: {e}")
+    return removed
+
+if __name__ == "__main__":
+    print("Testando extraction_cache.py...")
+
+    from config.config import PDFS_DIR
+    test_pdf_name = "exemplo.pdf" # Altere para o nome de um PDF existente na sua pasta 'pdfs'
+    full_pdf_path = os.path.join(PDFS_DIR, test_pdf_name)
+
+    if not os.path.exists(full_pdf_path):
+        print(f"\nAVISO: O arquivo de teste '{test_pdf_name}' não foi encontrado em '{PDFS_DIR}'.")
+    else:
+        # Primeira leitura: falha no cache (extrai e grava)
+        first_pages = list(iter_cached_pages(full_pdf_path))
+        # Segunda leitura: acerto no cache
+        second_pages = list(iter_cached_pages(full_pdf_path))
+        print(f"Páginas lidas: {len(first_pages)} | Iguais nas duas leituras: {first_pages == second_pages}")
+
+    print(f"\nEstatísticas do cache: {get_cache_stats()}")
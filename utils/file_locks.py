@@ -0,0 +1,82 @@
+# file_locks.py
+
+"""
+Locks de arquivo entre processos e threads (fcntl.flock), um arquivo de lock por recurso.
+
+Os locks são granulares (por sessão, por export), então processos que trabalham em sessões
+diferentes não esperam uns pelos outros. Os arquivos de lock ficam em um subdiretório LOCKS_DIRNAME
+do diretório protegido, para não aparecerem nas listagens, e nunca são apagados: apagar um arquivo
+de lock enquanto outro processo espera por ele quebraria a exclusão mútua.
+"""
+
+import os
+import sys
+import threading
+import contextlib
+
+try:
+    import fcntl
+except ImportError: # Windows: os locks valem apenas dentro do processo (veja _thread_locks)
+    fcntl = None
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o módulo é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+# Subdiretório com os arquivos de lock de cada diretório protegido
+LOCKS_DIRNAME = ".locks"
+
+# Sem fcntl, um lock por arquivo de lock, apenas entre as threads deste processo
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+def lock_path_for(directory: str, name: str) -> str:
+    """Retorna o caminho do arquivo de lock do recurso `name` no diretório informado."""
+    locks_dir = os.path.join(directory, LOCKS_DIRNAME)
+    os.makedirs(locks_dir, exist_ok=True)
+    return os.path.join(locks_dir, f"{name}.lock")
+
+@contextlib.contextmanager
+def locked(lock_path: str, shared: bool = False):
+    """
+    Segura o lock do arquivo durante o bloco.
+
+    Args:
+        lock_path (str): O arquivo de lock (veja lock_path_for). É criado se não existir.
+        shared (bool): Se True, o lock é compartilhado (vários leitores ao mesmo tempo);
+                       se False, é exclusivo (um escritor, sem leitores).
+    """
+    if fcntl is None:
+        with _thread_locks_guard:
+            lock = _thread_locks.setdefault(lock_path, threading.RLock())
+        with lock:
+            yield
+        return
+    # Cada chamada abre o arquivo de novo: o flock vale por descrição de arquivo aberta, então
+    # também exclui outras threads deste processo
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd) # Fechar o arquivo libera o lock
+
+if __name__ == "__main__":
+    import time
+    import tempfile
+    print("Testando file_locks.py...")
+    with tempfile.TemporaryDirectory() as directory:
+        path = lock_path_for(directory, "recurso")
+        order = []
+        def worker(label):
+            with locked(path):
+                order.append(f"{label} entrou")
+                time.sleep(0.2)
+                order.append(f"{label} saiu")
+        threads = [threading.Thread(target=worker, args=(f"thread {i}",)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        print("\n".join(order))
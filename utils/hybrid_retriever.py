@@ -0,0 +1,192 @@
+#hybrid_retriever.py
+
+import os
+import sys
+import math
+import time
+import threading
+from collections import OrderedDict, deque
+from typing import List
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o módulo é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from config.config import (
+    RETRIEVAL_TOP_K, RETRIEVAL_TOKEN_BUDGET, HYBRID_CANDIDATES, RRF_K,
+    RETRIEVAL_QUERY_CACHE_SIZE, RETRIEVAL_LATENCY_SAMPLES
+)
+from utils import retrieval_index, embedding_store
+
+# Cache LRU: (documento, consulta normalizada, top_k) -> IDs dos trechos, do mais para o menos relevante.
+# Protegido por um lock, pois o servidor faz buscas em várias threads ao mesmo tempo.
+_query_cache = OrderedDict()
+_query_cache_lock = threading.Lock()
+
+# Contadores do cache de consultas.
+_cache_stats = {"hits": 0, "misses": 0}
+
+# Medições recentes de latência (em segundos) por etapa da busca.
+STAGES = ("cache", "lexical", "vector", "fusion", "fetch", "total")
+_latencies = {stage: deque(maxlen=RETRIEVAL_LATENCY_SAMPLES) for stage in STAGES}
+
+# --- Cache de Consultas ---
+def normalize_query(query: str) -> str:
+    """Normaliza a consulta (minúsculas, sem acentos, sem stopwords) para que variações triviais usem o mesmo cache."""
+    return " ".join(retrieval_index.tokenize(query))
+
+def invalidate_document(document_key: str):
+    """Remove do cache todas as consultas de um documento (chamada quando ele é reindexado)."""
+    with _query_cache_lock:
+        for cache_key in [key for key in _query_cache if key[0] == document_key]:
+            del _query_cache[cache_key]
+
+def clear_cache():
+    """Esvazia o cache de consultas."""
+    with _query_cache_lock:
+        _query_cache.clear()
+
+# O cache é invalidado automaticamente sempre que um índice ou matriz de embeddings é reconstruído.
+retrieval_index.register_reindex_listener(invalidate_document)
+
+# --- Fusão de Rankings ---
+def reciprocal_rank_fusion(rankings: List[List[int]], k: int = RRF_K) -> List[int]:
+    """
+    Combina vários rankings com Reciprocal Rank Fusion: cada item soma 1 / (k + posição)
+    em cada ranking em que aparece.
+
+    Args:
+        rankings (List[List[int]]): Listas de IDs, cada uma do mais para o menos relevante.
+        k (int): A constante de suavização do RRF.
+
+    Returns:
+        List[int]: Os IDs ordenados pela pontuação combinada.
+    """
+    fused_scores = {}
+    for ranking in rankings:
+        for position, item_id in enumerate(ranking, start=1):
+            fused_scores[item_id] = fused_scores.get(item_id, 0.0) + 1.0 / (k + position)
+    return sorted(fused_scores, key=lambda item_id: fused_scores[item_id], reverse=True)
+
+def _record(stage: str, start_time: float) -> float:
+    """Registra a duração de uma etapa e retorna o instante atual."""
+    now = time.perf_counter()
+    _latencies[stage].append(now - start_time)
+    return now
+
+# --- Busca ---
+def search_ids(document_key: str, query: str, top_k: int = RETRIEVAL_TOP_K) -> List[int]:
+    """
+    Retorna os IDs dos trechos mais relevantes, fundindo a busca lexical (BM25) e a vetorial.
+
+    Consultas repetidas (após normalização) são respondidas pelo cache. Se o documento não
+    tiver embeddings, apenas a busca lexical é usada.
+
+    Args:
+        document_key (str): Identificador do documento.
+        query (str): A pergunta do usuário.
+        top_k (int): O número máximo de trechos retornados.
+
+    Returns:
+        List[int]: Os IDs dos trechos, do mais para o menos relevante.
+    """
+    total_start = stage_start = time.perf_counter()
+    cache_key = (document_key, normalize_query(query), top_k)
+    with _query_cache_lock:
+        cached_ids = _query_cache.get(cache_key)
+        if cached_ids is not None:
+            _query_cache.move_to_end(cache_key)
+            _cache_stats["hits"] += 1
+        else:
+            _cache_stats["misses"] += 1
+    if cached_ids is not None:
+        _record("cache", stage_start)
+        _record("total", total_start)
+        return cached_ids
+    stage_start = _record("cache", stage_start)
+
+    lexical_ids = [chunk_id for chunk_id, _ in retrieval_index.search_ids(document_key, query, HYBRID_CANDIDATES)]
+    stage_start = _record("lexical", stage_start)
+
+    vector_ids = []
+    if embedding_store.embeddings_exist(document_key):
+        vector_ids = [chunk_id for chunk_id, _ in embedding_store.search_ids(document_key, query, HYBRID_CANDIDATES)]
+    stage_start = _record("vector", stage_start)
+
+    fused_ids = reciprocal_rank_fusion([ranking for ranking in (lexical_ids, vector_ids) if ranking])[:top_k]
+    _record("fusion", stage_start)
+
+    with _query_cache_lock:
+        _query_cache[cache_key] = fused_ids
+        while len(_query_cache) > RETRIEVAL_QUERY_CACHE_SIZE:
+            _query_cache.popitem(last=False) # Remove a consulta usada há mais tempo
+    _record("total", total_start)
+    return fused_ids
+
+def retrieve_context(document_key: str, query: str, token_budget: int = RETRIEVAL_TOKEN_BUDGET, top_k: int = RETRIEVAL_TOP_K) -> List[dict]:
+    """
+    Recupera, pela busca híbrida, os trechos mais relevantes que cabem no orçamento de tokens.
+
+    Returns:
+        List[dict]: Os trechos selecionados, na ordem em que aparecem no documento.
+    """
+    ranked_ids = search_ids(document_key, query, top_k)
+    fetch_start = time.perf_counter()
+    chunks = retrieval_index.select_within_budget(document_key, ranked_ids, token_budget)
+    _record("fetch", fetch_start)
+    return chunks
+
+# --- Estatísticas ---
+def _percentile(sorted_values: list, percentile: float) -> float:
+    """Percentil pelo método do posto mais próximo (nearest-rank)."""
+    rank = max(1, math.ceil(percentile / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def get_latency_percentiles() -> dict:
+    """
+    Retorna os percentis de latência (em milissegundos) de cada etapa da busca.
+
+    Returns:
+        dict: {etapa: {"count", "p50", "p90", "p99"}} para as etapas com medições.
+    """
+    percentiles = {}
+    for stage, samples in _latencies.items():
+        if not samples:
+            continue
+        sorted_samples = sorted(samples)
+        percentiles[stage] = {
+            "count": len(sorted_samples),
+            "p50": _percentile(sorted_samples, 50) * 1000,
+            "p90": _percentile(sorted_samples, 90) * 1000,
+            "p99": _percentile(sorted_samples, 99) * 1000,
+        }
+    return percentiles
+
+def get_cache_stats() -> dict:
+    """Retorna os acertos, falhas e o tamanho atual do cache de consultas."""
+    return dict(_cache_stats, entries=len(_query_cache))
+
+if __name__ == "__main__":
+    print("Testando hybrid_retriever.py...")
+
+    test_key = "documento_de_teste_hibrido"
+    test_pages = [
+        (1, "Introdução às redes de computadores. O modelo OSI possui sete camadas."),
+        (2, "A camada de transporte usa os protocolos TCP e UDP. O TCP garante a entrega ordenada."),
+        (3, "Endereçamento IP: máscaras de sub-rede dividem uma rede em partes menores."),
+    ]
+    retrieval_index.build_index(test_key, test_pages, chunk_tokens=30)
+    embedding_store.build_embeddings(test_key)
+
+    for test_query in ["Quais protocolos a camada de transporte usa?", "quais protocolos a camada de TRANSPORTE usa", "máscara de sub-rede"]:
+        print(f"\nConsulta: {test_query}")
+        for chunk in retrieve_context(test_key, test_query, top_k=2):
+            print(f"- páginas {chunk['first_page']}-{chunk['last_page']}: {chunk['text'][:60]}...")
+
+    print(f"\nCache de consultas: {get_cache_stats()}")
+    for stage, stats in get_latency_percentiles().items():
+        print(f"{stage:<8} n={stats['count']:<3} p50={stats['p50']:.2f}ms p90={stats['p90']:.2f}ms p99={stats['p99']:.2f}ms")
+
+    retrieval_index.delete_index(test_key)
+    print(f"Cache após reindexação/exclusão: {get_cache_stats()}")
@@ -0,0 +1,55 @@
+#migrate_storage.py
+
+"""
+Importa as sessões e os resumos salvos em arquivos JSON (SESSIONS_DIR e SUMMARIES_DIR)
+para o banco SQLite (SQLITE_DB_PATH) ou para os diários de sessão (JOURNAL_DIR).
+Os arquivos JSON originais não são alterados. Com --perfil, usa os caminhos do perfil informado.
+
+Uso:
+    python3 utils/migrate_storage.py
+    python3 utils/migrate_storage.py --banco /caminho/chatbot.sqlite3 --sobrescrever
+    python3 utils/migrate_storage.py --destino journal
+    python3 utils/migrate_storage.py --perfil trabalho
+"""
+
+import os
+import sys
+import argparse
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o módulo é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from utils.profiles import get_profile_paths, validate_profile_name
+from utils.storage_backends import JsonFileBackend, SQLiteBackend, JournalBackend, migrate
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Importa sessões e resumos em JSON para outro backend.")
+    parser.add_argument("--destino", choices=["sqlite", "journal"], default="sqlite", help="Backend de destino.")
+    parser.add_argument("--perfil", type=validate_profile_name,
+                        help="Perfil cujos caminhos são usados por padrão (veja profiles.py).")
+    parser.add_argument("--sessoes", help="Diretório das sessões em JSON.")
+    parser.add_argument("--resumos", help="Diretório dos resumos em JSON.")
+    parser.add_argument("--banco", help="Caminho do banco SQLite de destino.")
+    parser.add_argument("--diarios", help="Diretório dos diários de sessão de destino.")
+    parser.add_argument("--sobrescrever", action="store_true",
+                        help="Substitui sessões e resumos que já existem no banco.")
+    args = parser.parse_args()
+    paths = get_profile_paths(args.perfil)
+    args.sessoes = args.sessoes or paths["sessions"]
+    args.resumos = args.resumos or paths["summaries"]
+    args.banco = args.banco or paths["sqlite"]
+    args.diarios = args.diarios or paths["journal"]
+
+    source = JsonFileBackend(args.sessoes, args.resumos)
+    if args.destino == "sqlite":
+        target = SQLiteBackend(args.banco)
+    else:
+        target = JournalBackend(args.diarios, args.resumos)
+    try:
+        sessions, summaries, skipped = migrate(source, target, overwrite=args.sobrescrever)
+    finally:
+        target.close()
+    print(f"Migração concluída para '{target.storage_path}': {sessions} sessão(ões) e {summaries} resumo(s) importados, "
+          f"{skipped} item(ns) ignorado(s).")
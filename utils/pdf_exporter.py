@@ -3,112 +3,276 @@
 import os
 import sys
 import json
+import hashlib
 import datetime
-from fpdf import FPDF # Importa a classe FPDF
-from typing import Union # Adicionado para 'Union' na delete_exported_pdf
+import threading
+import itertools
+from typing import TYPE_CHECKING, Callable, Union # Adicionado para 'Union' na delete_exported_pdf
+if TYPE_CHECKING:
+    from fpdf import FPDF # Importado sob demanda em _new_document (o fpdf é lento para importar)
 # Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
 # quando o módulo é executado diretamente ou como parte do projeto maior.
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 sys.path.insert(0, project_root)
 
 # Importa as configurações de caminhos do config.py
-from config.config import EXPORTS_DIR, DEFAULT_SESSION_NAME # Importamos EXPORTS_DIR e DEFAULT_SESSION_NAME
+from config.config import DEFAULT_SESSION_NAME, EXPORT_MESSAGES_PER_FILE
+from utils.chat_history import ChatHistory
+from utils import profiles
+from utils.session_manager import validate_session_name
+from utils.file_locks import locked, lock_path_for
 
 # --- Funções Auxiliares ---
 def _ensure_dir_exists(directory_path: str):
     """Garante que um diretório exista. Se não existir, ele é criado."""
     os.makedirs(directory_path, exist_ok=True)
 
+def validate_export_filename(file_name: str) -> str:
+    """
+    Retorna o nome do arquivo de export, ou levanta ValueError se ele não for um nome de arquivo simples
+    (com separadores de caminho ou começando com '.'), que poderia apontar para fora do diretório da sessão.
+    """
+    if not file_name or os.path.basename(file_name) != file_name or file_name.startswith('.') or '\\' in file_name:
+        raise ValueError(f"Nome de export inválido: '{file_name}'.")
+    return file_name
+
+def _exports_dir() -> str:
+    """Retorna o diretório de exports do perfil da thread atual (veja profiles.py)."""
+    return profiles.get_profile_paths()["exports"]
+
+def _temp_path(path: str) -> str:
+    """Caminho temporário exclusivo deste processo e thread, para gravar e depois renomear sobre `path`."""
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
 def _get_export_path(session_name: str, export_name: str) -> str:
     """
     Retorna o caminho completo para o arquivo PDF exportado dentro da sessão.
     Os exports são organizados em subdiretórios por nome de sessão.
     """
-    session_export_dir = os.path.join(EXPORTS_DIR, session_name)
+    session_export_dir = os.path.join(_exports_dir(), validate_session_name(session_name))
     _ensure_dir_exists(session_export_dir)
-    return os.path.join(session_export_dir, export_name) # Removido o ".pdf" extra aqui
+    return os.path.join(session_export_dir, validate_export_filename(export_name)) # Removido o ".pdf" extra aqui
 
-# --- Funções de Gerenciamento de Exportação de Chat ---
-def export_chat_to_pdf(chat_history: list, session_name: str, export_name: str) -> str:
+# --- Exportação Incremental ---
+# Arquivo (por sessão) que registra, para cada nome de export, quantas mensagens já foram exportadas
+# e a impressão digital da última delas. Um export incremental renderiza só as mensagens seguintes.
+EXPORT_STATE_FILENAME = ".export_state.json"
+
+def _message_fingerprint(message: dict) -> str:
+    """Retorna uma impressão digital (SHA-256) estável de uma mensagem."""
+    return hashlib.sha256(json.dumps(message, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def _get_export_state_path(session_name: str) -> str:
+    session_export_dir = os.path.join(_exports_dir(), validate_session_name(session_name))
+    _ensure_dir_exists(session_export_dir)
+    return os.path.join(session_export_dir, EXPORT_STATE_FILENAME)
+
+def _export_lock(session_name: str, name: str) -> str:
     """
-    Exporta o histórico completo de um chat para um arquivo PDF.
+    Arquivo de lock de um recurso de exportação da sessão: um nome de export (export_chat_to_pdf)
+    ou o registro de exports (EXPORT_STATE_FILENAME).
     """
-    #print(f"DEBUG: export_chat_to_pdf iniciado. session_name: {session_name}, export_name: {export_name}") # Print de depuração
+    return lock_path_for(os.path.dirname(_get_export_state_path(session_name)), name)
 
-    if not chat_history:
-        #print("DEBUG: Histórico do chat vazio.") # Print de depuração
-        return "O histórico do chat está vazio. Nada para exportar."
-
-    # ESTA É A LINHA CRUCIAL QUE PRECISA SER ADICIONADA OU VERIFICADA!
-    # Ela limpa o nome do export e atribui à variável base_name_cleaned.
+def _load_export_state(session_name: str) -> dict:
+    """Carrega o registro de exports da sessão (vazio se não existir ou estiver inválido)."""
+    state_path = _get_export_state_path(session_name)
+    if not os.path.exists(state_path):
+        return {}
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else {}
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def _save_export_state(session_name: str, state: dict):
+    """Grava o registro de exports da sessão de forma atômica (arquivo temporário + renomeação)."""
+    state_path = _get_export_state_path(session_name)
+    temp_path = _temp_path(state_path)
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=4, ensure_ascii=False)
+    os.replace(temp_path, state_path)
+
+def _clean_export_name(export_name: str) -> str:
+    """Remove caracteres inválidos e a extensão .pdf do nome do export (pode retornar string vazia)."""
     base_name_cleaned = "".join(c for c in export_name if c.isalnum() or c in (' ', '_', '-')).strip()
-    #print(f"DEBUG: base_name_cleaned após limpeza inicial: '{base_name_cleaned}'") # Print de depuração
-
-    # 1. Garante que o nome base não tenha .pdf extra
-    # Agora, base_name_cleaned EXISTE ANTES DE SER USADA aqui.
+    # Garante que o nome base não tenha .pdf extra
     if base_name_cleaned.lower().endswith(".pdf"):
-        #print(f"DEBUG: '{base_name_cleaned}' termina com .pdf, removendo a extensão.") # Print de depuração
         base_name_cleaned = base_name_cleaned[:-4] # Remove a última ".pdf"
-        #print(f"DEBUG: base_name_cleaned após remover .pdf extra: '{base_name_cleaned}'") # Print de depuração
+    return base_name_cleaned
+
+# --- Renderização ---
+# A cada quantas mensagens renderizadas o progresso é informado (veja progress_callback).
+EXPORT_PROGRESS_INTERVAL = 50
+
+def _new_document(session_name: str, export_filename: str, subtitle: str = None) -> "FPDF":
+    """Cria um documento com o cabeçalho do export."""
+    from fpdf import FPDF
+    pdf = FPDF()
+    pdf.set_auto_page_break(auto=True, margin=15) # Adicionado para melhor quebra de página
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+
+    pdf.multi_cell(0, 10, f"Documentação da Interação - Sessão: {session_name}\n")
+    pdf.multi_cell(0, 10, f"Nome do Export: {export_filename}\n\n")
+    if subtitle:
+        pdf.multi_cell(0, 10, f"{subtitle}\n")
+    return pdf
+
+def _render_message(pdf: "FPDF", message: dict):
+    """Adiciona uma mensagem do chat ao documento."""
+    role = message.get("role", "unknown").capitalize()
+    content = message.get("content", "")
+
+    # Formatação melhorada para usuário e assistente
+    if role == "User":
+        pdf.set_font("Arial", "B", 12) # Negrito para usuário
+        pdf.write(5, f"Você: ")
+        pdf.set_font("Arial", size=12) # Volta à fonte normal
+        pdf.multi_cell(0, 5, content)
+    elif role == "Assistant":
+        pdf.set_font("Arial", "B", 12) # Negrito para bot
+        pdf.write(5, f"Bot: ")
+        pdf.set_font("Arial", size=12) # Volta à fonte normal
+        pdf.multi_cell(0, 5, content)
+    else: # Para outros papéis desconhecidos
+        pdf.multi_cell(0, 5, f"{role}: {content}")
+
+    pdf.ln(2) # Pequena quebra de linha entre mensagens para melhor leitura
+
+def _render_to_files(chat_history, start: int, session_name: str, base_filename: str, subtitle: str = None,
+                     progress_callback: Callable[[int, int], None] = None) -> list:
+    """
+    Renderiza as mensagens chat_history[start:] em um ou mais PDFs e retorna os caminhos gravados.
+
+    As mensagens são lidas uma a uma (um ChatHistory lê as antigas do armazenamento sob demanda) e,
+    a cada EXPORT_MESSAGES_PER_FILE mensagens, o documento é gravado e liberado, de modo que o pico de
+    memória depende do tamanho de cada arquivo, e não do tamanho da sessão.
+    Se progress_callback for informado, ele é chamado periodicamente com (mensagens_renderizadas, total).
+    """
+    total = len(chat_history) - start
+    split = 0 < EXPORT_MESSAGES_PER_FILE < total
+    part_number = 1
+    paths = []
+    pdf = None
+    messages_in_part = 0
+    rendered = 0
+
+    def finish_part():
+        filename = f"{base_filename}_parte{part_number:02d}.pdf" if split else f"{base_filename}.pdf"
+        pdf_path = _get_export_path(session_name, filename)
+        # Grava em um arquivo temporário e renomeia: quem listar os exports nunca vê um PDF pela metade
+        temp_path = _temp_path(pdf_path)
+        try:
+            pdf.output(temp_path)
+            os.replace(temp_path, pdf_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        paths.append(pdf_path)
+
+    if isinstance(chat_history, ChatHistory):
+        messages = chat_history.iter_from(start) # Lê as páginas antigas sem mantê-las no histórico
+    else:
+        messages = itertools.islice(chat_history, start, None)
+    for message in messages:
+        if pdf is None:
+            filename = f"{base_filename}_parte{part_number:02d}.pdf" if split else f"{base_filename}.pdf"
+            part_subtitle = subtitle
+            if split:
+                part_subtitle = f"{subtitle + ' - ' if subtitle else ''}Parte {part_number}"
+            pdf = _new_document(session_name, filename, part_subtitle)
+        # Ignora a mensagem do sistema para a exportação, pois ela é fixa e não parte da interação dinâmica
+        if message.get("role") != "system":
+            _render_message(pdf, message)
+        messages_in_part += 1
+        rendered += 1
+        if progress_callback and rendered % EXPORT_PROGRESS_INTERVAL == 0:
+            progress_callback(rendered, total)
+        if split and messages_in_part >= EXPORT_MESSAGES_PER_FILE:
+            finish_part()
+            pdf = None
+            messages_in_part = 0
+            part_number += 1
+    if pdf is not None:
+        finish_part()
+    if progress_callback:
+        progress_callback(rendered, total)
+    return paths
+
+# --- Funções de Gerenciamento de Exportação de Chat ---
+def export_chat_to_pdf(chat_history: list, session_name: str, export_name: str, incremental: bool = False,
+                       progress_callback: Callable[[int, int], None] = None) -> str:
+    """
+    Exporta o histórico de um chat para um arquivo PDF.
+
+    No modo incremental, apenas as mensagens adicionadas desde o último export com o mesmo nome
+    são renderizadas, em um PDF de continuação. Se não houver export anterior com esse nome, ou se o
+    histórico foi reescrito desde então (ex: /limpar), o histórico completo é exportado.
+    Sessões com mais de EXPORT_MESSAGES_PER_FILE mensagens são divididas em vários arquivos (partes).
+    Exports com o mesmo nome na mesma sessão são feitos um de cada vez, mesmo entre processos.
+
+    Args:
+        chat_history (list): O histórico do chat (uma lista ou um ChatHistory).
+        session_name (str): O nome da sessão (os exports são organizados por sessão).
+        export_name (str): O nome base do arquivo exportado.
+        incremental (bool): Se True, exporta apenas as mensagens novas desde o último export com esse nome.
+        progress_callback (Callable, optional): Chamada periodicamente com (mensagens_renderizadas, total).
+
+    Returns:
+        str: Uma mensagem descrevendo o resultado.
+    """
+    if not chat_history:
+        return "O histórico do chat está vazio. Nada para exportar."
 
+    base_name_cleaned = _clean_export_name(export_name)
     # Adicione uma verificação para nome vazio após a limpeza
     if not base_name_cleaned:
-        #print("DEBUG: base_name_cleaned está vazia após a limpeza. Retornando erro.") # Print de depuração
         return "Erro: O nome do arquivo exportado não pode ser vazio ou conter apenas caracteres inválidos após a limpeza."
 
-    # 2. Adiciona o timestamp para garantir um nome de arquivo único
+    # Adiciona o timestamp para garantir um nome de arquivo único
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    #print(f"DEBUG: Timestamp gerado: {timestamp}") # Print de depuração
-
-    # 3. Constrói o nome de arquivo final, com o nome limpo, timestamp e UMA extensão .pdf
-    final_export_filename = f"{base_name_cleaned}_{timestamp}.pdf"
-    #print(f"DEBUG: Nome final do arquivo exportado: '{final_export_filename}'") # Print de depuração
-
-    # 4. Chama _get_export_path com o nome de arquivo FINAL e COMPLETO
-    pdf_path = _get_export_path(session_name, final_export_filename)
-    #print(f"DEBUG: Caminho completo para o PDF: '{pdf_path}'") # Print de depuração
 
     try:
-        pdf = FPDF()
-        pdf.set_auto_page_break(auto=True, margin=15) # Adicionado para melhor quebra de página
-        pdf.add_page()
-        pdf.set_font("Arial", size=12)
-
-        pdf.multi_cell(0, 10, f"Documentação da Interação - Sessão: {session_name}\n")
-        pdf.multi_cell(0, 10, f"Nome do Export: {final_export_filename}\n\n")
-
-        # Itera sobre o histórico do chat
-        for message in chat_history:
-            role = message.get("role", "unknown").capitalize()
-            content = message.get("content", "")
-
-            # Ignora a mensagem do sistema para a exportação, pois ela é fixa e não parte da interação dinâmica
-            if role.lower() == "system":
-                continue
-
-            # Formatação melhorada para usuário e assistente
-            if role == "User":
-                pdf.set_font("Arial", "B", 12) # Negrito para usuário
-                pdf.write(5, f"Você: ")
-                pdf.set_font("Arial", size=12) # Volta à fonte normal
-                pdf.multi_cell(0, 5, content)
-            elif role == "Assistant":
-                pdf.set_font("Arial", "B", 12) # Negrito para bot
-                pdf.write(5, f"Bot: ")
-                pdf.set_font("Arial", size=12) # Volta à fonte normal
-                pdf.multi_cell(0, 5, content)
-            else: # Para outros papéis desconhecidos
-                pdf.multi_cell(0, 5, f"{role}: {content}")
-            
-            pdf.ln(2) # Pequena quebra de linha entre mensagens para melhor leitura
-
-        pdf.output(pdf_path)
-        #print(f"DEBUG: PDF gerado com sucesso em '{pdf_path}'") # Print de depuração
-        return f"Histórico do chat exportado com sucesso para: {pdf_path}"
+        with locked(_export_lock(session_name, base_name_cleaned)):
+            export_state = _load_export_state(session_name)
+            previous = export_state.get(base_name_cleaned)
+            start = 0
+            subtitle = None
+            if incremental and previous:
+                exported_count = previous.get("exported_count", 0)
+                if (0 < exported_count <= len(chat_history)
+                        and _message_fingerprint(chat_history[exported_count - 1]) == previous.get("last_message")):
+                    if exported_count == len(chat_history):
+                        return f"Nenhuma mensagem nova desde o último export '{base_name_cleaned}'. Nada para exportar."
+                    start = exported_count
+                    subtitle = f"Continuação: mensagens {start + 1} a {len(chat_history)}"
+                else:
+                    print(f"O histórico mudou desde o último export '{base_name_cleaned}'. Exportando o histórico completo.")
+
+            # Nome de arquivo final: nome limpo, marcador de continuação (se houver), timestamp e extensão .pdf
+            base_filename = f"{base_name_cleaned}_continuacao_{timestamp}" if start else f"{base_name_cleaned}_{timestamp}"
+            paths = _render_to_files(chat_history, start, session_name, base_filename, subtitle, progress_callback)
+
+            entry = {
+                "exported_count": len(chat_history),
+                "last_message": _message_fingerprint(chat_history[len(chat_history) - 1]),
+                "files": (previous.get("files", []) if start else []) + [os.path.basename(path) for path in paths],
+                "timestamp": timestamp
+            }
+            # Relê o registro: outros nomes de export da sessão podem ter sido gravados enquanto este renderizava
+            with locked(_export_lock(session_name, EXPORT_STATE_FILENAME)):
+                export_state = _load_export_state(session_name)
+                export_state[base_name_cleaned] = entry
+                _save_export_state(session_name, export_state)
+
+            if start:
+                return f"{len(chat_history) - start} mensagem(ns) nova(s) exportada(s) para: {', '.join(paths)}"
+            return f"Histórico do chat exportado com sucesso para: {', '.join(paths)}"
     except Exception as e:
         import traceback # Para depuração
         traceback.print_exc() # Mostra o erro completo no console para depuração
-        #print(f"DEBUG: Erro na exportação do PDF: {e}") # Print de depuração
         return f"Erro ao exportar chat para PDF: {e}"
 
 def list_exported_pdfs(session_name: str = None) -> list:
@@ -116,20 +280,21 @@ def list_exported_pdfs(session_name: str = None) -> list:
     Lista todos os PDFs de interações exportados.
     Se session_name for fornecido, lista apenas os exports daquela sessão.
     """
-    _ensure_dir_exists(EXPORTS_DIR) # Garante que o diretório base exista
+    exports_dir = _exports_dir()
+    _ensure_dir_exists(exports_dir) # Garante que o diretório base exista
 
     exported_files = []
     if session_name:
         # Lista exports para uma sessão específica
-        session_export_dir = os.path.join(EXPORTS_DIR, session_name)
+        session_export_dir = os.path.join(exports_dir, validate_session_name(session_name))
         if os.path.exists(session_export_dir):
             for filename in os.listdir(session_export_dir):
                 if filename.endswith(".pdf"):
                     exported_files.append(f"{session_name}/{filename}")
     else:
         # Lista todos os exports de todas as sessões
-        for session_dir in os.listdir(EXPORTS_DIR):
-            session_path = os.path.join(EXPORTS_DIR, session_dir)
+        for session_dir in os.listdir(exports_dir):
+            session_path = os.path.join(exports_dir, session_dir)
             if os.path.isdir(session_path):
                 for filename in os.listdir(session_path):
                     if filename.endswith(".pdf"):
@@ -162,7 +327,7 @@ def delete_exported_pdf(session_name: str, export_name: str) -> bool:
             os.remove(pdf_path)
             #print(f"DEBUG (delete_exported_pdf): Arquivo removido: '{pdf_path}'")
             # Tenta remover o diretório da sessão se estiver vazio
-            session_export_dir = os.path.join(EXPORTS_DIR, session_name)
+            session_export_dir = os.path.join(_exports_dir(), session_name)
             if not os.listdir(session_export_dir): # Verifica se o diretório está vazio
                 #print(f"DEBUG (delete_exported_pdf): Diretório da sessão vazio, tentando remover: '{session_export_dir}'")
                 os.rmdir(session_export_dir)
@@ -180,7 +345,7 @@ if __name__ == "__main__":
     print("Testando pdf_exporter.py...")
 
     # Certifica-se que o diretório de exports existe para o teste
-    _ensure_dir_exists(EXPORTS_DIR)
+    _ensure_dir_exists(_exports_dir())
 
     test_session = "TESTE_SESSAO_EXPORT"
     test_export_name = "Interacao_Exemplo"
@@ -202,6 +367,10 @@ if __name__ == "__main__":
     export_result_2 = export_chat_to_pdf([{"role": "user", "content": "Mais um teste"}], test_session, test_export_name_2)
     print(export_result_2)
 
+    print("\n--- Teste de Exportação Incremental ---")
+    test_chat_history.append({"role": "user", "content": "E a exportação incremental?"})
+    print(export_chat_to_pdf(test_chat_history, test_session, test_export_name, incremental=True))
+
     print("\n--- Teste de Listagem (sessão específica) ---")
     listed_for_session = list_exported_pdfs(test_session)
     print(f"Exports para '{test_session}': {listed_for_session}")
@@ -230,7 +399,7 @@ if __name__ == "__main__":
     print(f"Todos os Exports Após Exclusão: {all_listed_after_delete}")
 
     # Limpeza final do diretório de teste, se estiver vazio
-    test_session_export_dir = os.path.join(EXPORTS_DIR, test_session)
+    test_session_export_dir = os.path.join(_exports_dir(), test_session)
     if os.path.exists(test_session_export_dir) and not os.listdir(test_session_export_dir):
         try:
             os.rmdir(test_session_export_dir)
@@ -2,38 +2,135 @@
 
 import sys
 import os
-import PyPDF2
+import itertools
+import collections
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Tuple
 
 # Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
 # quando o módulo é executado diretamente.
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 sys.path.insert(0, project_root)
 
-# Importa as configurações do config.py (apenas para exemplo de uso de caminhos, não diretamente necessário para extração)
-from config.config import PDFS_DIR
+# Importa as configurações do config.py (caminhos e parâmetros da extração paralela)
+from config.config import PDFS_DIR, PDF_EXTRACTION_WORKERS, PDF_PARALLEL_MIN_PAGES
 
-def extract_text_from_pdf(pdf_path: str) -> str:
+# O PyPDF2 é importado apenas quando um PDF é lido, para não atrasar a inicialização do chatbot.
+
+# Revisão do extrator. Faz parte da chave do cache de extração: altere-a sempre que a
+# forma de extrair o texto mudar, para que textos antigos no cache não sejam reutilizados.
+EXTRACTOR_REVISION = 1
+
+def get_extractor_version() -> str:
+    """Retorna a versão do extrator (versão do PyPDF2 + EXTRACTOR_REVISION), usada na chave do cache de extração."""
+    import PyPDF2
+    return f"pypdf2-{PyPDF2.__version__}-{EXTRACTOR_REVISION}"
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> List[str]:
     """
-    Extrai todo o texto de um arquivo PDF.
+    Extrai o texto das páginas no intervalo [start, end) de um PDF.
+
+    Executada dentro dos processos do pool: cada processo abre o seu próprio leitor,
+    pois objetos PdfReader não podem ser compartilhados entre processos.
+    """
+    import PyPDF2
+    with open(pdf_path, 'rb') as file:
+        reader = PyPDF2.PdfReader(file)
+        return [reader.pages[page_num].extract_text() or "" for page_num in range(start, end)]
+
+def _iter_pdf_pages_parallel(pdf_path: str, num_pages: int, workers: int) -> Iterator[Tuple[int, str]]:
+    """
+    Distribui faixas de páginas entre um ProcessPoolExecutor e devolve as páginas em ordem.
+
+    As faixas são menores que num_pages / workers para equilibrar a carga entre os processos.
+    No máximo `workers` faixas ficam em andamento ou prontas à espera do consumidor: a próxima só é
+    enviada quando uma é consumida, então o texto em memória fica limitado a algumas faixas, e não ao
+    documento inteiro. Se o consumidor parar de iterar, as faixas ainda não iniciadas são canceladas.
+    """
+    shard_size = max(1, -(-num_pages // (workers * 4))) # Divisão com arredondamento para cima
+    page_ranges = iter([(start, min(start + shard_size, num_pages)) for start in range(0, num_pages, shard_size)])
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    in_flight = collections.deque() # (início da faixa, future), na ordem das páginas
+    try:
+        for start, end in itertools.islice(page_ranges, workers):
+            in_flight.append((start, executor.submit(_extract_page_range, pdf_path, start, end)))
+        while in_flight:
+            start, future = in_flight.popleft()
+            pages = future.result()
+            next_range = next(page_ranges, None)
+            if next_range: # Repõe a faixa consumida
+                in_flight.append((next_range[0], executor.submit(_extract_page_range, pdf_path, *next_range)))
+            for offset, page_text in enumerate(pages):
+                yield start + offset + 1, page_text
+            del pages
+    finally:
+        for _, future in in_flight:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+def iter_pdf_pages(pdf_path: str, workers: int = None, strict: bool = False) -> Iterator[Tuple[int, str]]:
+    """
+    Extrai o texto de um arquivo PDF página por página, de forma preguiçosa (lazy).
+
+    Cada página é lida e extraída somente quando o consumidor pede o próximo item,
+    então o pico de memória fica limitado a aproximadamente uma página mais o que
+    o consumidor decidir manter.
+
+    Documentos com pelo menos PDF_PARALLEL_MIN_PAGES páginas são extraídos em paralelo
+    por vários processos; as páginas continuam sendo entregues na ordem original.
 
     Args:
         pdf_path (str): O caminho completo para o arquivo PDF.
+        workers (int, optional): Número de processos para a extração paralela.
+                                 Se None, usa PDF_EXTRACTION_WORKERS. Use 1 para forçar o modo sequencial.
+        strict (bool): Se True, erros de leitura ou extração são levantados em vez de apenas informados
+                       (útil para quem precisa saber se o documento foi lido até a última página).
 
-    Returns:
-        str: O conteúdo de texto extraído do PDF, ou uma string vazia se houver um erro.
+    Yields:
+        Tuple[int, str]: Pares (numero_da_pagina, texto), com a numeração começando em 1.
+                         Páginas sem texto extraível geram uma string vazia.
     """
     if not os.path.exists(pdf_path):
         print(f"Erro: O arquivo PDF não foi encontrado em '{pdf_path}'")
-        return ""
+        return
+
+    if workers is None:
+        workers = PDF_EXTRACTION_WORKERS
 
-    text = ""
     try:
+        import PyPDF2
         with open(pdf_path, 'rb') as file:
             reader = PyPDF2.PdfReader(file)
-            for page_num in range(len(reader.pages)):
-                page = reader.pages[page_num]
-                text += page.extract_text() or "" # Adiciona o texto da página, garantindo que não seja None
-        return text
+            num_pages = len(reader.pages)
+            if workers <= 1 or num_pages < PDF_PARALLEL_MIN_PAGES:
+                # Documento pequeno: o custo de iniciar o pool não compensa
+                for page_num, page in enumerate(reader.pages, start=1):
+                    yield page_num, page.extract_text() or "" # Garante que não seja None
+                return
+        yield from _iter_pdf_pages_parallel(pdf_path, num_pages, workers)
+    except Exception as e:
+        if strict:
+            raise
+        print(f"Erro ao extrair texto do PDF '{pdf_path}': {e}")
+
+def extract_text_from_pdf(pdf_path: str, workers: int = None) -> str:
+    """
+    Extrai todo o texto de um arquivo PDF.
+
+    Mantida por compatibilidade: consome iter_pdf_pages e junta as páginas
+    uma única vez no final (sem concatenações repetidas dentro do loop).
+    Como antes, o resultado é tudo ou nada: um erro em qualquer página descarta as já extraídas.
+
+    Args:
+        pdf_path (str): O caminho completo para o arquivo PDF.
+        workers (int, optional): Número de processos para a extração paralela (veja iter_pdf_pages).
+
+    Returns:
+        str: O conteúdo de texto extraído do PDF, ou uma string vazia se houver um erro.
+    """
+    try:
+        return "".join(text for _, text in iter_pdf_pages(pdf_path, workers, strict=True))
     except Exception as e:
         print(f"Erro ao extrair texto do PDF '{pdf_path}': {e}")
         return ""
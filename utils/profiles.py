@@ -0,0 +1,96 @@
+# profiles.py
+
+"""
+Perfis: cada perfil tem as suas próprias sessões, resumos e exports, em PROFILES_DIR/<perfil>.
+Os caches (extração de texto, respostas da API e índices de busca) são compartilhados entre os
+perfis, pois são indexados pelo conteúdo.
+
+O perfil é escolhido na inicialização (--perfil ou a variável de ambiente CHATBOT_PERFIL) e pode
+ser trocado apenas na thread atual com use_profile (ex: uma conexão do servidor com ?perfil=).
+"""
+
+import os
+import re
+import sys
+import threading
+import contextlib
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o módulo é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from config.config import (
+    PROFILES_DIR, DEFAULT_PROFILE, SESSIONS_DIR, SUMMARIES_DIR, EXPORTS_DIR, JOURNAL_DIR, SQLITE_DB_PATH
+)
+
+# Nomes de perfil aceitos (são usados como nomes de diretório)
+PROFILE_NAME_PATTERN = re.compile(r"^\w[\w.-]{0,63}$")
+
+_default_profile = DEFAULT_PROFILE
+_current = threading.local()
+
+def validate_profile_name(profile: str) -> str:
+    """Retorna o nome do perfil, ou levanta ValueError se ele não puder ser usado como nome de diretório."""
+    if not isinstance(profile, str) or not PROFILE_NAME_PATTERN.match(profile):
+        raise ValueError(f"Nome de perfil inválido: '{profile}'. Use letras, números, '_', '-' ou '.'.")
+    return profile
+
+def set_default_profile(profile: str):
+    """Define o perfil usado por todas as threads que não escolheram outro (ex: --perfil na inicialização)."""
+    global _default_profile
+    _default_profile = validate_profile_name(profile)
+
+def get_current_profile() -> str:
+    """Retorna o perfil da thread atual (ou o perfil padrão)."""
+    return getattr(_current, "profile", None) or _default_profile
+
+@contextlib.contextmanager
+def use_profile(profile: str = None):
+    """Usa o perfil informado na thread atual durante o bloco (None mantém o perfil atual)."""
+    previous = getattr(_current, "profile", None)
+    _current.profile = validate_profile_name(profile) if profile else previous
+    try:
+        yield
+    finally:
+        _current.profile = previous
+
+def get_profile_paths(profile: str = None) -> dict:
+    """
+    Retorna os caminhos de armazenamento de um perfil (por padrão, o da thread atual):
+    "sessions", "summaries", "exports", "journal" e "sqlite".
+
+    O perfil padrão usa os caminhos configurados em config.py; os demais seguem a mesma estrutura.
+    """
+    profile = validate_profile_name(profile or get_current_profile())
+    if profile == DEFAULT_PROFILE:
+        return {"sessions": SESSIONS_DIR, "summaries": SUMMARIES_DIR, "exports": EXPORTS_DIR,
+                "journal": JOURNAL_DIR, "sqlite": SQLITE_DB_PATH}
+    profile_dir = os.path.join(PROFILES_DIR, profile)
+    return {
+        "sessions": os.path.join(profile_dir, 'sessions'),
+        "summaries": os.path.join(profile_dir, 'summaries'),
+        "exports": os.path.join(profile_dir, 'exports'),
+        "journal": os.path.join(profile_dir, 'journal'),
+        "sqlite": os.path.join(profile_dir, 'chatbot.sqlite3'),
+    }
+
+def list_profiles() -> list:
+    """Lista os perfis existentes (diretórios em PROFILES_DIR), incluindo o perfil atual."""
+    os.makedirs(PROFILES_DIR, exist_ok=True)
+    names = {name for name in os.listdir(PROFILES_DIR)
+             if os.path.isdir(os.path.join(PROFILES_DIR, name)) and PROFILE_NAME_PATTERN.match(name)}
+    names.add(get_current_profile())
+    return sorted(names)
+
+if __name__ == "__main__":
+    print("Testando profiles.py...")
+    print(f"Perfil atual: {get_current_profile()}")
+    print(f"Perfis existentes: {list_profiles()}")
+    with use_profile("perfil_teste"):
+        print(f"Dentro de use_profile: {get_current_profile()} -> {get_profile_paths()['sessions']}")
+    print(f"Depois de use_profile: {get_current_profile()}")
+    try:
+        validate_profile_name("../fora")
+    except ValueError as e:
+        print(f"Nome rejeitado: {e}")
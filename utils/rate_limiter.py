@@ -0,0 +1,173 @@
+#rate_limiter.py
+
+import os
+import sys
+import time
+import random
+import asyncio
+import threading
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o módulo é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from config.config import (
+    API_RETRY_BASE_DELAY, API_RETRY_MAX_DELAY, API_REQUESTS_PER_MINUTE, API_TOKENS_PER_MINUTE
+)
+
+class TokenBucket:
+    """
+    Balde de fichas (token bucket) seguro para uso entre threads.
+
+    O balde começa cheio com `capacity` fichas e é reabastecido continuamente a
+    `refill_per_second` fichas por segundo. Cada consumo retira fichas; se não houver
+    fichas suficientes, quem chamou espera o tempo necessário para o reabastecimento.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self._available = float(capacity)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, amount: float) -> float:
+        """Retira `amount` fichas (podendo deixar o saldo negativo) e retorna quantos segundos esperar."""
+        amount = min(float(amount), self.capacity) # Um pedido maior que o balde nunca seria atendido
+        with self._lock:
+            now = time.monotonic()
+            self._available = min(self.capacity, self._available + (now - self._last_refill) * self.refill_per_second)
+            self._last_refill = now
+            self._available -= amount
+            if self._available >= 0:
+                return 0.0
+            return -self._available / self.refill_per_second
+
+    def acquire(self, amount: float = 1) -> float:
+        """
+        Consome fichas, bloqueando a thread até que estejam disponíveis.
+
+        Returns:
+            float: O tempo (em segundos) que foi preciso esperar.
+        """
+        wait_time = self._reserve(amount)
+        if wait_time > 0:
+            time.sleep(wait_time)
+        return wait_time
+
+    async def acquire_async(self, amount: float = 1) -> float:
+        """Versão assíncrona de acquire: espera com asyncio.sleep, sem bloquear o event loop."""
+        wait_time = self._reserve(amount)
+        if wait_time > 0:
+            await asyncio.sleep(wait_time)
+        return wait_time
+
+class RateLimiter:
+    """
+    Limitador do lado do cliente para as cotas de requisições/minuto e tokens/minuto da API.
+    """
+
+    def __init__(self, requests_per_minute: int = API_REQUESTS_PER_MINUTE, tokens_per_minute: int = API_TOKENS_PER_MINUTE):
+        self.requests_bucket = TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+        self.tokens_bucket = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+
+    def acquire(self, estimated_tokens: int) -> float:
+        """Aguarda até que a requisição caiba nas duas cotas. Retorna o tempo total de espera."""
+        return self.requests_bucket.acquire(1) + self.tokens_bucket.acquire(estimated_tokens)
+
+    async def acquire_async(self, estimated_tokens: int) -> float:
+        """Versão assíncrona de acquire."""
+        return await self.requests_bucket.acquire_async(1) + await self.tokens_bucket.acquire_async(estimated_tokens)
+
+def get_retry_after(error: Exception) -> float or None:
+    """
+    Lê o tempo de espera sugerido pela API (cabeçalhos 'retry-after-ms' ou 'retry-after') de um erro.
+
+    Returns:
+        float or None: O tempo em segundos, ou None se o erro não trouxer essa informação.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass # Retry-After em formato de data HTTP não é suportado; usa o backoff padrão
+    return None
+
+def compute_backoff_delay(attempt: int, retry_after: float = None,
+                          base_delay: float = API_RETRY_BASE_DELAY, max_delay: float = API_RETRY_MAX_DELAY) -> float:
+    """
+    Calcula a espera antes de uma nova tentativa: backoff exponencial com jitter completo.
+
+    Args:
+        attempt (int): O número da tentativa que falhou (começando em 1).
+        retry_after (float, optional): Tempo sugerido pela API; quando presente, é o tempo mínimo de espera.
+        base_delay (float): A espera base, em segundos.
+        max_delay (float): A espera máxima, em segundos.
+
+    Returns:
+        float: O tempo de espera em segundos.
+    """
+    delay = random.uniform(0, min(max_delay, base_delay * (2 ** (attempt - 1))))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, max_delay))
+    return delay
+
+if __name__ == "__main__":
+    print("Testando rate_limiter.py...")
+
+    # --- Teste do balde de fichas ---
+    bucket = TokenBucket(capacity=5, refill_per_second=10)
+    start = time.monotonic()
+    for _ in range(10):
+        bucket.acquire(1)
+    print(f"10 consumos em um balde de 5 fichas (10/s): {time.monotonic() - start:.2f}s (esperado ~0.5s)")
+
+    # --- Teste do backoff ---
+    print("Esperas de backoff (tentativas 1 a 5):", [round(compute_backoff_delay(n), 2) for n in range(1, 6)])
+
+    # --- Teste contra um servidor local simulado ---
+    # O servidor responde 429 (com Retry-After) nas duas primeiras requisições e depois responde normalmente.
+    import json
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    class StubOpenAIHandler(BaseHTTPRequestHandler):
+        requests_seen = 0
+
+        def do_POST(self):
+            StubOpenAIHandler.requests_seen += 1
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if StubOpenAIHandler.requests_seen <= 2:
+                body = json.dumps({"error": {"message": "Rate limit", "type": "requests"}}).encode()
+                self.send_response(429)
+                self.send_header("Retry-After", "0.2")
+            else:
+                body = json.dumps({
+                    "id": "stub", "object": "chat.completion", "created": 0, "model": "stub",
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": "Resposta do servidor simulado."}}]
+                }).encode()
+                self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), StubOpenAIHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{server.server_port}/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "chave-de-teste")
+
+    from utils import api_service
+    response = api_service.get_openai_completion([{"role": "user", "content": "Olá"}])
+    print(f"Resposta após {StubOpenAIHandler.requests_seen} requisições ao servidor simulado: {response!r}")
+    server.shutdown()
@@ -0,0 +1,326 @@
+#retrieval_index.py
+
+import os
+import re
+import sys
+import json
+import math
+import shutil
+import threading
+import unicodedata
+from collections import Counter
+from typing import Iterable, Iterator, List, Tuple
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o módulo é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from config.config import INDEXES_DIR, RETRIEVAL_CHUNK_TOKENS, RETRIEVAL_TOP_K, RETRIEVAL_TOKEN_BUDGET
+from utils import token_utils
+
+# Versão do formato do índice; índices com outra versão são reconstruídos.
+INDEX_FORMAT_VERSION = 1
+
+# Parâmetros do BM25.
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Palavras muito comuns que não ajudam a diferenciar trechos.
+STOPWORDS = frozenset("""
+a ao aos as com como da das de do dos e ela ele em entre era essa esse esta este eu foi ha isso
+isto ja la lhe mais mas me mesmo meu minha muito na nas nao nem no nos o os ou para pela pelas
+pelo pelos por qual quando que quem se sem seu sua suas seus so sobre tambem te tem ser um uma
+umas uns voce the of and to in is for on
+""".split())
+
+# Índices já carregados neste processo, por chave de documento.
+_loaded_indexes = {}
+
+# Funções chamadas sempre que o índice de um documento é reconstruído ou excluído
+# (ex: para invalidar caches de resultados de busca).
+_reindex_listeners = []
+
+def register_reindex_listener(listener):
+    """Registra uma função `listener(document_key)` chamada quando um documento é reindexado."""
+    if listener not in _reindex_listeners:
+        _reindex_listeners.append(listener)
+
+def notify_reindexed(document_key: str):
+    """Avisa os listeners registrados de que os dados de busca de um documento mudaram."""
+    for listener in _reindex_listeners:
+        listener(document_key)
+
+# --- Funções Auxiliares ---
+def _get_index_dir(document_key: str) -> str:
+    """Retorna o diretório do índice de um documento."""
+    return os.path.join(INDEXES_DIR, document_key)
+
+def tokenize(text: str) -> List[str]:
+    """
+    Divide um texto em termos para a busca: minúsculas, sem acentos e sem stopwords.
+
+    Args:
+        text (str): O texto a ser dividido.
+
+    Returns:
+        List[str]: A lista de termos, na ordem em que aparecem.
+    """
+    normalized = unicodedata.normalize('NFKD', text.lower())
+    normalized = "".join(c for c in normalized if not unicodedata.combining(c))
+    return [term for term in re.findall(r"\w+", normalized) if len(term) > 1 and term not in STOPWORDS]
+
+# --- Construção do Índice ---
+def build_index(document_key: str, pages: Iterable[Tuple[int, str]], chunk_tokens: int = RETRIEVAL_CHUNK_TOKENS) -> int:
+    """
+    Constrói (ou reconstrói) o índice invertido BM25 de um documento.
+
+    As páginas são divididas em trechos de até `chunk_tokens` tokens. Os trechos são gravados
+    em 'chunks.jsonl' (uma linha por trecho) e o índice invertido, com as posições de cada
+    trecho no arquivo, em 'index.json'. A gravação é feita em um diretório temporário que
+    substitui o anterior apenas no final.
+
+    Args:
+        document_key (str): Identificador do documento (ex: extraction_cache.compute_pdf_key).
+        pages (Iterable[Tuple[int, str]]): Pares (numero_da_pagina, texto) do documento.
+        chunk_tokens (int): O tamanho máximo, em tokens, de cada trecho.
+
+    Returns:
+        int: O número de trechos indexados.
+    """
+    index_dir = _get_index_dir(document_key)
+    # Temporário exclusivo do processo e da thread: indexações simultâneas do mesmo documento não se misturam
+    temp_dir = f"{index_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+    shutil.rmtree(temp_dir, ignore_errors=True)
+    os.makedirs(temp_dir)
+
+    postings = {}
+    doc_lengths = []
+    chunk_offsets = []
+    chunk_tokens_list = []
+    try:
+        with open(os.path.join(temp_dir, 'chunks.jsonl'), 'wb') as chunks_file:
+            for chunk_id, chunk in enumerate(token_utils.iter_token_chunks(pages, chunk_tokens)):
+                chunk_offsets.append(chunks_file.tell())
+                chunks_file.write((json.dumps(chunk, ensure_ascii=False) + "\n").encode('utf-8'))
+                chunk_tokens_list.append(chunk["tokens"])
+
+                terms = tokenize(chunk["text"])
+                doc_lengths.append(len(terms))
+                for term, frequency in Counter(terms).items():
+                    postings.setdefault(term, []).append([chunk_id, frequency])
+
+        index_data = {
+            "version": INDEX_FORMAT_VERSION,
+            "num_chunks": len(doc_lengths),
+            "avg_length": (sum(doc_lengths) / len(doc_lengths)) if doc_lengths else 0.0,
+            "doc_lengths": doc_lengths,
+            "chunk_offsets": chunk_offsets,
+            "chunk_tokens": chunk_tokens_list,
+            "postings": postings
+        }
+        with open(os.path.join(temp_dir, 'index.json'), 'w', encoding='utf-8') as f:
+            json.dump(index_data, f, ensure_ascii=False, separators=(',', ':'))
+
+        shutil.rmtree(index_dir, ignore_errors=True)
+        try:
+            os.replace(temp_dir, index_dir)
+        except OSError:
+            # Outra indexação do mesmo documento terminou entre a remoção e a renomeação: o índice é o mesmo
+            if not index_exists(document_key):
+                raise
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    _loaded_indexes.pop(document_key, None)
+    notify_reindexed(document_key)
+    return len(doc_lengths)
+
+def index_exists(document_key: str) -> bool:
+    """Verifica se já existe um índice para o documento."""
+    return os.path.exists(os.path.join(_get_index_dir(document_key), 'index.json'))
+
+def delete_index(document_key: str) -> bool:
+    """
+    Exclui o índice de um documento.
+
+    Returns:
+        bool: True se o índice existia e foi excluído, False caso contrário.
+    """
+    _loaded_indexes.pop(document_key, None)
+    notify_reindexed(document_key)
+    index_dir = _get_index_dir(document_key)
+    if not os.path.exists(index_dir):
+        return False
+    shutil.rmtree(index_dir, ignore_errors=True)
+    return True
+
+def load_index(document_key: str) -> dict or None:
+    """
+    Carrega o índice de um documento (mantendo-o em memória para as próximas buscas).
+
+    Returns:
+        dict or None: Os dados do índice, ou None se ele não existir ou estiver em formato antigo.
+    """
+    if document_key in _loaded_indexes:
+        return _loaded_indexes[document_key]
+    index_path = os.path.join(_get_index_dir(document_key), 'index.json')
+    if not os.path.exists(index_path):
+        return None
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            index_data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Aviso: Índice de busca inválido para o documento '{document_key}': {e}")
+        return None
+    if index_data.get("version") != INDEX_FORMAT_VERSION:
+        return None
+    _loaded_indexes[document_key] = index_data
+    return index_data
+
+def read_chunks(document_key: str, chunk_ids: List[int]) -> List[dict]:
+    """
+    Lê trechos específicos do arquivo de trechos, sem carregar o arquivo inteiro.
+
+    Args:
+        document_key (str): Identificador do documento.
+        chunk_ids (List[int]): Os IDs (posições) dos trechos desejados.
+
+    Returns:
+        List[dict]: Os trechos, na mesma ordem de `chunk_ids`, cada um com a chave 'chunk_id'.
+    """
+    index_data = load_index(document_key)
+    if not index_data:
+        return []
+    chunks = []
+    with open(os.path.join(_get_index_dir(document_key), 'chunks.jsonl'), 'rb') as chunks_file:
+        for chunk_id in chunk_ids:
+            chunks_file.seek(index_data["chunk_offsets"][chunk_id])
+            chunk = json.loads(chunks_file.readline().decode('utf-8'))
+            chunk["chunk_id"] = chunk_id
+            chunks.append(chunk)
+    return chunks
+
+def iter_chunks(document_key: str) -> Iterator[dict]:
+    """
+    Percorre todos os trechos indexados de um documento, na ordem, lendo um por vez.
+
+    Yields:
+        dict: Os trechos, cada um com a chave 'chunk_id'.
+    """
+    chunks_path = os.path.join(_get_index_dir(document_key), 'chunks.jsonl')
+    if not os.path.exists(chunks_path):
+        return
+    with open(chunks_path, 'r', encoding='utf-8') as chunks_file:
+        for chunk_id, line in enumerate(chunks_file):
+            chunk = json.loads(line)
+            chunk["chunk_id"] = chunk_id
+            yield chunk
+
+# --- Busca ---
+def search_ids(document_key: str, query: str, top_k: int = RETRIEVAL_TOP_K) -> List[Tuple[int, float]]:
+    """
+    Retorna os IDs dos trechos mais relevantes para a consulta, segundo o BM25.
+
+    Returns:
+        List[Tuple[int, float]]: Pares (id_do_trecho, pontuação), do mais para o menos relevante.
+    """
+    index_data = load_index(document_key)
+    if not index_data or not index_data["num_chunks"]:
+        return []
+
+    num_chunks = index_data["num_chunks"]
+    avg_length = index_data["avg_length"] or 1.0
+    doc_lengths = index_data["doc_lengths"]
+    scores = {}
+    for term in set(tokenize(query)):
+        term_postings = index_data["postings"].get(term)
+        if not term_postings:
+            continue
+        idf = math.log(1 + (num_chunks - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+        for chunk_id, frequency in term_postings:
+            length_norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_lengths[chunk_id] / avg_length)
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * frequency * (BM25_K1 + 1) / (frequency + length_norm)
+
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+def search(document_key: str, query: str, top_k: int = RETRIEVAL_TOP_K) -> List[dict]:
+    """
+    Busca os trechos mais relevantes de um documento para a consulta.
+
+    Args:
+        document_key (str): Identificador do documento.
+        query (str): A pergunta ou consulta do usuário.
+        top_k (int): O número máximo de trechos retornados.
+
+    Returns:
+        List[dict]: Os trechos encontrados (com a chave 'score'), do mais para o menos relevante.
+    """
+    ranked = search_ids(document_key, query, top_k)
+    chunks = read_chunks(document_key, [chunk_id for chunk_id, _ in ranked])
+    for chunk, (_, score) in zip(chunks, ranked):
+        chunk["score"] = score
+    return chunks
+
+def select_within_budget(document_key: str, chunk_ids: List[int], token_budget: int) -> List[dict]:
+    """
+    Lê os trechos indicados, na ordem de relevância, enquanto couberem no orçamento de tokens.
+    O resultado é devolvido na ordem do documento, para facilitar a leitura pelo modelo.
+    """
+    index_data = load_index(document_key)
+    if not index_data:
+        return []
+    selected_ids = []
+    used_tokens = 0
+    for chunk_id in chunk_ids:
+        chunk_tokens = index_data["chunk_tokens"][chunk_id]
+        if used_tokens + chunk_tokens > token_budget:
+            continue
+        selected_ids.append(chunk_id)
+        used_tokens += chunk_tokens
+    return read_chunks(document_key, sorted(selected_ids))
+
+def retrieve_context(document_key: str, query: str, token_budget: int = RETRIEVAL_TOKEN_BUDGET, top_k: int = RETRIEVAL_TOP_K) -> List[dict]:
+    """
+    Recupera os trechos mais relevantes para a pergunta que cabem no orçamento de tokens.
+
+    Args:
+        document_key (str): Identificador do documento.
+        query (str): A pergunta do usuário.
+        token_budget (int): O número máximo de tokens somando todos os trechos.
+        top_k (int): O número máximo de trechos considerados.
+
+    Returns:
+        List[dict]: Os trechos selecionados, na ordem em que aparecem no documento.
+    """
+    ranked = search_ids(document_key, query, top_k)
+    return select_within_budget(document_key, [chunk_id for chunk_id, _ in ranked], token_budget)
+
+def format_context(chunks: List[dict]) -> str:
+    """Formata trechos recuperados para serem enviados ao modelo, indicando as páginas de cada um."""
+    parts = []
+    for chunk in chunks:
+        if chunk["first_page"] == chunk["last_page"]:
+            pages_label = f"página {chunk['first_page']}"
+        else:
+            pages_label = f"páginas {chunk['first_page']} a {chunk['last_page']}"
+        parts.append(f"[Trecho ({pages_label})]\n{chunk['text']}")
+    return "\n\n".join(parts)
+
+if __name__ == "__main__":
+    print("Testando retrieval_index.py...")
+
+    test_key = "documento_de_teste"
+    test_pages = [
+        (1, "Introdução às redes de computadores. O modelo OSI possui sete camadas."),
+        (2, "A camada de transporte usa os protocolos TCP e UDP. O TCP garante a entrega ordenada."),
+        (3, "Endereçamento IP: máscaras de sub-rede dividem uma rede em partes menores."),
+    ]
+    print(f"Trechos indexados: {build_index(test_key, test_pages, chunk_tokens=30)}")
+
+    for test_query in ["Quais protocolos a camada de transporte usa?", "o que é máscara de sub-rede"]:
+        print(f"\nConsulta: {test_query}")
+        for result in search(test_key, test_query, top_k=2):
+            print(f"- ({result['score']:.2f}) páginas {result['first_page']}-{result['last_page']}: {result['text'][:60]}...")
+
+    delete_index(test_key)
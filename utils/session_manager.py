@@ -1,8 +1,11 @@
 # session_manager.py
 
-import json
 import os
+import re
 import sys
+import sqlite3
+import atexit
+import threading
 import datetime
 import uuid # Para gerar IDs únicos para os resumos
 
@@ -11,93 +14,206 @@ import uuid # Para gerar IDs únicos para os resumos
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
 sys.path.insert(0, project_root)
 
-# Importa as configurações de caminhos do config.py
-from config.config import SESSIONS_DIR, SUMMARIES_DIR, DEFAULT_SESSION_NAME, SYSTEM_MESSAGE
+# Importa as configurações do config.py
+from config.config import DEFAULT_SESSION_NAME, SYSTEM_MESSAGE, STORAGE_BACKEND, WRITE_BEHIND_SAVES, SESSION_TAIL_MESSAGES
+from utils import storage_backends, profiles
+from utils.chat_history import ChatHistory
 
-# --- Funções Auxiliares ---
-def _ensure_dir_exists(directory_path: str):
-    """Garante que um diretório exista. Se não existir, ele é criado."""
-    os.makedirs(directory_path, exist_ok=True)
+# Erros de leitura dos dados gravados (JSON inválido ou banco SQLite corrompido)
+STORAGE_READ_ERRORS = (ValueError, sqlite3.DatabaseError)
 
-def _get_session_path(session_name: str) -> str:
-    """Retorna o caminho completo para o arquivo de uma sessão."""
-    _ensure_dir_exists(SESSIONS_DIR)
-    return os.path.join(SESSIONS_DIR, f"{session_name}.json")
+# Nomes de sessão aceitos: são usados como nomes de arquivo e de diretório pelo armazenamento e pelos
+# exports, então não podem conter separadores de caminho nem começar com '.' (ex: '..')
+SESSION_NAME_PATTERN = re.compile(r"^\w[\w.-]{0,99}$")
 
-def _get_summary_path(summary_id: str) -> str:
-    """Retorna o caminho completo para o arquivo de um resumo."""
-    _ensure_dir_exists(SUMMARIES_DIR)
-    return os.path.join(SUMMARIES_DIR, f"{summary_id}.json")
+def validate_session_name(session_name: str) -> str:
+    """Retorna o nome da sessão, ou levanta ValueError se ele não puder ser usado como nome de arquivo."""
+    if not isinstance(session_name, str) or not SESSION_NAME_PATTERN.match(session_name):
+        raise ValueError(f"Nome de sessão inválido: '{session_name}'. Use letras, números, '_', '-' ou '.'.")
+    return session_name
 
+# --- Backend de Armazenamento ---
+# Um backend por perfil (veja profiles.py), criado no primeiro uso
+_backends = {}
+_backends_lock = threading.Lock()
 
-# --- Gerenciamento de Sessões ---
-def load_session(session_name: str) -> dict:
-    session_path = _get_session_path(session_name)
-    if os.path.exists(session_path):
-        try:
-            with open(session_path, 'r', encoding='utf-8') as f:
-                session_data = json.load(f) # <--- Linha existente
-
-            # --- Adicione as validações de estrutura AQUI ---
-            if not isinstance(session_data, dict):
-                print(f"Aviso: Sessão '{session_name}' carregada, mas o conteúdo não é um dicionário. Revertendo para padrão.")
-                return {
-                    "chat_history": [{"role": "system", "content": SYSTEM_MESSAGE}],
-                    "active_api_summary_content": None,
-                    "active_api_summary_metadata": None
-                }
-
-            # Garante que 'chat_history' é uma lista
-            if "chat_history" not in session_data or not isinstance(session_data["chat_history"], list):
-                print(f"Aviso: Sessão '{session_name}' tem 'chat_history' inválido. Revertendo para histórico padrão.")
-                session_data["chat_history"] = [{"role": "system", "content": SYSTEM_MESSAGE}]
-
-            # Garante que 'active_api_summary_content' é uma string ou None
-            if "active_api_summary_content" not in session_data or not isinstance(session_data["active_api_summary_content"], (str, type(None))):
-                session_data["active_api_summary_content"] = None
-
-            # Garante que 'active_api_summary_metadata' é um dicionário ou None
-            if "active_api_summary_metadata" not in session_data or not isinstance(session_data["active_api_summary_metadata"], (dict, type(None))):
-                session_data["active_api_summary_metadata"] = None
-            # --- Fim das validações de estrutura ---
-
-            print(f"Sessão '{session_name}' carregada com sucesso.")
-            return session_data
-        except json.JSONDecodeError as e:
-            print(f"Erro ao decodificar a sessão '{session_name}': {e}. Criando uma nova sessão.")
-            # Se o arquivo estiver corrompido, retorna uma sessão padrão
-            return {
-                "chat_history": [{"role": "system", "content": SYSTEM_MESSAGE}],
-                "active_api_summary_content": None,
-                "active_api_summary_metadata": None
-            }
-    else: # Este é o bloco para quando a sessão não existe no disco
-        print(f"Sessão '{session_name}' não encontrada. Iniciando uma nova sessão.")
-        return {
-            "chat_history": [{"role": "system", "content": SYSTEM_MESSAGE}],
-            "active_api_summary_content": None,
-            "active_api_summary_metadata": None
-        }
+def get_storage_backend(profile: str = None) -> storage_backends.StorageBackend:
+    """
+    Retorna o backend de armazenamento do perfil (por padrão, o da thread atual) configurado em
+    STORAGE_BACKEND, criando-o na primeira chamada.
 
-# ... (suas funções load_session, save_session, list_sessions, delete_session) ...
+    Dados gravados por outro backend não são importados aqui; a importação é feita apenas
+    explicitamente, com utils/migrate_storage.py.
+    """
+    profile = profile or profiles.get_current_profile()
+    with _backends_lock:
+        backend = _backends.get(profile)
+        if backend is None:
+            backend = storage_backends.create_backend(STORAGE_BACKEND, profiles.get_profile_paths(profile))
+            _backends[profile] = backend
+    return backend
+
+def set_storage_backend(backend: storage_backends.StorageBackend, profile: str = None):
+    """Substitui o backend de armazenamento do perfil (ex: em testes ou ferramentas de migração)."""
+    profile = profile or profiles.get_current_profile()
+    with _backends_lock:
+        previous = _backends.get(profile)
+        if previous is not None and previous is not backend:
+            previous.close()
+        _backends[profile] = backend
+
+def close_storage_backends():
+    """Fecha os backends de todos os perfis usados (ex: ao encerrar um processo de exportação)."""
+    with _backends_lock:
+        backends = list(_backends.values())
+        _backends.clear()
+    for backend in backends:
+        backend.close()
+
+# --- Gravação em Segundo Plano (write-behind) ---
+# Salvamentos ainda não gravados, por (perfil, sessão). Um novo salvamento da mesma sessão substitui o
+# pendente, então vários salvamentos seguidos resultam em uma única gravação.
+_pending_saves = {}
+_pending_condition = threading.Condition()
+# (perfil, sessão) do lote que o worker está gravando e que ainda não terminaram.
+_saves_in_progress = set()
+_save_worker = None
+
+def _save_worker_loop():
+    """Grava, em segundo plano, os salvamentos pendentes (um lote por vez, na ordem em que chegaram)."""
+    while True:
+        with _pending_condition:
+            while not _pending_saves:
+                _pending_condition.wait()
+            batch = list(_pending_saves.items())
+            _pending_saves.clear()
+            _saves_in_progress.update(key for key, _ in batch)
+        try:
+            for key, session_args in batch:
+                profile, session_name = key
+                try:
+                    with profiles.use_profile(profile):
+                        save_session(session_name, *session_args)
+                finally:
+                    # Quem espera só por esta sessão é liberado sem esperar o restante do lote
+                    with _pending_condition:
+                        _saves_in_progress.discard(key)
+                        _pending_condition.notify_all()
+        finally:
+            with _pending_condition:
+                _saves_in_progress.clear()
+                _pending_condition.notify_all()
+
+def save_session_in_background(session_name: str, chat_history: list, active_api_summary_content: str = None, active_api_summary_metadata: dict = None):
+    """
+    Agenda o salvamento da sessão e retorna imediatamente (veja save_session para os argumentos).
 
-def session_exists(session_name: str) -> bool:
+    Uma cópia do estado atual é agendada, então o chamador pode continuar alterando o histórico.
+    A sessão é gravada no perfil da thread atual. Se WRITE_BEHIND_SAVES estiver desativado, grava na hora.
     """
-    Verifica se uma sessão com o nome fornecido existe no disco.
+    global _save_worker
+    validate_session_name(session_name)
+    if not WRITE_BEHIND_SAVES:
+        save_session(session_name, chat_history, active_api_summary_content, active_api_summary_metadata)
+        return
+    session_args = (
+        chat_history.copy(), # Em um ChatHistory, copia só as mensagens em memória
+        active_api_summary_content,
+        dict(active_api_summary_metadata) if active_api_summary_metadata is not None else None
+    )
+    with _pending_condition:
+        if _save_worker is None or not _save_worker.is_alive():
+            _save_worker = threading.Thread(target=_save_worker_loop, name="gravacao-sessoes", daemon=True)
+            _save_worker.start()
+        _pending_saves[(profiles.get_current_profile(), session_name)] = session_args
+        _pending_condition.notify_all()
+
+def flush_pending_saves(timeout: float = None, profile: str = None, session_name: str = None) -> bool:
+    """
+    Aguarda os salvamentos agendados serem gravados: todos, os de um perfil ou os de uma única sessão.
 
     Args:
-        session_name (str): O nome da sessão a ser verificada.
+        timeout (float, optional): Tempo máximo de espera (segundos). Se None, espera o quanto for preciso.
+        profile (str, optional): Se informado, aguarda apenas os salvamentos desse perfil.
+        session_name (str, optional): Se informado, aguarda apenas os salvamentos da sessão com esse nome.
 
     Returns:
-        bool: True se a sessão existir, False caso contrário.
+        bool: True se não restou nenhum salvamento pendente (dentre os aguardados).
     """
-    return os.path.exists(_get_session_path(session_name))
+    def is_waited(key: tuple) -> bool:
+        return (profile is None or key[0] == profile) and (session_name is None or key[1] == session_name)
+
+    def done() -> bool:
+        return not any(is_waited(key) for key in _pending_saves) and not any(is_waited(key) for key in _saves_in_progress)
 
-# ... (suas funções load_session, save_session, list_sessions, delete_session) ...
+    with _pending_condition:
+        return _pending_condition.wait_for(done, timeout)
+
+def _flush_session_saves(session_name: str = None):
+    """Aguarda os salvamentos pendentes do perfil da thread atual (de uma sessão, se informada)."""
+    flush_pending_saves(profile=profiles.get_current_profile(), session_name=session_name)
+
+# Garante que nada agendado se perca se o programa terminar sem chamar flush_pending_saves
+atexit.register(flush_pending_saves)
+
+def _default_session_data() -> dict:
+    """Retorna os dados de uma sessão nova."""
+    return {
+        "chat_history": [{"role": "system", "content": SYSTEM_MESSAGE}],
+        "active_api_summary_content": None,
+        "active_api_summary_metadata": None
+    }
+
+# --- Gerenciamento de Sessões ---
+def load_session(session_name: str) -> dict:
+    """
+    Carrega uma sessão. Quando o backend permite, apenas as últimas SESSION_TAIL_MESSAGES mensagens
+    são lidas agora, e 'chat_history' é um ChatHistory que lê as mais antigas sob demanda.
+    """
+    validate_session_name(session_name)
+    _flush_session_saves(session_name) # Garante que a leitura veja os salvamentos agendados da sessão
+    try:
+        session_data = get_storage_backend().load_session_window(session_name, SESSION_TAIL_MESSAGES)
+    except STORAGE_READ_ERRORS as e:
+        print(f"Erro ao decodificar a sessão '{session_name}': {e}. Criando uma nova sessão.")
+        # Se os dados estiverem corrompidos, retorna uma sessão padrão
+        return _default_session_data()
+
+    if session_data is None: # A sessão não existe
+        print(f"Sessão '{session_name}' não encontrada. Iniciando uma nova sessão.")
+        return _default_session_data()
+
+    # --- Validações de estrutura ---
+    if not isinstance(session_data, dict):
+        print(f"Aviso: Sessão '{session_name}' carregada, mas o conteúdo não é um dicionário. Revertendo para padrão.")
+        return _default_session_data()
+
+    # Garante que 'chat_history' é uma lista
+    if "chat_history" not in session_data or not isinstance(session_data["chat_history"], (list, ChatHistory)):
+        print(f"Aviso: Sessão '{session_name}' tem 'chat_history' inválido. Revertendo para histórico padrão.")
+        session_data["chat_history"] = [{"role": "system", "content": SYSTEM_MESSAGE}]
+
+    # Garante que 'active_api_summary_content' é uma string ou None
+    if "active_api_summary_content" not in session_data or not isinstance(session_data["active_api_summary_content"], (str, type(None))):
+        session_data["active_api_summary_content"] = None
+
+    # Garante que 'active_api_summary_metadata' é um dicionário ou None
+    if "active_api_summary_metadata" not in session_data or not isinstance(session_data["active_api_summary_metadata"], (dict, type(None))):
+        session_data["active_api_summary_metadata"] = None
+    # --- Fim das validações de estrutura ---
+
+    chat_history = session_data["chat_history"]
+    if not isinstance(chat_history, ChatHistory) and len(chat_history) > SESSION_TAIL_MESSAGES:
+        print(f"Aviso: A sessão '{session_name}' tem {len(chat_history)} mensagens e foi carregada inteira "
+              f"(o backend '{get_storage_backend().name}' não lê o histórico sob demanda). "
+              "Para sessões longas, use STORAGE_BACKEND = \"sqlite\" (migre com utils/migrate_storage.py).")
+
+    print(f"Sessão '{session_name}' carregada com sucesso.")
+    return session_data
 
 def session_exists(session_name: str) -> bool:
     """
-    Verifica se uma sessão com o nome fornecido existe no disco.
+    Verifica se uma sessão com o nome fornecido existe no armazenamento.
 
     Args:
         session_name (str): O nome da sessão a ser verificada.
@@ -105,7 +221,9 @@ def session_exists(session_name: str) -> bool:
     Returns:
         bool: True se a sessão existir, False caso contrário.
     """
-    return os.path.exists(_get_session_path(session_name))
+    validate_session_name(session_name)
+    _flush_session_saves(session_name)
+    return get_storage_backend().session_exists(session_name)
 
 def save_session(session_name: str, chat_history: list, active_api_summary_content: str = None, active_api_summary_metadata: dict = None):
     """
@@ -117,15 +235,14 @@ def save_session(session_name: str, chat_history: list, active_api_summary_conte
         active_api_summary_content (str): O conteúdo do resumo ativo, se houver.
         active_api_summary_metadata (dict): Metadados do resumo ativo, se houver.
     """
-    session_path = _get_session_path(session_name)
     session_data = {
         "chat_history": chat_history,
         "active_api_summary_content": active_api_summary_content,
         "active_api_summary_metadata": active_api_summary_metadata
     }
+    validate_session_name(session_name)
     try:
-        with open(session_path, 'w', encoding='utf-8') as f:
-            json.dump(session_data, f, indent=4, ensure_ascii=False)
+        get_storage_backend().save_session(session_name, session_data)
         # print(f"Sessão '{session_name}' salva com sucesso.")
     except Exception as e:
         print(f"Erro ao salvar a sessão '{session_name}': {e}")
@@ -137,13 +254,8 @@ def list_sessions() -> list:
     Returns:
         list: Uma lista de nomes de sessões.
     """
-    _ensure_dir_exists(SESSIONS_DIR)
-    sessions = [
-        f.replace('.json', '')
-        for f in os.listdir(SESSIONS_DIR)
-        if f.endswith('.json')
-    ]
-    return sorted(sessions)
+    _flush_session_saves() # Sessões novas do perfil ainda não gravadas também aparecem
+    return get_storage_backend().list_sessions()
 
 def delete_session(session_name: str) -> bool:
     """
@@ -155,29 +267,43 @@ def delete_session(session_name: str) -> bool:
     Returns:
         bool: True se a sessão foi excluída com sucesso, False caso contrário.
     """
-    session_path = _get_session_path(session_name)
-    if os.path.exists(session_path):
-        try:
-            os.remove(session_path)
-            return True
-        except Exception as e:
-            return False
-    else:
+    validate_session_name(session_name)
+    _flush_session_saves(session_name) # Um salvamento pendente não pode recriar a sessão depois de excluída
+    try:
+        return get_storage_backend().delete_session(session_name)
+    except Exception as e:
         return False
 
 # --- Gerenciamento de Resumos de PDF ---
-def save_pdf_summary(summary_content: str, metadata: dict) -> str:
+def rebuild_summary_catalog() -> int:
+    """
+    Reconstrói o catálogo de resumos a partir dos arquivos em SUMMARIES_DIR (backend "json").
+    Útil se arquivos de resumo forem copiados ou removidos manualmente.
+
+    Returns:
+        int: O número de resumos catalogados.
     """
-    Salva um resumo de PDF e seus metadados.
+    backend = get_storage_backend()
+    if isinstance(backend, storage_backends.JsonFileBackend):
+        return backend.rebuild_catalog()
+    return len(backend.list_summaries()) # No SQLite, os resumos já são as próprias linhas do catálogo
+
+def save_pdf_summary(summary_content: str, metadata: dict, request_hash: str = None) -> str:
+    """
+    Salva um resumo de PDF e seus metadados, registrando-o no catálogo.
 
     Args:
         summary_content (str): O conteúdo de texto do resumo.
         metadata (dict): Dicionário com metadados do resumo (ex: nome do arquivo original, data).
+        request_hash (str, optional): Hash da requisição que gerou o resumo
+                                      (veja api_service.compute_request_hash). É gravado em
+                                      metadata['request_hash'] para permitir reutilizar o resumo.
 
     Returns:
         str: O ID único do resumo salvo.
     """
-    _ensure_dir_exists(SUMMARIES_DIR)
+    if request_hash:
+        metadata["request_hash"] = request_hash
     summary_id = str(uuid.uuid4()) # Gera um ID único
     summary_data = {
         "id": summary_id,
@@ -185,10 +311,8 @@ def save_pdf_summary(summary_content: str, metadata: dict) -> str:
         "content": summary_content,
         "metadata": metadata
     }
-    summary_path = _get_summary_path(summary_id)
     try:
-        with open(summary_path, 'w', encoding='utf-8') as f:
-            json.dump(summary_data, f, indent=4, ensure_ascii=False)
+        get_storage_backend().save_summary(summary_data)
         print(f"Resumo do PDF '{metadata.get('original_filename', 'N/A')}' salvo com ID: {summary_id}")
         return summary_id
     except Exception as e:
@@ -206,26 +330,55 @@ def load_specific_pdf_summary(summary_id: str) -> dict or None:
         dict or None: Um dicionário contendo 'content' e 'metadata' do resumo,
                       ou None se o resumo não for encontrado.
     """
-    summary_path = _get_summary_path(summary_id)
-    if os.path.exists(summary_path):
-        try:
-            with open(summary_path, 'r', encoding='utf-8') as f:
-                summary_data = json.load(f)
-            return summary_data
-        except json.JSONDecodeError as e:
-            print(f"Erro ao decodificar o resumo '{summary_id}': {e}")
-            return None
-    else:
+    if not SESSION_NAME_PATTERN.match(summary_id): # Os IDs também viram nomes de arquivo (ex: '../x' não é um ID)
         print(f"Resumo com ID '{summary_id}' não encontrado.")
         return None
+    try:
+        summary_data = get_storage_backend().load_summary(summary_id)
+    except STORAGE_READ_ERRORS as e:
+        print(f"Erro ao decodificar o resumo '{summary_id}': {e}")
+        return None
+    if summary_data is None:
+        print(f"Resumo com ID '{summary_id}' não encontrado.")
+    return summary_data
+
+def find_summary_by_request_hash(request_hash: str) -> dict or None:
+    """
+    Procura um resumo salvo que foi gerado pela mesma requisição à API.
+
+    Args:
+        request_hash (str): O hash da requisição (veja api_service.compute_request_hash).
+
+    Returns:
+        dict or None: Os dados completos do resumo mais recente com esse hash, ou None.
+    """
+    for summary_id in get_storage_backend().find_summary_ids_by_request_hash(request_hash):
+        summary_data = load_specific_pdf_summary(summary_id)
+        if summary_data and summary_data.get('content'):
+            return summary_data
+    return None
+
+def get_summary_info(summary_id: str) -> dict or None:
+    """
+    Busca no catálogo as informações de um resumo pelo ID, sem carregar o conteúdo do resumo.
+
+    Returns:
+        dict or None: Dicionário com 'id', 'filename', 'timestamp' e 'size', ou None se não existir.
+    """
+    return get_storage_backend().get_summary_info(summary_id)
 
-# Em utils/session_manager.py
+def get_summary_info_by_position(position: int) -> dict or None:
+    """
+    Busca no catálogo o resumo na posição indicada da listagem (1 = o mais recente).
 
-# ... (código existente, incluindo _get_summary_path) ...
+    Returns:
+        dict or None: As informações do resumo, ou None se a posição estiver fora do intervalo.
+    """
+    return get_storage_backend().get_summary_info_by_position(position)
 
 def delete_pdf_summary(summary_id: str) -> bool:
     """
-    Exclui um arquivo de resumo de PDF existente.
+    Exclui um resumo de PDF existente e sua entrada no catálogo.
 
     Args:
         summary_id (str): O ID do resumo a ser excluído.
@@ -233,45 +386,23 @@ def delete_pdf_summary(summary_id: str) -> bool:
     Returns:
         bool: True se o resumo foi excluído com sucesso, False caso contrário.
     """
-    summary_path = _get_summary_path(summary_id)
-    if os.path.exists(summary_path):
-        try:
-            os.remove(summary_path)
-            return True
-        except OSError as e:
-            print(f"Erro ao excluir o resumo '{summary_id}': {e}")
-            return False
-    else:
-        return False # Resumo não encontrado
+    if not SESSION_NAME_PATTERN.match(summary_id):
+        return False
+    try:
+        return get_storage_backend().delete_summary(summary_id)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Erro ao excluir o resumo '{summary_id}': {e}")
+        return False
 
 def list_summaries() -> list:
     """
-    Lista todos os resumos de PDF salvos.
+    Lista todos os resumos de PDF salvos, consultando apenas o catálogo.
 
     Returns:
-        list: Uma lista de dicionários, cada um contendo 'id', 'filename' e 'timestamp' do resumo.
-    """
-    _ensure_dir_exists(SUMMARIES_DIR)
-    summaries_info = []
-    for f_name in os.listdir(SUMMARIES_DIR):
-        if f_name.endswith('.json'):
-            summary_id = f_name.replace('.json', '')
-            summary_path = _get_summary_path(summary_id)
-            try:
-                with open(summary_path, 'r', encoding='utf-8') as f:
-                    summary_data = json.load(f)
-                metadata = summary_data.get('metadata', {})
-                summaries_info.append({
-                    "id": summary_data.get('id', 'N/A'),
-                    "filename": metadata.get('original_filename', 'N/A'),
-                    "timestamp": summary_data.get('timestamp', 'N/A')
-                })
-            except json.JSONDecodeError as e:
-                print(f"Aviso: Arquivo de resumo corrompido ou inválido: {f_name} - {e}")
-            except Exception as e:
-                print(f"Aviso: Erro ao ler resumo: {f_name} - {e}")
-    # Ordena os resumos pelo timestamp para que os mais recentes apareçam primeiro
-    return sorted(summaries_info, key=lambda x: x.get('timestamp', ''), reverse=True)
+        list: Uma lista de dicionários, cada um contendo 'id', 'filename', 'timestamp' e 'size' do resumo,
+              do mais recente para o mais antigo.
+    """
+    return get_storage_backend().list_summaries()
 
 
 if __name__ == "__main__":
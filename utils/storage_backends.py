@@ -0,0 +1,965 @@
+# storage_backends.py
+
+import gzip
+import json
+import os
+import sys
+import sqlite3
+import threading
+import time
+
+try:
+    import msgpack # Opcional: necessário apenas para STORAGE_FILE_FORMAT = "msgpack"
+except ImportError:
+    msgpack = None
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o módulo é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+# Importa as configurações de armazenamento do config.py
+from utils.chat_history import ChatHistory
+from utils.file_locks import locked, lock_path_for
+from config.config import (
+    SESSIONS_DIR, SUMMARIES_DIR, STORAGE_BACKEND, SQLITE_DB_PATH, JOURNAL_DIR,
+    JOURNAL_FSYNC, JOURNAL_FSYNC_INTERVAL_SECONDS, JOURNAL_COMPACTION_BYTES, STORAGE_FILE_FORMAT
+)
+
+# Formato dos dados de uma sessão trocados com os backends:
+#   {"chat_history": [...], "active_api_summary_content": str|None, "active_api_summary_metadata": dict|None}
+# Formato dos dados de um resumo:
+#   {"id": str, "timestamp": str (ISO), "content": str, "metadata": dict}
+# Formato das informações de um resumo nas listagens:
+#   {"id": str, "filename": str, "timestamp": str, "size": int}
+
+def _summary_info(summary_id: str, filename: str, timestamp: str, size: int) -> dict:
+    """Monta o dicionário de informações de um resumo usado nas listagens."""
+    return {"id": summary_id, "filename": filename, "timestamp": timestamp, "size": size}
+
+# --- Formatos de Arquivo ---
+# Formatos aceitos para gravar sessões, resumos e snapshots. A leitura detecta o formato pelo conteúdo,
+# então arquivos gravados em qualquer formato continuam legíveis depois de trocar STORAGE_FILE_FORMAT.
+FILE_FORMATS = ("json", "json.gz", "msgpack")
+_GZIP_MAGIC = b"\x1f\x8b"
+
+def _check_file_format(file_format: str) -> str:
+    """Valida o formato de arquivo configurado."""
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f"Formato de arquivo '{file_format}' desconhecido. Opções: {', '.join(FILE_FORMATS)}.")
+    if file_format == "msgpack" and msgpack is None:
+        raise ValueError("O formato 'msgpack' requer o pacote msgpack (pip install msgpack).")
+    return file_format
+
+def encode_document(data, file_format: str = "json") -> bytes:
+    """
+    Serializa um documento (sessão, resumo ou snapshot) no formato indicado.
+
+    "json" mantém o formato legível original (indent=4); "json.gz" é JSON compacto comprimido com gzip;
+    "msgpack" é binário (requer o pacote msgpack).
+    """
+    if file_format == "json":
+        return json.dumps(data, ensure_ascii=False, indent=4).encode('utf-8')
+    if file_format == "json.gz":
+        compact = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        # Nível 1: grava quase tão rápido quanto o JSON puro, com arquivos ~5x menores
+        return gzip.compress(compact, compresslevel=1, mtime=0)
+    if file_format == "msgpack":
+        return msgpack.packb(data, use_bin_type=True)
+    raise ValueError(f"Formato de arquivo '{file_format}' desconhecido. Opções: {', '.join(FILE_FORMATS)}.")
+
+def decode_document(raw: bytes):
+    """
+    Desserializa um documento, detectando o formato pelo conteúdo: gzip pelo número mágico,
+    JSON quando o texto começa com '{' ou '[' e msgpack nos demais casos.
+    Levanta ValueError se o conteúdo for inválido.
+    """
+    if raw.startswith(_GZIP_MAGIC):
+        try:
+            raw = gzip.decompress(raw)
+        except (OSError, EOFError) as e:
+            raise ValueError(f"Arquivo gzip inválido: {e}") from e
+    stripped = raw.lstrip()
+    if not stripped or stripped[:1] in (b"{", b"["):
+        return json.loads(raw.decode('utf-8'))
+    if msgpack is None:
+        raise ValueError("O arquivo parece estar no formato msgpack, mas o pacote msgpack não está instalado.")
+    try:
+        return msgpack.unpackb(raw, raw=False)
+    except Exception as e:
+        raise ValueError(f"Arquivo msgpack inválido: {e}") from e
+
+def _read_document(path: str):
+    """Lê e desserializa um documento em qualquer um dos formatos aceitos."""
+    with open(path, 'rb') as f:
+        return decode_document(f.read())
+
+def _write_document_atomic(path: str, data, file_format: str = "json"):
+    """
+    Grava um documento de forma atômica: escreve em um arquivo temporário, força a gravação em disco (fsync)
+    e o renomeia sobre o destino. Uma queda no meio deixa o arquivo anterior intacto.
+    O arquivo temporário é exclusivo de cada processo e thread, então gravações simultâneas do mesmo
+    documento nunca se misturam: o leitor sempre vê uma das versões completas.
+    """
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(encode_document(data, file_format))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def _summary_filename(summary_data: dict) -> str:
+    """Retorna o nome do PDF original de um resumo (ou 'N/A')."""
+    return (summary_data.get('metadata') or {}).get('original_filename', 'N/A')
+
+class StorageBackend:
+    """
+    Interface comum dos backends de armazenamento de sessões e resumos.
+
+    Os métodos levantam exceções (OSError, ValueError, sqlite3.Error) em caso de falha;
+    as mensagens para o usuário ficam a cargo de session_manager.
+    """
+    name = "base"
+    # Arquivo ou diretório onde o backend grava as sessões (informado por utils/migrate_storage.py).
+    storage_path = None
+
+    # --- Sessões ---
+    def load_session(self, session_name: str) -> dict or None:
+        """Retorna os dados da sessão, ou None se ela não existir."""
+        raise NotImplementedError
+
+    def load_session_window(self, session_name: str, tail_size: int) -> dict or None:
+        """
+        Como load_session, mas o backend pode carregar apenas as últimas `tail_size` mensagens e devolver
+        o histórico como um ChatHistory, que lê as mais antigas sob demanda. Por padrão, carrega tudo.
+        """
+        return self.load_session(session_name)
+
+    def save_session(self, session_name: str, session_data: dict):
+        """
+        Grava o estado atual da sessão. O histórico pode ser uma lista ou um ChatHistory.
+
+        O estado gravado é o do chamador: cada sessão deve ter um único processo escritor. As gravações
+        simultâneas não corrompem o armazenamento, mas os turnos gravados por outro processo desde a
+        leitura da sessão são substituídos.
+        """
+        raise NotImplementedError
+
+    def session_exists(self, session_name: str) -> bool:
+        raise NotImplementedError
+
+    def list_sessions(self) -> list:
+        """Retorna os nomes das sessões, em ordem alfabética."""
+        raise NotImplementedError
+
+    def delete_session(self, session_name: str) -> bool:
+        raise NotImplementedError
+
+    # --- Resumos ---
+    def save_summary(self, summary_data: dict):
+        """Grava um resumo completo (id, timestamp, content, metadata)."""
+        raise NotImplementedError
+
+    def load_summary(self, summary_id: str) -> dict or None:
+        """Retorna os dados completos do resumo, ou None se ele não existir."""
+        raise NotImplementedError
+
+    def delete_summary(self, summary_id: str) -> bool:
+        raise NotImplementedError
+
+    def list_summaries(self) -> list:
+        """Retorna as informações de todos os resumos, do mais recente para o mais antigo."""
+        raise NotImplementedError
+
+    def get_summary_info(self, summary_id: str) -> dict or None:
+        raise NotImplementedError
+
+    def get_summary_info_by_position(self, position: int) -> dict or None:
+        """Retorna as informações do resumo na posição indicada da listagem (1 = o mais recente)."""
+        raise NotImplementedError
+
+    def find_summary_ids_by_request_hash(self, request_hash: str) -> list:
+        """Retorna os IDs dos resumos gerados pela requisição indicada, do mais recente para o mais antigo."""
+        raise NotImplementedError
+
+    def close(self):
+        """Libera os recursos abertos pelo backend."""
+
+# --- Backend em arquivos JSON ---
+class JsonFileBackend(StorageBackend):
+    """
+    Backend original: um arquivo por sessão e por resumo, no formato STORAGE_FILE_FORMAT
+    (JSON legível por padrão). Os arquivos mantêm a extensão .json em qualquer formato.
+
+    Os resumos são indexados em um catálogo SQLite (id, nome do arquivo, data, tamanho e hash
+    da requisição), de modo que listagens e buscas não precisam abrir cada arquivo.
+    """
+    name = "json"
+    CATALOG_FILENAME = "_catalog.sqlite3"
+
+    def __init__(self, sessions_dir: str = None, summaries_dir: str = None, file_format: str = None):
+        self.sessions_dir = sessions_dir or SESSIONS_DIR
+        self.summaries_dir = summaries_dir or SUMMARIES_DIR
+        self.file_format = _check_file_format(file_format or STORAGE_FILE_FORMAT)
+
+    def _session_path(self, session_name: str) -> str:
+        os.makedirs(self.sessions_dir, exist_ok=True)
+        return os.path.join(self.sessions_dir, f"{session_name}.json")
+
+    def _summary_path(self, summary_id: str) -> str:
+        os.makedirs(self.summaries_dir, exist_ok=True)
+        return os.path.join(self.summaries_dir, f"{summary_id}.json")
+
+    # --- Sessões ---
+    def load_session(self, session_name: str) -> dict or None:
+        session_path = self._session_path(session_name)
+        if not os.path.exists(session_path):
+            return None
+        return _read_document(session_path)
+
+    def _session_lock(self, session_name: str) -> str:
+        """Arquivo de lock da sessão (gravações e exclusões da mesma sessão, entre processos)."""
+        os.makedirs(self.sessions_dir, exist_ok=True)
+        return lock_path_for(self.sessions_dir, session_name)
+
+    def save_session(self, session_name: str, session_data: dict):
+        session_data = dict(session_data, chat_history=list(session_data.get("chat_history") or []))
+        with locked(self._session_lock(session_name)):
+            _write_document_atomic(self._session_path(session_name), session_data, self.file_format)
+
+    def session_exists(self, session_name: str) -> bool:
+        return os.path.exists(self._session_path(session_name))
+
+    def list_sessions(self) -> list:
+        os.makedirs(self.sessions_dir, exist_ok=True)
+        return sorted(f[:-len('.json')] for f in os.listdir(self.sessions_dir) if f.endswith('.json'))
+
+    def delete_session(self, session_name: str) -> bool:
+        session_path = self._session_path(session_name)
+        with locked(self._session_lock(session_name)):
+            if not os.path.exists(session_path):
+                return False
+            os.remove(session_path)
+            return True
+
+    # --- Catálogo de Resumos ---
+    def _connect_catalog(self) -> sqlite3.Connection:
+        """Abre o catálogo de resumos, criando-o (a partir dos arquivos existentes) se ainda não existir."""
+        os.makedirs(self.summaries_dir, exist_ok=True)
+        catalog_path = os.path.join(self.summaries_dir, self.CATALOG_FILENAME)
+        is_new = not os.path.exists(catalog_path)
+        conn = sqlite3.connect(catalog_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        if is_new:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS summaries ("
+                    "id TEXT PRIMARY KEY, filename TEXT, timestamp TEXT, size INTEGER, request_hash TEXT)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_summaries_timestamp ON summaries (timestamp)")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_summaries_request_hash ON summaries (request_hash)")
+            self._rebuild_catalog(conn)
+        return conn
+
+    @staticmethod
+    def _catalog_entry(summary_data: dict, size: int) -> tuple:
+        """Extrai de um resumo os campos gravados no catálogo."""
+        return (
+            summary_data.get('id'),
+            _summary_filename(summary_data),
+            summary_data.get('timestamp', ''),
+            size,
+            (summary_data.get('metadata') or {}).get('request_hash')
+        )
+
+    def _rebuild_catalog(self, conn: sqlite3.Connection) -> int:
+        """Recria as entradas do catálogo lendo todos os arquivos de resumo (usado apenas na migração)."""
+        entries = []
+        for f_name in os.listdir(self.summaries_dir):
+            if not f_name.endswith('.json'):
+                continue
+            summary_path = os.path.join(self.summaries_dir, f_name)
+            try:
+                summary_data = _read_document(summary_path)
+            except (OSError, ValueError) as e:
+                print(f"Aviso: Arquivo de resumo corrompido ou inválido: {f_name} - {e}")
+                continue
+            summary_data.setdefault('id', f_name[:-len('.json')])
+            entries.append(self._catalog_entry(summary_data, os.path.getsize(summary_path)))
+        with conn:
+            conn.execute("DELETE FROM summaries")
+            conn.executemany("INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?)", entries)
+        return len(entries)
+
+    def rebuild_catalog(self) -> int:
+        """Reconstrói o catálogo a partir dos arquivos de resumo. Retorna o número de resumos catalogados."""
+        conn = self._connect_catalog()
+        try:
+            return self._rebuild_catalog(conn)
+        finally:
+            conn.close()
+
+    def _query_catalog(self, sql: str, params: tuple = ()) -> list:
+        conn = self._connect_catalog()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    # --- Resumos ---
+    def save_summary(self, summary_data: dict):
+        summary_path = self._summary_path(summary_data['id'])
+        conn = self._connect_catalog()
+        try:
+            with conn: # Transação: a entrada só é confirmada se o arquivo for gravado
+                _write_document_atomic(summary_path, summary_data, self.file_format)
+                conn.execute(
+                    "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?)",
+                    self._catalog_entry(summary_data, os.path.getsize(summary_path))
+                )
+        except Exception:
+            if os.path.exists(summary_path):
+                os.remove(summary_path)
+            raise
+        finally:
+            conn.close()
+
+    def load_summary(self, summary_id: str) -> dict or None:
+        summary_path = self._summary_path(summary_id)
+        if not os.path.exists(summary_path):
+            return None
+        return _read_document(summary_path)
+
+    def delete_summary(self, summary_id: str) -> bool:
+        summary_path = self._summary_path(summary_id)
+        if not os.path.exists(summary_path):
+            return False
+        conn = self._connect_catalog()
+        try:
+            with conn: # Transação: se o arquivo não puder ser removido, a entrada é mantida
+                conn.execute("DELETE FROM summaries WHERE id = ?", (summary_id,))
+                os.remove(summary_path)
+            return True
+        finally:
+            conn.close()
+
+    def list_summaries(self) -> list:
+        rows = self._query_catalog("SELECT * FROM summaries ORDER BY timestamp DESC")
+        return [_summary_info(row["id"], row["filename"], row["timestamp"], row["size"]) for row in rows]
+
+    def get_summary_info(self, summary_id: str) -> dict or None:
+        rows = self._query_catalog("SELECT * FROM summaries WHERE id = ?", (summary_id,))
+        return _summary_info(rows[0]["id"], rows[0]["filename"], rows[0]["timestamp"], rows[0]["size"]) if rows else None
+
+    def get_summary_info_by_position(self, position: int) -> dict or None:
+        if position < 1:
+            return None
+        rows = self._query_catalog("SELECT * FROM summaries ORDER BY timestamp DESC LIMIT 1 OFFSET ?", (position - 1,))
+        return _summary_info(rows[0]["id"], rows[0]["filename"], rows[0]["timestamp"], rows[0]["size"]) if rows else None
+
+    def find_summary_ids_by_request_hash(self, request_hash: str) -> list:
+        rows = self._query_catalog(
+            "SELECT id FROM summaries WHERE request_hash = ? ORDER BY timestamp DESC", (request_hash,)
+        )
+        return [row["id"] for row in rows]
+
+# --- Backend SQLite ---
+class SQLiteBackend(StorageBackend):
+    """
+    Backend em um único banco SQLite (modo WAL).
+
+    Cada mensagem do histórico é uma linha da tabela 'messages': salvar uma sessão grava apenas
+    as mensagens novas desde o último salvamento, em vez de reescrever o histórico inteiro.
+    Os resumos ficam na tabela 'summaries', com o conteúdo em um BLOB (UTF-8).
+    Cada thread usa a sua própria conexão.
+    """
+    name = "sqlite"
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS sessions ("
+        "name TEXT PRIMARY KEY, active_summary_content TEXT, active_summary_metadata TEXT, updated_at TEXT)",
+        "CREATE TABLE IF NOT EXISTS messages ("
+        "session_name TEXT NOT NULL, seq INTEGER NOT NULL, message TEXT NOT NULL, "
+        "PRIMARY KEY (session_name, seq)) WITHOUT ROWID",
+        "CREATE TABLE IF NOT EXISTS summaries ("
+        "id TEXT PRIMARY KEY, filename TEXT, timestamp TEXT, size INTEGER, request_hash TEXT, "
+        "metadata TEXT, content BLOB)",
+        "CREATE INDEX IF NOT EXISTS idx_summaries_timestamp ON summaries (timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_summaries_request_hash ON summaries (request_hash)",
+    )
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or SQLITE_DB_PATH
+        self.storage_path = self.db_path
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Retorna a conexão da thread atual, criando-a (e o esquema) na primeira chamada."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Em modo WAL, NORMAL não corrompe o banco em uma queda; no máximo perde as últimas transações
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                for statement in self.SCHEMA:
+                    conn.execute(statement)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @staticmethod
+    def _encode_message(message: dict) -> str:
+        return json.dumps(message, ensure_ascii=False)
+
+    # --- Sessões ---
+    def load_session(self, session_name: str) -> dict or None:
+        conn = self._connect()
+        row = conn.execute("SELECT * FROM sessions WHERE name = ?", (session_name,)).fetchone()
+        if row is None:
+            return None
+        messages = conn.execute(
+            "SELECT message FROM messages WHERE session_name = ? ORDER BY seq", (session_name,)
+        ).fetchall()
+        metadata = row["active_summary_metadata"]
+        return {
+            "chat_history": [json.loads(m["message"]) for m in messages],
+            "active_api_summary_content": row["active_summary_content"],
+            "active_api_summary_metadata": json.loads(metadata) if metadata else None
+        }
+
+    def _load_messages(self, session_name: str, start: int, end: int) -> list:
+        """Lê as mensagens da sessão no intervalo [start, end)."""
+        rows = self._connect().execute(
+            "SELECT message FROM messages WHERE session_name = ? AND seq >= ? AND seq < ? ORDER BY seq",
+            (session_name, start, end)
+        )
+        return [json.loads(row["message"]) for row in rows]
+
+    def load_session_window(self, session_name: str, tail_size: int) -> dict or None:
+        conn = self._connect()
+        row = conn.execute("SELECT * FROM sessions WHERE name = ?", (session_name,)).fetchone()
+        if row is None:
+            return None
+        last = conn.execute(
+            "SELECT MAX(seq) AS last_seq FROM messages WHERE session_name = ?", (session_name,)
+        ).fetchone()["last_seq"]
+        total = last + 1 if last is not None else 0
+        first_message = self._load_messages(session_name, 0, 1)
+        tail_start = max(1, total - tail_size)
+        metadata = row["active_summary_metadata"]
+        return {
+            "chat_history": ChatHistory.from_window(
+                first_message[0] if first_message else None,
+                self._load_messages(session_name, tail_start, total),
+                total,
+                lambda start, end: self._load_messages(session_name, start, end)
+            ),
+            "active_api_summary_content": row["active_summary_content"],
+            "active_api_summary_metadata": json.loads(metadata) if metadata else None
+        }
+
+    def save_session(self, session_name: str, session_data: dict):
+        """
+        Grava a sessão anexando somente as mensagens novas.
+
+        O histórico do chat só cresce por anexação; se a última mensagem gravada não coincidir com a
+        mensagem na mesma posição do histórico (ex: após /limpar), o histórico da sessão é regravado.
+        """
+        chat_history = session_data.get("chat_history") or []
+        metadata = session_data.get("active_api_summary_metadata")
+        conn = self._connect()
+        with conn:
+            # Reserva a escrita antes de ler a última mensagem: outro processo não pode gravar a mesma
+            # sessão entre a leitura e a gravação (sem isso, ambos anexariam a partir da mesma posição)
+            conn.execute("BEGIN IMMEDIATE")
+            last = conn.execute(
+                "SELECT seq, message FROM messages WHERE session_name = ? ORDER BY seq DESC LIMIT 1",
+                (session_name,)
+            ).fetchone()
+            stored_count = last["seq"] + 1 if last else 0
+            if stored_count and (stored_count > len(chat_history)
+                                 or self._encode_message(chat_history[stored_count - 1]) != last["message"]):
+                stored_count = 0
+            # As mensagens são lidas antes de apagar as antigas: um ChatHistory pode buscá-las no próprio banco
+            new_rows = [(session_name, seq, self._encode_message(chat_history[seq]))
+                        for seq in range(stored_count, len(chat_history))]
+            if stored_count == 0:
+                conn.execute("DELETE FROM messages WHERE session_name = ?", (session_name,))
+            conn.executemany("INSERT INTO messages (session_name, seq, message) VALUES (?, ?, ?)", new_rows)
+            conn.execute(
+                "INSERT INTO sessions (name, active_summary_content, active_summary_metadata, updated_at) "
+                "VALUES (?, ?, ?, datetime('now')) ON CONFLICT(name) DO UPDATE SET "
+                "active_summary_content = excluded.active_summary_content, "
+                "active_summary_metadata = excluded.active_summary_metadata, updated_at = excluded.updated_at",
+                (session_name, session_data.get("active_api_summary_content"),
+                 json.dumps(metadata, ensure_ascii=False) if metadata is not None else None)
+            )
+
+    def session_exists(self, session_name: str) -> bool:
+        return self._connect().execute("SELECT 1 FROM sessions WHERE name = ?", (session_name,)).fetchone() is not None
+
+    def list_sessions(self) -> list:
+        return [row["name"] for row in self._connect().execute("SELECT name FROM sessions ORDER BY name")]
+
+    def delete_session(self, session_name: str) -> bool:
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM messages WHERE session_name = ?", (session_name,))
+            return conn.execute("DELETE FROM sessions WHERE name = ?", (session_name,)).rowcount > 0
+
+    # --- Resumos ---
+    def save_summary(self, summary_data: dict):
+        content = (summary_data.get('content') or "").encode('utf-8')
+        metadata = summary_data.get('metadata') or {}
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (summary_data['id'], _summary_filename(summary_data), summary_data.get('timestamp', ''),
+                 len(content), metadata.get('request_hash'), json.dumps(metadata, ensure_ascii=False), content)
+            )
+
+    def load_summary(self, summary_id: str) -> dict or None:
+        row = self._connect().execute("SELECT * FROM summaries WHERE id = ?", (summary_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row["id"],
+            "timestamp": row["timestamp"],
+            "content": bytes(row["content"]).decode('utf-8'),
+            "metadata": json.loads(row["metadata"]) if row["metadata"] else {}
+        }
+
+    def delete_summary(self, summary_id: str) -> bool:
+        conn = self._connect()
+        with conn:
+            return conn.execute("DELETE FROM summaries WHERE id = ?", (summary_id,)).rowcount > 0
+
+    _INFO_COLUMNS = "id, filename, timestamp, size"
+
+    def list_summaries(self) -> list:
+        rows = self._connect().execute(f"SELECT {self._INFO_COLUMNS} FROM summaries ORDER BY timestamp DESC")
+        return [dict(row) for row in rows]
+
+    def get_summary_info(self, summary_id: str) -> dict or None:
+        row = self._connect().execute(
+            f"SELECT {self._INFO_COLUMNS} FROM summaries WHERE id = ?", (summary_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def get_summary_info_by_position(self, position: int) -> dict or None:
+        if position < 1:
+            return None
+        row = self._connect().execute(
+            f"SELECT {self._INFO_COLUMNS} FROM summaries ORDER BY timestamp DESC LIMIT 1 OFFSET ?", (position - 1,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def find_summary_ids_by_request_hash(self, request_hash: str) -> list:
+        rows = self._connect().execute(
+            "SELECT id FROM summaries WHERE request_hash = ? ORDER BY timestamp DESC", (request_hash,)
+        )
+        return [row["id"] for row in rows]
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.ProgrammingError:
+                    pass # Conexão criada por outra thread que já terminou
+            self._connections.clear()
+        self._local = threading.local()
+
+# --- Backend com diário de sessões ---
+class JournalBackend(JsonFileBackend):
+    """
+    Backend em que cada sessão é um snapshot (no formato STORAGE_FILE_FORMAT) mais um diário (JSONL)
+    só de anexação.
+
+    Cada salvamento anexa ao diário apenas as mensagens novas (e o resumo ativo, se ele mudou),
+    então o custo por turno é proporcional à mensagem nova, e não ao histórico inteiro.
+    Ao carregar, o snapshot é lido e o diário é reaplicado por cima. Quando o diário passa de
+    JOURNAL_COMPACTION_BYTES, uma thread em segundo plano o incorpora a um novo snapshot.
+    Os resumos continuam em arquivos JSON (herdados de JsonFileBackend).
+
+    Registros do diário (um objeto JSON por linha):
+      {"op": "append", "start": n, "messages": [...]}     -> trunca o histórico em n e anexa as mensagens
+      {"op": "summary", "content": ..., "metadata": ...}  -> troca o resumo ativo
+    Os registros são idempotentes: reaplicá-los sobre um snapshot que já os contém não muda o resultado,
+    o que torna segura uma compactação interrompida no meio.
+
+    Vários processos podem usar o mesmo diretório: as gravações de uma sessão seguram o lock de arquivo
+    dela (as leituras, um lock compartilhado) e, se o diário mudou desde a última leitura deste processo,
+    a sessão é relida antes de calcular a diferença a anexar. Como nos outros backends, cada sessão tem
+    um único escritor: se outro processo anexou turnos a ela, o histórico deste processo os substitui.
+    """
+    name = "journal"
+    SNAPSHOT_SUFFIX = ".snapshot.json"
+    JOURNAL_SUFFIX = ".journal.jsonl"
+    COMPACTING_SUFFIX = ".compacting.jsonl" # Diário sendo incorporado ao snapshot
+
+    def __init__(self, journal_dir: str = None, summaries_dir: str = None, fsync: str = None,
+                 fsync_interval: float = None, compaction_bytes: int = None, file_format: str = None):
+        super().__init__(summaries_dir=summaries_dir, file_format=file_format)
+        self.journal_dir = journal_dir or JOURNAL_DIR
+        self.storage_path = self.journal_dir
+        self.fsync = fsync or JOURNAL_FSYNC
+        if self.fsync not in ("always", "interval", "never"):
+            raise ValueError(f"Política de fsync '{self.fsync}' desconhecida. Opções: always, interval, never.")
+        self.fsync_interval = JOURNAL_FSYNC_INTERVAL_SECONDS if fsync_interval is None else fsync_interval
+        self.compaction_bytes = compaction_bytes or JOURNAL_COMPACTION_BYTES
+        self._lock = threading.RLock()
+        self._state = {} # Por sessão: o que já está gravado (nº de mensagens, última mensagem, resumo ativo)
+        self._compactions = {} # Por sessão: a thread de compactação em andamento
+        self._last_fsync = 0.0
+
+    def _session_lock(self, session_name: str) -> str:
+        os.makedirs(self.journal_dir, exist_ok=True)
+        return lock_path_for(self.journal_dir, session_name)
+
+    def _compaction_lock(self, session_name: str) -> str:
+        """Arquivo de lock que garante uma única compactação (ou exclusão) da sessão por vez, entre processos."""
+        os.makedirs(self.journal_dir, exist_ok=True)
+        return lock_path_for(self.journal_dir, f"{session_name}.compactacao")
+
+    @staticmethod
+    def _journal_signature(journal_path: str) -> tuple or None:
+        """Identifica a versão do diário (inode e tamanho): muda a cada anexação e a cada compactação."""
+        try:
+            stat = os.stat(journal_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_size)
+
+    def _paths(self, session_name: str) -> tuple:
+        """Retorna os caminhos (snapshot, diário, diário em compactação) de uma sessão."""
+        os.makedirs(self.journal_dir, exist_ok=True)
+        base = os.path.join(self.journal_dir, session_name)
+        return base + self.SNAPSHOT_SUFFIX, base + self.JOURNAL_SUFFIX, base + self.COMPACTING_SUFFIX
+
+    @staticmethod
+    def _encode(value) -> str:
+        return json.dumps(value, ensure_ascii=False)
+
+    # --- Leitura ---
+    @staticmethod
+    def _read_snapshot(snapshot_path: str) -> dict:
+        if not os.path.exists(snapshot_path):
+            return {"chat_history": [], "active_api_summary_content": None, "active_api_summary_metadata": None}
+        return _read_document(snapshot_path)
+
+    @staticmethod
+    def _replay(journal_path: str, session_data: dict):
+        """Reaplica os registros de um diário sobre os dados da sessão."""
+        if not os.path.exists(journal_path):
+            return
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line_num, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Linha incompleta (ex: queda durante a gravação): o registro nunca foi confirmado
+                    print(f"Aviso: Registro incompleto ignorado na linha {line_num} de '{journal_path}'.")
+                    continue
+                if record.get("op") == "append":
+                    history = session_data["chat_history"]
+                    del history[record["start"]:]
+                    history.extend(record["messages"])
+                elif record.get("op") == "summary":
+                    session_data["active_api_summary_content"] = record.get("content")
+                    session_data["active_api_summary_metadata"] = record.get("metadata")
+
+    def _read_session(self, session_name: str) -> dict or None:
+        """Lê o snapshot e reaplica os diários (chamado com self._lock e o lock de arquivo da sessão)."""
+        snapshot_path, journal_path, compacting_path = self._paths(session_name)
+        if not any(os.path.exists(path) for path in (snapshot_path, journal_path, compacting_path)):
+            return None
+        session_data = self._read_snapshot(snapshot_path)
+        self._replay(compacting_path, session_data)
+        self._replay(journal_path, session_data)
+        return session_data
+
+    def _remember(self, session_name: str, session_data: dict or None):
+        """Registra o que já está gravado da sessão, para que o próximo salvamento anexe só a diferença."""
+        history = (session_data or {}).get("chat_history") or []
+        self._state[session_name] = {
+            "exists": session_data is not None,
+            "count": len(history),
+            "last": self._encode(history[-1]) if history else None,
+            "summary": self._encode([(session_data or {}).get("active_api_summary_content"),
+                                     (session_data or {}).get("active_api_summary_metadata")]),
+            "journal": self._journal_signature(self._paths(session_name)[1]),
+            "tail_checked": False
+        }
+        return self._state[session_name]
+
+    # --- Gravação ---
+    def _append_records(self, journal_path: str, records: list, state: dict):
+        """Anexa registros ao diário, aplicando a política de fsync."""
+        lines = "".join(self._encode(record) + "\n" for record in records)
+        if not state["tail_checked"] and os.path.exists(journal_path) and os.path.getsize(journal_path) > 0:
+            # Um processo anterior pode ter caído no meio de uma linha: começa em uma linha nova
+            with open(journal_path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    lines = "\n" + lines
+        state["tail_checked"] = True
+        with open(journal_path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+            now = time.monotonic()
+            if self.fsync == "always" or (self.fsync == "interval" and now - self._last_fsync >= self.fsync_interval):
+                f.flush()
+                os.fsync(f.fileno())
+                self._last_fsync = now
+
+    # --- Compactação ---
+    def _maybe_compact(self, session_name: str, journal_path: str):
+        """Inicia a compactação em segundo plano se o diário passou do limite (chamado com self._lock)."""
+        thread = self._compactions.get(session_name)
+        if thread is not None and thread.is_alive():
+            return
+        try:
+            if os.path.getsize(journal_path) < self.compaction_bytes:
+                return
+        except OSError:
+            return
+        thread = threading.Thread(target=self._compact, args=(session_name,),
+                                  name=f"compactacao-{session_name}", daemon=True)
+        self._compactions[session_name] = thread
+        thread.start()
+
+    def _compact(self, session_name: str):
+        """
+        Incorpora o diário ao snapshot. O diário atual é renomeado (novas gravações vão para um
+        diário novo) e o trabalho pesado é feito fora do lock; só a troca final o segura.
+        """
+        snapshot_path, journal_path, compacting_path = self._paths(session_name)
+        try:
+            with locked(self._compaction_lock(session_name)):
+                with self._lock, locked(self._session_lock(session_name)):
+                    # Uma compactação interrompida deixa o diário anterior: ele é incorporado primeiro
+                    if not os.path.exists(compacting_path):
+                        if not os.path.exists(journal_path):
+                            return
+                        os.replace(journal_path, compacting_path)
+                session_data = self._read_snapshot(snapshot_path)
+                self._replay(compacting_path, session_data)
+                temp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+                _write_document_atomic(temp_path, session_data, self.file_format)
+                with self._lock, locked(self._session_lock(session_name)):
+                    os.replace(temp_path, snapshot_path)
+                    os.remove(compacting_path)
+        except Exception as e:
+            print(f"Aviso: Falha ao compactar o diário da sessão '{session_name}': {e}")
+
+    def wait_for_compactions(self, session_name: str = None):
+        """Aguarda as compactações em andamento (de uma sessão ou de todas) terminarem."""
+        with self._lock:
+            threads = [thread for name, thread in self._compactions.items()
+                       if session_name is None or name == session_name]
+        for thread in threads:
+            thread.join()
+
+    # --- Sessões ---
+    def load_session(self, session_name: str) -> dict or None:
+        with self._lock, locked(self._session_lock(session_name), shared=True):
+            session_data = self._read_session(session_name)
+            self._remember(session_name, session_data)
+        return session_data
+
+    def save_session(self, session_name: str, session_data: dict):
+        """
+        Anexa ao diário somente o que mudou desde o último salvamento.
+
+        O histórico do chat só cresce por anexação; se a última mensagem gravada não coincidir com a
+        mensagem na mesma posição do histórico (ex: após /limpar), o histórico inteiro é regravado.
+        Se outro processo gravou a sessão desde a última leitura, o estado gravado é relido primeiro.
+        """
+        chat_history = session_data.get("chat_history") or []
+        content = session_data.get("active_api_summary_content")
+        metadata = session_data.get("active_api_summary_metadata")
+        summary_key = self._encode([content, metadata])
+        _, journal_path, _ = self._paths(session_name)
+        with self._lock, locked(self._session_lock(session_name)):
+            state = self._state.get(session_name)
+            if state is None or state["journal"] != self._journal_signature(journal_path):
+                state = self._remember(session_name, self._read_session(session_name))
+            count = state["count"]
+            if count > len(chat_history) or (count and self._encode(chat_history[count - 1]) != state["last"]):
+                count = 0 # O histórico foi reescrito: grava tudo a partir do início
+            records = []
+            if count < len(chat_history) or count != state["count"] or not state["exists"]:
+                records.append({"op": "append", "start": count, "messages": chat_history[count:]})
+            if summary_key != state["summary"]:
+                records.append({"op": "summary", "content": content, "metadata": metadata})
+            if not records:
+                return
+            self._append_records(journal_path, records, state)
+            state.update({
+                "exists": True,
+                "count": len(chat_history),
+                "last": self._encode(chat_history[-1]) if chat_history else None,
+                "summary": summary_key,
+                "journal": self._journal_signature(journal_path)
+            })
+            self._maybe_compact(session_name, journal_path)
+
+    def session_exists(self, session_name: str) -> bool:
+        return any(os.path.exists(path) for path in self._paths(session_name))
+
+    def list_sessions(self) -> list:
+        os.makedirs(self.journal_dir, exist_ok=True)
+        names = set()
+        for f_name in os.listdir(self.journal_dir):
+            for suffix in (self.SNAPSHOT_SUFFIX, self.JOURNAL_SUFFIX, self.COMPACTING_SUFFIX):
+                if f_name.endswith(suffix):
+                    names.add(f_name[:-len(suffix)])
+        return sorted(names)
+
+    def delete_session(self, session_name: str) -> bool:
+        self.wait_for_compactions(session_name) # Evita que uma compactação recrie o snapshot excluído
+        with locked(self._compaction_lock(session_name)), self._lock, locked(self._session_lock(session_name)):
+            removed = False
+            for path in self._paths(session_name):
+                if os.path.exists(path):
+                    os.remove(path)
+                    removed = True
+            self._state.pop(session_name, None)
+            return removed
+
+    def close(self):
+        self.wait_for_compactions()
+
+# Backends disponíveis, selecionados por STORAGE_BACKEND.
+BACKENDS = {
+    "json": JsonFileBackend,
+    "sqlite": SQLiteBackend,
+    "journal": JournalBackend,
+}
+
+def create_backend(backend: str = None, profile_paths: dict = None) -> StorageBackend:
+    """
+    Cria uma instância do backend de armazenamento configurado.
+
+    Args:
+        backend (str, optional): O nome do backend (uma chave de BACKENDS). Se None, usa STORAGE_BACKEND.
+        profile_paths (dict, optional): Os caminhos de um perfil (veja profiles.get_profile_paths).
+                                        Se None, usa os caminhos configurados em config.py.
+    """
+    backend = backend or STORAGE_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de armazenamento '{backend}' desconhecido. Opções: {', '.join(BACKENDS)}.")
+    if not profile_paths:
+        return BACKENDS[backend]()
+    if backend == "sqlite":
+        return SQLiteBackend(db_path=profile_paths["sqlite"])
+    if backend == "journal":
+        return JournalBackend(journal_dir=profile_paths["journal"], summaries_dir=profile_paths["summaries"])
+    return JsonFileBackend(sessions_dir=profile_paths["sessions"], summaries_dir=profile_paths["summaries"])
+
+def migrate(source: StorageBackend, target: StorageBackend, overwrite: bool = False) -> tuple:
+    """
+    Copia todas as sessões e resumos de um backend para outro, preservando nomes, IDs e datas.
+
+    Args:
+        source (StorageBackend): O backend de origem.
+        target (StorageBackend): O backend de destino.
+        overwrite (bool): Se True, substitui sessões e resumos que já existem no destino.
+
+    Returns:
+        tuple: (sessões copiadas, resumos copiados, itens ignorados).
+    """
+    sessions_copied = summaries_copied = skipped = 0
+    for session_name in source.list_sessions():
+        if not overwrite and target.session_exists(session_name):
+            skipped += 1
+            continue
+        try:
+            session_data = source.load_session(session_name)
+        except ValueError as e:
+            print(f"Aviso: Sessão '{session_name}' ignorada (arquivo inválido): {e}")
+            skipped += 1
+            continue
+        if not isinstance(session_data, dict):
+            skipped += 1
+            continue
+        if overwrite:
+            target.delete_session(session_name)
+        target.save_session(session_name, session_data)
+        sessions_copied += 1
+
+    for info in source.list_summaries():
+        if not overwrite and target.get_summary_info(info["id"]):
+            skipped += 1
+            continue
+        try:
+            summary_data = source.load_summary(info["id"])
+        except ValueError as e:
+            print(f"Aviso: Resumo '{info['id']}' ignorado (arquivo inválido): {e}")
+            skipped += 1
+            continue
+        if not summary_data:
+            skipped += 1
+            continue
+        summary_data.setdefault('id', info["id"])
+        target.save_summary(summary_data)
+        summaries_copied += 1
+    return sessions_copied, summaries_copied, skipped
+
+if __name__ == "__main__":
+    import tempfile
+
+    print("Testando storage_backends.py...")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        json_backend = JsonFileBackend(os.path.join(temp_dir, "sessions"), os.path.join(temp_dir, "summaries"))
+        history = [{"role": "system", "content": "Sistema"}, {"role": "user", "content": "Olá"}]
+        json_backend.save_session("teste", {"chat_history": history, "active_api_summary_content": None,
+                                            "active_api_summary_metadata": None})
+        json_backend.save_summary({"id": "r1", "timestamp": "2024-01-01T00:00:00", "content": "Resumo",
+                                   "metadata": {"original_filename": "a.pdf", "request_hash": "h"}})
+
+        sqlite_backend = SQLiteBackend(os.path.join(temp_dir, "chatbot.sqlite3"))
+        print("Migração (sessões, resumos, ignorados):", migrate(json_backend, sqlite_backend))
+
+        history.append({"role": "assistant", "content": "Oi!"})
+        sqlite_backend.save_session("teste", {"chat_history": history, "active_api_summary_content": "Resumo",
+                                              "active_api_summary_metadata": {"summary_id": "r1"}})
+        loaded = sqlite_backend.load_session("teste")
+        print("Histórico após anexar:", [m["content"] for m in loaded["chat_history"]])
+        assert loaded["chat_history"] == history
+
+        sqlite_backend.save_session("teste", {"chat_history": history[:1], "active_api_summary_content": None,
+                                              "active_api_summary_metadata": None})
+        assert sqlite_backend.load_session("teste")["chat_history"] == history[:1]
+        print("Resumos:", sqlite_backend.list_summaries())
+        assert sqlite_backend.find_summary_ids_by_request_hash("h") == ["r1"]
+        assert sqlite_backend.load_summary("r1")["content"] == "Resumo"
+        sqlite_backend.close()
+
+        journal_backend = JournalBackend(os.path.join(temp_dir, "journal"), os.path.join(temp_dir, "summaries"),
+                                         fsync="always", compaction_bytes=512)
+        history = [{"role": "system", "content": "Sistema"}]
+        for turn in range(20):
+            history.append({"role": "user", "content": f"Pergunta {turn}"})
+            history.append({"role": "assistant", "content": f"Resposta {turn}"})
+            journal_backend.save_session("diario", {"chat_history": history, "active_api_summary_content": None,
+                                                    "active_api_summary_metadata": None})
+        journal_backend.wait_for_compactions()
+        reopened = JournalBackend(os.path.join(temp_dir, "journal"), os.path.join(temp_dir, "summaries"))
+        assert reopened.load_session("diario")["chat_history"] == history
+        print("Diário após compactação:", sorted(os.listdir(os.path.join(temp_dir, "journal"))))
+        journal_backend.close()
+    print("OK")
@@ -0,0 +1,222 @@
+#summarizer.py
+
+import os
+import sys
+import itertools
+from typing import Iterable, List, Tuple
+
+# Adiciona o diretório raiz do projeto ao sys.path para permitir importações absolutas
+# quando o módulo é executado diretamente.
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, project_root)
+
+from config.config import (
+    DEFAULT_MODEL, TEMPERATURE, SUMMARY_MAX_TOKENS,
+    SUMMARY_CHUNK_TOKENS, SUMMARY_CHUNK_MAX_TOKENS, SUMMARY_MAP_CONCURRENCY
+)
+from utils import api_service, token_utils
+
+# --- Prompts ---
+SUMMARY_SYSTEM_PROMPT = (
+    "Você é um assistente especializado em criar resumos concisos e objetivos de documentos. "
+    "Seu objetivo é extrair as informações mais importantes e apresentá-las de forma clara. "
+    "Responda apenas com o resumo."
+)
+
+def _document_prompt(text: str) -> str:
+    """Prompt usado quando o documento inteiro cabe em um único trecho."""
+    return (
+        "Resuma o seguinte texto de um documento PDF, focando nos pontos chave e informações mais relevantes. "
+        f"Seja conciso e direto. Texto do PDF:\n\n{text}"
+    )
+
+def _chunk_prompt(chunk: dict) -> str:
+    """Prompt da etapa 'map': resumo de um trecho do documento."""
+    return (
+        f"O texto a seguir é um trecho (páginas {chunk['first_page']} a {chunk['last_page']}) de um documento PDF maior. "
+        "Resuma os pontos chave e as informações mais relevantes deste trecho, preservando nomes, números e termos técnicos. "
+        f"Seja conciso e direto. Trecho do PDF:\n\n{chunk['text']}"
+    )
+
+def _reduce_prompt(partial_summaries: List[str]) -> str:
+    """Prompt da etapa 'reduce': combinação de resumos parciais, na ordem do documento."""
+    joined = "\n\n---\n\n".join(partial_summaries)
+    return (
+        "Os textos a seguir são resumos parciais de partes consecutivas de um mesmo documento PDF, na ordem original. "
+        "Combine-os em um único resumo coeso, sem repetições, mantendo os pontos chave e as informações mais relevantes. "
+        f"Resumos parciais:\n\n{joined}"
+    )
+
+def _messages(user_content: str) -> list:
+    """Monta a lista de mensagens de uma requisição de resumo."""
+    return [
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+        {"role": "user", "content": user_content}
+    ]
+
+def scan_document(chunks: Iterable[dict]) -> Tuple[str, int, int]:
+    """
+    Percorre os trechos de um documento uma única vez, calculando o hash do resumo e os totais.
+
+    O hash é calculado com api_service.RequestHasher sobre o prompt de resumo e os trechos, de modo que
+    o mesmo documento, com os mesmos parâmetros, produza sempre o mesmo hash. Apenas o primeiro trecho
+    fica em memória (até se saber se o documento tem mais de um), os demais são descartados após o uso.
+
+    Args:
+        chunks (Iterable[dict]): Os trechos gerados por token_utils.iter_token_chunks.
+
+    Returns:
+        Tuple[str, int, int]: O hash da requisição de resumo, o número de trechos e o total de tokens.
+            Para um documento sem trechos, o hash é uma string vazia.
+    """
+    chunks = iter(chunks)
+    first_chunk = next(chunks, None)
+    if first_chunk is None:
+        return "", 0, 0
+
+    second_chunk = next(chunks, None)
+    if second_chunk is None:
+        request_hash = api_service.compute_request_hash(
+            _messages(_document_prompt(first_chunk["text"])), DEFAULT_MODEL, TEMPERATURE, SUMMARY_MAX_TOKENS
+        )
+        return request_hash, 1, first_chunk["tokens"]
+
+    hasher = api_service.RequestHasher(DEFAULT_MODEL, TEMPERATURE, SUMMARY_MAX_TOKENS)
+    hasher.add_message({"role": "system", "content": SUMMARY_SYSTEM_PROMPT})
+    num_chunks = 0
+    total_tokens = 0
+    for chunk in itertools.chain((first_chunk, second_chunk), chunks):
+        hasher.add_message({"role": "user", "content": _chunk_prompt(chunk)})
+        num_chunks += 1
+        total_tokens += chunk["tokens"]
+    return hasher.hexdigest(), num_chunks, total_tokens
+
+def compute_document_request_hash(chunks: Iterable[dict]) -> str:
+    """
+    Calcula o hash que identifica o resumo de um documento já dividido em trechos (veja scan_document).
+
+    Args:
+        chunks (Iterable[dict]): Os trechos gerados por token_utils.iter_token_chunks.
+
+    Returns:
+        str: O hash da requisição de resumo do documento.
+    """
+    return scan_document(chunks)[0]
+
+# --- Map-Reduce ---
+def _summarize(user_content: str, max_tokens: int) -> str:
+    """Faz uma requisição de resumo (usando o cache de respostas)."""
+    return api_service.get_openai_completion(
+        messages=_messages(user_content),
+        model=DEFAULT_MODEL,
+        temperature=TEMPERATURE,
+        max_tokens=max_tokens,
+        use_cache=True
+    )
+
+def _summarize_batch(user_contents: List[str], max_tokens: int, concurrency: int) -> List[str]:
+    """Faz várias requisições de resumo em paralelo, via cliente assíncrono, mantendo a ordem."""
+    return api_service.get_openai_completions_batch([
+        {
+            "messages": _messages(user_content),
+            "model": DEFAULT_MODEL,
+            "temperature": TEMPERATURE,
+            "max_tokens": max_tokens,
+            "use_cache": True
+        }
+        for user_content in user_contents
+    ], concurrency)
+
+def _group_by_tokens(texts: List[str], max_group_tokens: int) -> List[List[str]]:
+    """Agrupa textos consecutivos de modo que cada grupo tenha no máximo `max_group_tokens` tokens."""
+    groups = []
+    current_group = []
+    current_tokens = 0
+    for text in texts:
+        text_tokens = token_utils.count_tokens_in_string(text)
+        if current_group and current_tokens + text_tokens > max_group_tokens:
+            groups.append(current_group)
+            current_group = []
+            current_tokens = 0
+        current_group.append(text)
+        current_tokens += text_tokens
+    if current_group:
+        groups.append(current_group)
+    return groups
+
+def summarize_chunks(chunks: Iterable[dict], concurrency: int = SUMMARY_MAP_CONCURRENCY, num_chunks: int = None) -> str:
+    """
+    Resume um documento dividido em trechos usando map-reduce.
+
+    - Um único trecho é resumido diretamente, em uma só requisição.
+    - Caso contrário, os trechos são resumidos em paralelo (map, via api_service.get_openai_completions_batch),
+      em lotes de 2 * `concurrency` trechos consumidos do iterável, de modo que só os trechos do lote atual
+      fiquem em memória. Os resumos parciais são combinados em grupos, nível a nível (reduce hierárquico),
+      até restar um único resumo.
+
+    Args:
+        chunks (Iterable[dict]): Os trechos gerados por token_utils.iter_token_chunks (pode ser um gerador).
+        concurrency (int): O número máximo de requisições simultâneas.
+        num_chunks (int, optional): O número de trechos, se já conhecido (apenas para as mensagens de progresso).
+
+    Returns:
+        str: O resumo final, ou uma string vazia se alguma etapa falhar.
+    """
+    chunks = iter(chunks)
+    first_chunk = next(chunks, None)
+    if first_chunk is None:
+        return ""
+    second_chunk = next(chunks, None)
+    if second_chunk is None:
+        return _summarize(_document_prompt(first_chunk["text"]), SUMMARY_MAX_TOKENS)
+
+    if num_chunks:
+        print(f"Documento dividido em {num_chunks} trechos. Resumindo os trechos em paralelo...")
+    else:
+        print("Documento dividido em vários trechos. Resumindo os trechos em paralelo...")
+    partial_summaries = []
+    remaining_chunks = itertools.chain((first_chunk, second_chunk), chunks)
+    del first_chunk, second_chunk
+    batch_size = max(1, concurrency) * 2
+    while True:
+        batch = list(itertools.islice(remaining_chunks, batch_size))
+        if not batch:
+            break
+        batch_summaries = _summarize_batch(
+            [_chunk_prompt(chunk) for chunk in batch], SUMMARY_CHUNK_MAX_TOKENS, concurrency
+        )
+        for chunk, partial_summary in zip(batch, batch_summaries):
+            if not partial_summary:
+                print(f"Erro: Não foi possível resumir o trecho das páginas {chunk['first_page']} a {chunk['last_page']}.")
+                return ""
+        partial_summaries.extend(batch_summaries)
+
+    level = 1
+    while True:
+        groups = _group_by_tokens(partial_summaries, SUMMARY_CHUNK_TOKENS)
+        if len(groups) == len(partial_summaries):
+            # Resumos parciais grandes demais para agrupar: combina aos pares para garantir progresso
+            groups = [partial_summaries[i:i + 2] for i in range(0, len(partial_summaries), 2)]
+        if len(groups) == 1:
+            # Último nível: gera o resumo final com o limite de tokens completo
+            return _summarize(_reduce_prompt(groups[0]), SUMMARY_MAX_TOKENS)
+
+        print(f"Combinando {len(partial_summaries)} resumos parciais em {len(groups)} grupos (nível {level})...")
+        partial_summaries = _summarize_batch(
+            [_reduce_prompt(group) for group in groups], SUMMARY_CHUNK_MAX_TOKENS, concurrency
+        )
+        if not all(partial_summaries):
+            print("Erro: Não foi possível combinar os resumos parciais.")
+            return ""
+        level += 1
+
+if __name__ == "__main__":
+    print("Testando summarizer.py...")
+
+    test_pages = [(page_number, f"Página {page_number}. " + "Conteúdo de teste sobre redes de computadores. " * 200)
+                  for page_number in range(1, 11)]
+    test_chunks = list(token_utils.iter_token_chunks(test_pages, chunk_tokens=1500))
+    print(f"\n{len(test_chunks)} trechos gerados:")
+    for chunk in test_chunks:
+        print(f"- páginas {chunk['first_page']} a {chunk['last_page']}: {chunk['tokens']} tokens")
+    print(f"\nHash da requisição do documento: {compute_document_request_hash(test_chunks)}")
@@ -6,24 +6,76 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.abspath(os.path.join(current_dir, '..'))
 if project_root not in sys.path:
     sys.path.append(project_root)
-import tiktoken
-from config.config import DEFAULT_MODEL
+import threading
+from functools import lru_cache
+from typing import Iterable, Iterator, Tuple
+from config.config import DEFAULT_MODEL, TOKEN_COUNT_CACHE_SIZE
 
-# Carrega o codificador de tokens para o modelo padrão.
-# O encoding "cl100k_base" é comumente usado por modelos como gpt-3.5-turbo e gpt-4.
-ENCODER = tiktoken.get_encoding("cl100k_base")
+# O codificador de tokens é carregado na primeira contagem (ou pelo aquecimento em segundo plano
+# do main.py): carregar o tiktoken e o BPE leva alguns segundos em hardware modesto.
+_encoder = None
+_encoder_lock = threading.Lock()
+
+def get_encoder():
+    """
+    Retorna o codificador de tokens para o modelo padrão, carregando-o na primeira chamada.
+    O encoding "cl100k_base" é comumente usado por modelos como gpt-3.5-turbo e gpt-4.
+    """
+    global _encoder
+    if _encoder is None:
+        with _encoder_lock:
+            if _encoder is None:
+                import tiktoken
+                _encoder = tiktoken.get_encoding("cl100k_base")
+    return _encoder
+
+# Textos maiores que isso não são memorizados (ex: o texto completo de um PDF),
+# para que o cache não mantenha documentos inteiros em memória.
+_TOKEN_COUNT_CACHE_MAX_CHARS = 100000
+
+# Custos fixos usados na contagem de mensagens, conforme a documentação da OpenAI.
+TOKENS_PER_MESSAGE = 3 # Cada mensagem geralmente custa 3 tokens (role, content, e o final do turno)
+TOKENS_PER_NAME = 1    # Se um nome é fornecido, ele custa 1 token extra.
+TOKENS_PER_REPLY = 3   # Cada resposta geralmente começa com 'assistant', o que custa 3 tokens.
+
+@lru_cache(maxsize=TOKEN_COUNT_CACHE_SIZE)
+def _count_tokens_cached(text: str) -> int:
+    """Conta os tokens de um texto, memorizando o resultado (cache LRU indexado pelo conteúdo)."""
+    return len(get_encoder().encode(text))
 
 def count_tokens_in_string(text: str) -> int:
     """
     Conta o número de tokens em uma string de texto usando o codificador padrão.
 
+    O resultado é memorizado: contar novamente um texto já visto (ex: a mensagem de sistema,
+    o resumo ativo ou mensagens antigas do histórico) não executa o tiktoken outra vez.
+
     Args:
         text (str): A string de texto a ser tokenizada.
 
     Returns:
         int: O número de tokens na string.
     """
-    return len(ENCODER.encode(text))
+    if len(text) > _TOKEN_COUNT_CACHE_MAX_CHARS:
+        return len(get_encoder().encode(text))
+    return _count_tokens_cached(text)
+
+def count_tokens_in_message(message: dict) -> int:
+    """
+    Conta os tokens de uma única mensagem (sem o custo fixo da resposta).
+
+    Args:
+        message (dict): Uma mensagem no formato {"role": ..., "content": ...}.
+
+    Returns:
+        int: O número de tokens da mensagem, incluindo o custo fixo por mensagem.
+    """
+    total_tokens = TOKENS_PER_MESSAGE
+    for key, value in message.items():
+        total_tokens += count_tokens_in_string(value or "")
+        if key == "name":
+            total_tokens += TOKENS_PER_NAME
+    return total_tokens
 
 def count_tokens_in_messages(messages: list) -> int:
     """
@@ -31,6 +83,9 @@ def count_tokens_in_messages(messages: list) -> int:
     Esta função é baseada na documentação da OpenAI para contagem de tokens de mensagens
     e leva em consideração a estrutura de role/content.
 
+    Como a contagem de cada texto é memorizada, a cada turno apenas as mensagens novas
+    são de fato codificadas; o custo não cresce com o tamanho da sessão.
+
     Args:
         messages (list): Uma lista de dicionários de mensagens, como:
                          [{"role": "system", "content": "Seu nome é Bot."},
@@ -39,24 +94,102 @@ def count_tokens_in_messages(messages: list) -> int:
     Returns:
         int: O número total de tokens nas mensagens.
     """
-    # Adaptação para gpt-3.5-turbo e gpt-4 conforme documentação da OpenAI
-    # Cada mensagem tem um custo base de 4 tokens (role + content).
-    # Algumas versões de modelo podem ter um custo extra de 1 token para respostas.
+    # Adaptação para gpt-3.5-turbo e gpt-4 conforme documentação da OpenAI.
     # Estamos usando uma abordagem mais segura que se alinha com exemplos da OpenAI.
-    tokens_per_message = 3 # Cada mensagem geralmente custa 3 tokens (role, content, e o final do turno)
-    tokens_per_name = 1    # Se um nome é fornecido, ele custa 1 token extra.
-
-    total_tokens = 0
-    for message in messages:
-        total_tokens += tokens_per_message
-        for key, value in message.items():
-            total_tokens += count_tokens_in_string(value)
-            if key == "name":
-                total_tokens += tokens_per_name
-    total_tokens += 3 # Cada resposta geralmente começa com 'assistant', o que custa 3 tokens.
-                      # Esta é uma estimativa, pode variar ligeiramente.
+    total_tokens = sum(count_tokens_in_message(message) for message in messages)
+    total_tokens += TOKENS_PER_REPLY # Esta é uma estimativa, pode variar ligeiramente.
     return total_tokens
 
+def pack_messages(leading_messages: list, history: list, trailing_messages: list, token_budget: int,
+                  history_start: int = 0) -> tuple:
+    """
+    Monta a lista de mensagens de uma requisição respeitando um orçamento de tokens.
+
+    As mensagens fixas (leading e trailing, ex: sistema, resumo ativo e a pergunta atual)
+    são sempre incluídas. O histórico é percorrido da mensagem mais recente para a mais
+    antiga e incluído enquanto couber no orçamento; a primeira mensagem que não couber
+    encerra a seleção, para que o histórico enviado seja sempre um trecho contínuo.
+
+    Args:
+        leading_messages (list): Mensagens obrigatórias que vêm antes do histórico.
+        history (list): O histórico de mensagens, da mais antiga para a mais recente (uma lista ou
+                        um ChatHistory; só as mensagens examinadas são acessadas).
+        trailing_messages (list): Mensagens obrigatórias que vêm depois do histórico.
+        token_budget (int): O número máximo de tokens desejado para o prompt.
+        history_start (int): Índice da primeira mensagem do histórico que pode ser incluída
+                             (ex: 1 para ignorar a mensagem do sistema em history[0]).
+
+    Returns:
+        tuple: (mensagens, total_de_tokens, mensagens_do_historico_incluidas).
+               O total pode exceder o orçamento se as mensagens obrigatórias sozinhas já o excederem.
+    """
+    total_tokens = TOKENS_PER_REPLY
+    total_tokens += sum(count_tokens_in_message(m) for m in leading_messages)
+    total_tokens += sum(count_tokens_in_message(m) for m in trailing_messages)
+
+    selected_history = []
+    for index in range(len(history) - 1, history_start - 1, -1):
+        message = history[index]
+        message_tokens = count_tokens_in_message(message)
+        if total_tokens + message_tokens > token_budget:
+            break
+        selected_history.append(message)
+        total_tokens += message_tokens
+    selected_history.reverse()
+
+    return list(leading_messages) + selected_history + list(trailing_messages), total_tokens, len(selected_history)
+
+def iter_token_chunks(pages: Iterable[Tuple[int, str]], chunk_tokens: int) -> Iterator[dict]:
+    """
+    Agrupa páginas em trechos de no máximo `chunk_tokens` tokens (contados com get_encoder()).
+
+    As páginas são consumidas conforme chegam; páginas maiores que o limite são divididas.
+
+    Args:
+        pages (Iterable[Tuple[int, str]]): Pares (numero_da_pagina, texto), como os de pdf_processor.iter_pdf_pages.
+        chunk_tokens (int): O número máximo de tokens por trecho.
+
+    Yields:
+        dict: Trechos com as chaves 'text', 'tokens', 'first_page' e 'last_page'.
+    """
+    encoder = get_encoder()
+    buffer_tokens = []
+    first_page = None
+    last_page = None
+
+    for page_number, page_text in pages:
+        if not page_text:
+            continue
+        page_tokens = encoder.encode(page_text)
+        while page_tokens:
+            if first_page is None:
+                first_page = page_number
+            last_page = page_number
+            space_left = chunk_tokens - len(buffer_tokens)
+            buffer_tokens.extend(page_tokens[:space_left])
+            page_tokens = page_tokens[space_left:]
+            if len(buffer_tokens) >= chunk_tokens:
+                yield {
+                    "text": encoder.decode(buffer_tokens),
+                    "tokens": len(buffer_tokens),
+                    "first_page": first_page,
+                    "last_page": last_page
+                }
+                buffer_tokens = []
+                first_page = page_number if page_tokens else None
+
+    if buffer_tokens:
+        yield {
+            "text": encoder.decode(buffer_tokens),
+            "tokens": len(buffer_tokens),
+            "first_page": first_page,
+            "last_page": last_page
+        }
+
+def get_token_cache_info():
+    """Retorna as estatísticas (acertos, falhas, tamanho) do cache de contagem de tokens."""
+    return _count_tokens_cached.cache_info()
+
 if __name__ == "__main__":
     print("Testando token_utils.py...")
 
@@ -80,3 +213,7 @@ if __name__ == "__main__":
     long_text = "Isso é um texto muito longo para testar a contagem de tokens. " * 50
     print(f"\nTexto longo (primeiros 50 chars): '{long_text[:50]}...'")
     print(f"Tokens no texto longo: {count_tokens_in_string(long_text)}")
+
+    # Contar novamente as mesmas mensagens usa apenas o cache
+    count_tokens_in_messages(messages_example)
+    print(f"\nCache de contagem de tokens: {get_token_cache_info()}")